@@ -0,0 +1,254 @@
+"""
+Embedding throughput benchmark: synthetic corpus, one fresh process per configuration, JSON report.
+
+    python bench_embeddings.py --model ./models/all-MiniLM-L6-v2
+    python bench_embeddings.py --engines torch,onnx,onnx-int8 --batch_sizes 32 --lengths 16,64,256,1024
+    python bench_embeddings.py --embedders hf,st,dummy --threads 1,4 --output report.json
+
+Sweeps embedder x engine x batch size x threads x text length (`--lengths`,
+median words per text); each result has texts/s, tokens/s, p50/p99 batch
+latency, load time and peak RSS.
+"""
+from __future__ import annotations
+import argparse, itertools, json, multiprocessing as mp, os, platform, queue, sys, time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Synthetic vocabulary: short and long pseudo-words, so token counts per word
+# vary like in real text instead of every word being one token.
+_SYLLABLES = ["ka", "lo", "ven", "tri", "mar", "sol", "de", "qui", "ron", "pa", "ex", "ul", "ber", "sta", "ni", "go"]
+
+
+def make_corpus(n: int, dist: str = "lognormal", mean_words: int = 120, max_words: int = 2000,
+                seed: int = 0) -> List[str]:
+    """Deterministic synthetic texts whose word counts follow `dist` (fixed | uniform | lognormal)."""
+    rng = np.random.default_rng(seed)
+    if dist == "fixed":
+        counts = np.full(n, mean_words)
+    elif dist == "uniform":
+        counts = rng.integers(1, 2 * mean_words, size=n)
+    elif dist == "lognormal":
+        # median = mean_words, long right tail like documents/chunks in practice
+        counts = rng.lognormal(mean=np.log(mean_words), sigma=0.8, size=n)
+    else:
+        raise ValueError(f"unknown length distribution '{dist}'")
+    counts = np.clip(np.asarray(counts, dtype=int), 1, max_words)
+
+    vocab = ["".join(rng.choice(_SYLLABLES, size=rng.integers(1, 5))) for _ in range(5000)]
+    words = rng.integers(0, len(vocab), size=int(counts.sum()))
+    texts, pos = [], 0
+    for c in counts:
+        texts.append(" ".join(vocab[w] for w in words[pos:pos + c]))
+        pos += c
+    return texts
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _dummy_embed(texts: List[str], dim: int) -> List[List[float]]:
+    """Seeded random vectors: the cost of the harness without a model."""
+    return [np.random.default_rng(abs(hash(t)) % (2**32)).standard_normal(dim).astype("f4").tolist() for t in texts]
+
+
+def _make_embedder(cfg: Dict[str, Any]):
+    """Returns (embed_fn, count_tokens_fn) for one configuration."""
+    kind = cfg["embedder"]
+    if kind == "dummy":
+        return (lambda texts: _dummy_embed(texts, cfg["dim"])), lambda texts: sum(len(t.split()) for t in texts)
+    if kind == "hf":
+        from purecpp_huggingface_embedding.embedding import HuggingFaceEmbeddings
+        emb = HuggingFaceEmbeddings(model_name=cfg["model"], engine=cfg["engine"], quantize=cfg["quantize"],
+                                    batch_size=cfg["batch_size"], onnx_threads=cfg["threads"],
+                                    onnx_cache_dir=cfg.get("onnx_cache_dir"))
+        tok = emb.tokenizer
+        return ((lambda texts: emb.embed_documents(texts, return_numpy=True)),
+                lambda texts: sum(len(ids) for ids in tok(texts, truncation=True)["input_ids"]))
+    if kind == "st":
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(cfg["model"], device="cpu")
+        tok, max_len = model.tokenizer, model.max_seq_length
+        return ((lambda texts: model.encode(texts, batch_size=cfg["batch_size"], normalize_embeddings=True,
+                                            convert_to_numpy=True)),
+                lambda texts: sum(len(ids) for ids in tok(texts, truncation=True, max_length=max_len)["input_ids"]))
+    raise ValueError(f"unknown embedder '{kind}'")
+
+
+def run_config(cfg: Dict[str, Any], texts: List[str], warmup: int = 1) -> Dict[str, Any]:
+    """Benchmarks one configuration in the current process."""
+    if cfg["embedder"] != "dummy":
+        import torch
+        torch.set_num_threads(cfg["threads"])
+
+    t0 = time.perf_counter()
+    embed, count_tokens = _make_embedder(cfg)
+    load_s = time.perf_counter() - t0
+
+    bs = cfg["batch_size"]
+    batches = [texts[i:i + bs] for i in range(0, len(texts), bs)]
+    for batch in batches[:warmup]:
+        embed(batch)
+
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches:
+        t = time.perf_counter()
+        embed(batch)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+
+    tokens = count_tokens(texts)
+    lat_ms = np.asarray(latencies) * 1000.0
+    return {
+        **{k: v for k, v in cfg.items() if k != "onnx_cache_dir"},
+        "texts": len(texts),
+        "tokens": tokens,
+        "mean_tokens": round(tokens / len(texts), 1),
+        "load_s": round(load_s, 3),
+        "total_s": round(total, 3),
+        "texts_per_s": round(len(texts) / total, 2),
+        "tokens_per_s": round(tokens / total, 1),
+        "batch_latency_ms": {
+            "p50": round(float(np.percentile(lat_ms, 50)), 2),
+            "p99": round(float(np.percentile(lat_ms, 99)), 2),
+            "max": round(float(lat_ms.max()), 2),
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _child(cfg: Dict[str, Any], texts: List[str], warmup: int, out) -> None:
+    # Thread caps must be in place before torch / onnxruntime are imported.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(cfg["threads"])
+    try:
+        out.put(run_config(cfg, texts, warmup))
+    except Exception as e:
+        out.put({**cfg, "error": f"{type(e).__name__}: {e}"})
+
+
+def run_isolated(cfg: Dict[str, Any], texts: List[str], warmup: int = 1,
+                 timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Runs one configuration in a fresh process, so peak RSS and thread settings are its own.
+
+    A child that dies (e.g. killed for OOM) or runs past `timeout` seconds yields an error entry.
+    """
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    p = ctx.Process(target=_child, args=(cfg, texts, warmup, out))
+    p.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                return out.get(timeout=1.0)
+            except queue.Empty:
+                pass
+            if p.exitcode is not None:
+                try:  # the result may have landed right before the exit
+                    return out.get(timeout=1.0)
+                except queue.Empty:
+                    return {**cfg, "error": f"benchmark process exited with code {p.exitcode}"}
+            if deadline is not None and time.monotonic() > deadline:
+                p.terminate()
+                return {**cfg, "error": f"timed out after {timeout}s"}
+    finally:
+        p.join()
+
+
+def environment() -> Dict[str, Any]:
+    info = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__}
+    for name in ("torch", "transformers", "onnxruntime", "sentence_transformers"):
+        try:
+            info[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return info
+
+
+def configurations(args) -> List[Dict[str, Any]]:
+    configs = []
+    for length, kind, bs, threads in itertools.product(args.lengths, args.embedders, args.batch_sizes, args.threads):
+        engines = args.engines if kind == "hf" else ["-"]
+        for engine in engines:
+            configs.append({
+                "embedder": kind, "model": None if kind == "dummy" else args.model,
+                "engine": "onnx" if engine == "onnx-int8" else engine, "quantize": engine == "onnx-int8",
+                "batch_size": bs, "threads": threads, "mean_words": length, "dim": args.dim,
+                "onnx_cache_dir": args.onnx_cache_dir,
+            })
+    return configs
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Embedding throughput benchmark (synthetic corpus, JSON report)")
+    ap.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2",
+                    help="model id or local folder; must already be on disk unless --online")
+    ap.add_argument("--embedders", default="hf,dummy", help="comma list of hf (HuggingFaceEmbeddings), "
+                    "st (sentence-transformers), dummy (random vectors, harness overhead)")
+    ap.add_argument("--engines", default="torch", help="hf engines: torch,onnx,onnx-int8")
+    ap.add_argument("--batch_sizes", default="8,32,128")
+    ap.add_argument("--threads", default=str(os.cpu_count() or 1), help="comma list of intra-op thread counts")
+    ap.add_argument("--dim", type=int, default=384, help="dummy embedder dimension")
+
+    ap.add_argument("--texts", type=int, default=1000)
+    ap.add_argument("--length_dist", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    ap.add_argument("--lengths", default="16,120,512",
+                    help="comma list of median words per text (the sequence-length sweep)")
+    ap.add_argument("--max_words", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--warmup", type=int, default=1, help="batches run before timing")
+
+    ap.add_argument("--onnx_cache_dir", default=None)
+    ap.add_argument("--online", action="store_true", help="allow downloads from the Hugging Face Hub")
+    ap.add_argument("--in_process", action="store_true", help="run configurations in this process "
+                    "(faster, but peak RSS and thread caps are shared)")
+    ap.add_argument("--timeout", type=float, default=1800, help="seconds per isolated configuration")
+    ap.add_argument("--output", default="-", help="JSON report path ('-' = stdout)")
+    args = ap.parse_args()
+    args.embedders = [e.strip() for e in args.embedders.split(",") if e.strip()]
+    args.engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    args.batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    args.threads = [int(t) for t in args.threads.split(",")]
+    args.lengths = [int(n) for n in args.lengths.split(",")]
+
+    if not args.online:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    corpora = {n: make_corpus(args.texts, args.length_dist, n, args.max_words, args.seed) for n in args.lengths}
+    results = []
+    for cfg in configurations(args):
+        texts = corpora[cfg["mean_words"]]
+        r = (run_config(cfg, texts, args.warmup) if args.in_process
+             else run_isolated(cfg, texts, args.warmup, args.timeout))
+        results.append(r)
+        label = (f"{r['embedder']}/{r['engine']}{'-int8' if r['quantize'] else ''} words={r['mean_words']} "
+                 f"bs={r['batch_size']} threads={r['threads']}")
+        if "error" in r:
+            print(f"[bench] {label}: {r['error']}", file=sys.stderr)
+        else:
+            print(f"[bench] {label}: {r['texts_per_s']} texts/s {r['tokens_per_s']} tokens/s "
+                  f"p99={r['batch_latency_ms']['p99']}ms rss={r['peak_rss_mb']}MB", file=sys.stderr)
+
+    report = {
+        "environment": environment(),
+        "corpus": {"texts": args.texts, "length_dist": args.length_dist, "lengths": args.lengths,
+                   "max_words": args.max_words, "seed": args.seed},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
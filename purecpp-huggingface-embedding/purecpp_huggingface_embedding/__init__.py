@@ -0,0 +1,30 @@
+"""Pure-Python Hugging Face embeddings.
+
+Public names are resolved on first access (PEP 562), so importing the package
+does not import torch, transformers or onnxruntime.
+"""
+import importlib
+
+_EXPORTS = {
+    'HuggingFaceEmbeddings': '.embedding',
+    'MODEL_ALIASES': '.embedding',
+    'ParallelEmbeddings': '.parallel',
+    'EmbeddingCache': '.cache',
+    'CachedEmbeddings': '.cache',
+    'EmbeddingBatcher': '.batcher',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,120 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text requests into batched forward passes.
+
+    Callers `await batcher.embed(text)`; requests are queued and flushed as one
+    `embed_documents` call as soon as `max_batch_size` texts are waiting or
+    `max_wait_ms` elapsed since the first one arrived. The forward pass runs in
+    an executor (one thread by default), so the event loop keeps accepting
+    requests meanwhile, and each caller's future is resolved with its own vector.
+    """
+
+    def __init__(self, embedder, max_batch_size: int = 32, max_wait_ms: float = 5.0,
+                 executor: Optional[Executor] = None):
+        """
+        Args:
+            embedder: Object exposing `embed_documents(texts)` (or `embed(texts)`).
+            max_batch_size: Texts per forward pass.
+            max_wait_ms: Longest time a request waits for others to join its batch.
+            executor: Where the forward pass runs; defaults to a single thread.
+        """
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='embedding-batcher')
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _ensure_started(self) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return self._queue
+
+    async def embed(self, text: str) -> List[float]:
+        """Embeds one text as part of whatever batch is being formed."""
+        future = asyncio.get_running_loop().create_future()
+        await self._ensure_started().put((text, future))
+        return await future
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embeds several texts, batched together with concurrent requests."""
+        return list(await asyncio.gather(*(self.embed(t) for t in texts)))
+
+    def _forward(self, texts: List[str]):
+        if hasattr(self.embedder, 'embed_documents'):
+            return self.embedder.embed_documents(texts)
+        return self.embedder.embed(texts)
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        try:
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # these requests are off the queue already, so aclose() cannot reach them
+            for _, fut in batch:
+                fut.cancel()
+            raise
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [(text, fut) for text, fut in await self._collect() if not fut.done()]
+            if not batch:
+                continue
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._forward, [t for t, _ in batch])
+            except asyncio.CancelledError:
+                for _, fut in batch:
+                    fut.cancel()
+                raise
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            for (_, fut), vec in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vec)
+
+    async def aclose(self) -> None:
+        """Stops the batching task (pending callers are cancelled) and the default executor."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, fut = self._queue.get_nowait()
+                fut.cancel()
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def __aenter__(self) -> 'EmbeddingBatcher':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
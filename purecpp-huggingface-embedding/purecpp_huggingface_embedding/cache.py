@@ -0,0 +1,225 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'purecpp_huggingface_embedding', 'embeddings.sqlite')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC + collapsed whitespace, so trivially different copies share a key."""
+    return _WHITESPACE_RE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+class EmbeddingCache:
+    """Float32 vectors keyed by content hash, in SQLite with an in-memory LRU front.
+
+    The database runs in WAL mode, so any number of processes can read and
+    write the same file concurrently; duplicate writes of the same key are
+    ignored. Triggers keep a running total of the stored bytes and the least
+    recently used rows are evicted once `max_bytes` is exceeded.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 2 * 1024 ** 3,
+                 memory_items: int = 10000):
+        """
+        Opens (or creates) the cache.
+
+        Args:
+            path: SQLite file, shared by every process using the cache.
+            max_bytes: Size cap of the stored vectors; LRU rows are evicted above it.
+            memory_items: Entries kept in the per-process LRU (0 disables it).
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self._memory: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key   TEXT PRIMARY KEY,
+                vec   BLOB NOT NULL,
+                atime REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS embeddings_atime ON embeddings(atime);
+            CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO cache_size (id, bytes) VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS embeddings_add AFTER INSERT ON embeddings
+                BEGIN UPDATE cache_size SET bytes = bytes + length(NEW.vec) WHERE id = 0; END;
+            CREATE TRIGGER IF NOT EXISTS embeddings_del AFTER DELETE ON embeddings
+                BEGIN UPDATE cache_size SET bytes = bytes - length(OLD.vec) WHERE id = 0; END;
+        """)
+
+    @staticmethod
+    def make_key(namespace: str, text: str, normalize: bool = True) -> str:
+        if normalize:
+            text = normalize_text(text)
+        return hashlib.sha256(f"{namespace}\0{text}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        if not self.memory_items:
+            return
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Returns the cached vectors for the keys that are present."""
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            missing = []
+            for key in keys:
+                vec = self._memory.get(key)
+                if vec is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[key] = vec
+            if not missing:
+                return found
+
+            now = time.time()
+            for start in range(0, len(missing), 500):
+                part = missing[start:start + 500]
+                marks = ','.join('?' * len(part))
+                rows = self._db.execute(f"SELECT key, vec FROM embeddings WHERE key IN ({marks})", part).fetchall()
+                for key, blob in rows:
+                    vec = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vec
+                    self._remember(key, vec)
+                if rows:
+                    self._db.execute(f"UPDATE embeddings SET atime = ? WHERE key IN ({marks})", [now, *part])
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        """Stores vectors (float32) and evicts least recently used rows if over `max_bytes`."""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        with self._lock:
+            for key, vec in items.items():
+                vec = np.ascontiguousarray(vec, dtype=np.float32)
+                self._remember(key, vec)
+                rows.append((key, vec.tobytes(), now))
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("INSERT OR IGNORE INTO embeddings (key, vec, atime) VALUES (?, ?, ?)", rows)
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        size = self._db.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        if size <= self.max_bytes:
+            return
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(length(vec)), 0) FROM embeddings").fetchone()
+        avg = max(1, total // max(1, count))
+        # drop to 90% of the cap so eviction does not run on every insert
+        excess = size - int(self.max_bytes * 0.9)
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY atime LIMIT ?)",
+            (excess // avg + 1,),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            size = self._db.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        return {'entries': count, 'bytes': size, 'memory_entries': len(self._memory)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM embeddings")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class CachedEmbeddings:
+    """Caches any embedder by content hash.
+
+    Wraps objects exposing `embed_documents(texts)` (HuggingFaceEmbeddings,
+    ParallelEmbeddings) or `embed(texts)` (the `rds_vdb` Embedder interface),
+    and offers both methods, so it can stand in for either. Only texts not
+    found in the cache are sent to the wrapped embedder, deduplicated.
+    """
+
+    def __init__(self, embedder, cache: Optional[EmbeddingCache] = None, namespace: Optional[str] = None,
+                 normalize: bool = True):
+        """
+        Args:
+            embedder: The embedder to wrap.
+            cache: Shared `EmbeddingCache` (defaults to one at DEFAULT_CACHE_PATH).
+            namespace: Part of every key; must change whenever the vectors would
+                (model, engine, quantization, truncation...). Derived from the
+                embedder's `model_id`, `engine`, `quantize`, `truncate_dim`,
+                `max_length` and `dim` by default; embedders without a `model_id`
+                need an explicit namespace.
+            normalize: Normalize unicode/whitespace before hashing.
+        """
+        self.embedder = embedder
+        self.namespace = namespace or self._default_namespace(embedder)
+        self.cache = cache or EmbeddingCache()
+        self.normalize = normalize
+
+    @staticmethod
+    def _default_namespace(embedder) -> str:
+        model_id = getattr(embedder, 'model_id', None)
+        if not model_id:
+            raise ValueError(f"{type(embedder).__name__} does not expose a `model_id`; pass `namespace=` "
+                             "to CachedEmbeddings so different models never share cache entries.")
+        parts = [model_id,
+                 getattr(embedder, 'engine', None),
+                 'int8' if getattr(embedder, 'quantize', False) else None,
+                 'unnormalized' if getattr(embedder, 'normalize', True) is False else None,
+                 f"truncate_dim={getattr(embedder, 'truncate_dim')}" if getattr(embedder, 'truncate_dim', None) else None,
+                 f"max_length={getattr(embedder, 'max_length')}" if getattr(embedder, 'max_length', None) else None,
+                 f"dim={getattr(embedder, 'dim')}" if getattr(embedder, 'dim', None) else None]
+        return '|'.join(str(p) for p in parts if p)
+
+    @property
+    def dim(self) -> Optional[int]:
+        return getattr(self.embedder, 'dim', None)
+
+    def _compute(self, texts: List[str]):
+        if hasattr(self.embedder, 'embed_documents'):
+            return self.embedder.embed_documents(texts)
+        return self.embedder.embed(texts)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Returns embeddings for `texts`, computing only the cache misses."""
+        keys = [self.cache.make_key(self.namespace, t, self.normalize) for t in texts]
+        found = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        todo: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in todo:
+                todo[key] = text
+        if todo:
+            vectors = np.asarray(self._compute(list(todo.values())), dtype=np.float32)
+            fresh = dict(zip(todo.keys(), vectors))
+            self.cache.put_many(fresh)
+            found.update(fresh)
+        return [found[key].tolist() for key in keys]
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
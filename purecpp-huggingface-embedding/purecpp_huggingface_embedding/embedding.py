@@ -1,6 +1,16 @@
-import torch
-from transformers import AutoTokenizer, AutoModel
-from typing import List
+import logging
+import os
+import re
+import threading
+import time
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+# torch and transformers are imported on first model load, so importing this
+# module (and the CLIs/workers that use it) stays fast.
+
+logger = logging.getLogger(__name__)
 
 MODEL_ALIASES = {
     'bge-base': 'BAAI/bge-base-en-v1.5',
@@ -8,6 +18,20 @@ MODEL_ALIASES = {
     'mini-lm': 'sentence-transformers/all-MiniLM-L6-v2',
 }
 
+@dataclass
+class WindowEmbedding:
+    """Embedding of one token window of a long document.
+
+    `start`/`end` are character offsets into the document text and
+    `token_start`/`token_end` token offsets (special tokens excluded).
+    """
+    embedding: List[float]
+    start: int
+    end: int
+    token_start: int
+    token_end: int
+
+
 class HuggingFaceEmbeddings:
     """A pure Python embedding class using Hugging Face transformers.
 
@@ -15,22 +39,140 @@ class HuggingFaceEmbeddings:
     to generate sentence embeddings for a list of documents. It handles
     tokenization, model inference, and pooling.
     """
-    def __init__(self, model_name: str = 'mini-lm', device: str = 'cpu'):
+    def __init__(self, model_name: str = 'mini-lm', device: str = 'cpu',
+                 batch_size: int = 32, max_tokens_per_batch: Optional[int] = None,
+                 engine: str = 'torch', quantize: bool = False, onnx_cache_dir: Optional[str] = None,
+                 truncate_dim: Optional[int] = None, lazy: bool = False,
+                 model_cache_dir: Optional[str] = None, onnx_threads: Optional[int] = None,
+                 max_length: Optional[int] = None):
         """
         Initializes the embedding model.
 
         Args:
             model_name: The name or alias of the Hugging Face model to use.
             device: The device to run the model on ('cpu' or 'cuda').
+            batch_size: Default maximum number of texts per forward pass.
+            max_tokens_per_batch: Default cap on padded tokens (texts x longest
+                text) per forward pass; None means only `batch_size` applies.
+            engine: 'torch' (eager PyTorch) or 'onnx' (ONNX Runtime; the model is
+                exported once and cached, requires `onnxruntime`).
+            quantize: With engine='onnx', use dynamic int8 weight quantization.
+            onnx_cache_dir: Where exported ONNX models are cached.
+            truncate_dim: Default Matryoshka truncation: keep the first N
+                dimensions and re-normalize (None keeps the full vector).
+            lazy: Defer loading the tokenizer/model until the first embedding call.
+            model_cache_dir: Local copy of the model in safetensors format. The
+                first load saves it there; later loads read it offline, with the
+                weights memory-mapped instead of downloaded or copied.
+            onnx_threads: Intra-op threads of the ONNX Runtime session (the torch
+                engine follows `torch.set_num_threads`).
+            max_length: Tokens kept per text by `embed_documents` (and the default
+                window of `embed_long_documents`); None uses the model's limit.
         """
+        if engine not in ('torch', 'onnx'):
+            raise ValueError(f"Unknown engine '{engine}', expected 'torch' or 'onnx'.")
         # Resolve model alias if it exists
         model_id = MODEL_ALIASES.get(model_name, model_name)
 
-        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
-        self.model = AutoModel.from_pretrained(model_id)
+        self.model_id = model_id
+        self.engine = engine
+        self.quantize = quantize and engine == 'onnx'
         self.device = device
-        self.model.to(self.device)
-        print(f"HuggingFaceEmbeddings model '{model_id}' loaded on {device}.")
+        self.batch_size = batch_size
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.truncate_dim = truncate_dim
+        self.max_length = max_length
+        self.onnx_cache_dir = onnx_cache_dir
+        self.model_cache_dir = model_cache_dir
+        self.onnx_threads = onnx_threads
+
+        self._tokenizer = None
+        self._model = None
+        self._onnx = None
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        if not lazy:
+            self._ensure_loaded()
+
+    @property
+    def tokenizer(self):
+        self._ensure_loaded()
+        return self._tokenizer
+
+    @property
+    def model(self):
+        self._ensure_loaded()
+        return self._model
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+                self._loaded = True
+
+    def _local_model_path(self) -> Optional[str]:
+        if not self.model_cache_dir:
+            return None
+        return os.path.join(self.model_cache_dir, re.sub(r'[^A-Za-z0-9._-]+', '--', self.model_id))
+
+    def _load(self) -> None:
+        """Loads tokenizer and model (from the local safetensors copy when present) and logs timings."""
+        t0 = time.perf_counter()
+        from transformers import AutoTokenizer, AutoModel
+        t_import = time.perf_counter() - t0
+
+        source, local_only = self.model_id, False
+        local_path = self._local_model_path()
+        if local_path and os.path.exists(os.path.join(local_path, 'config.json')):
+            source, local_only = local_path, True
+
+        t1 = time.perf_counter()
+        self._tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=local_only)
+        t_tokenizer = time.perf_counter() - t1
+
+        t2 = time.perf_counter()
+        if self.engine == 'onnx':
+            from .onnx_engine import OnnxEngine
+            self._onnx = OnnxEngine(self.model_id, self._tokenizer, quantize=self.quantize, device=self.device,
+                                    cache_dir=self.onnx_cache_dir, num_threads=self.onnx_threads,
+                                    model_path=source)
+        else:
+            # safetensors weights are memory-mapped by transformers while loading
+            self._model = AutoModel.from_pretrained(source, local_files_only=local_only)
+            self._model.to(self.device)
+            self._model.eval()
+            if local_path and not local_only:
+                self._save_local(local_path)
+        t_model = time.perf_counter() - t2
+
+        logger.info(
+            "HuggingFaceEmbeddings model '%s' loaded on %s (%s) from %s in %.2fs "
+            "(imports %.2fs, tokenizer %.2fs, model %.2fs)",
+            self.model_id, self.device, self.engine, 'local cache' if local_only else source,
+            time.perf_counter() - t0, t_import, t_tokenizer, t_model,
+        )
+
+    def _save_local(self, path: str) -> None:
+        tmp = f"{path}.tmp-{os.getpid()}"
+        self._model.save_pretrained(tmp, safe_serialization=True)
+        self._tokenizer.save_pretrained(tmp)
+        try:
+            os.replace(tmp, path)
+        except OSError:  # another process saved it first
+            import shutil
+            shutil.rmtree(tmp, ignore_errors=True)
+        logger.info("HuggingFaceEmbeddings saved '%s' to %s", self.model_id, path)
+
+    def _width(self, truncate_dim: Optional[int]) -> int:
+        """Columns of the returned vectors: `truncate_dim`, else the model's hidden size."""
+        if truncate_dim:
+            return truncate_dim
+        self._ensure_loaded()
+        if self._onnx is not None:
+            return int(self._onnx.session.get_outputs()[0].shape[-1])
+        return self._model.config.hidden_size
 
     def _mean_pooling(self, model_output, attention_mask):
         """Performs mean pooling on the token embeddings.
@@ -38,37 +180,210 @@ class HuggingFaceEmbeddings:
         Takes the last hidden state and applies the attention mask to average the
         token embeddings across the sequence dimension.
         """
+        import torch
         token_embeddings = model_output.last_hidden_state
         input_mask_expanded = attention_mask.unsqueeze(-1).expand(token_embeddings.size()).float()
         sum_embeddings = torch.sum(token_embeddings * input_mask_expanded, 1)
         sum_mask = torch.clamp(input_mask_expanded.sum(1), min=1e-9)
         return sum_embeddings / sum_mask
 
-    @torch.no_grad()
-    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+    def _length_batches(self, lengths: List[int], batch_size: int,
+                        max_tokens_per_batch: Optional[int]) -> List[List[int]]:
+        """Groups text indices into batches of similar token length.
+
+        Indices are sorted by length (longest first, so an out-of-memory batch
+        shows up immediately) and cut whenever the batch would exceed
+        `batch_size` texts or `max_tokens_per_batch` padded tokens.
+        """
+        order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for i in order:
+            if current:
+                longest = lengths[current[0]]
+                too_many = len(current) >= batch_size
+                too_large = max_tokens_per_batch is not None and (len(current) + 1) * longest > max_tokens_per_batch
+                if too_many or too_large:
+                    batches.append(current)
+                    current = []
+            current.append(i)
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, features):
+        """Pads one batch of token ids and returns its normalized embeddings."""
+        if self._onnx is not None:
+            return self._onnx.embed(self.tokenizer.pad(features, padding=True, return_tensors='np'))
+
+        import torch
+        encoded_input = self.tokenizer.pad(features, padding=True, return_tensors='pt')
+        encoded_input = {k: v.to(self.device) for k, v in encoded_input.items()}
+
+        with torch.no_grad():
+            # Get model output
+            model_output = self.model(**encoded_input)
+
+            # Perform pooling and normalization
+            sentence_embeddings = self._mean_pooling(model_output, encoded_input['attention_mask'])
+            return torch.nn.functional.normalize(sentence_embeddings, p=2, dim=1).cpu().numpy()
+
+    def embed_documents(self, texts: List[str], batch_size: Optional[int] = None,
+                        max_tokens_per_batch: Optional[int] = None, return_numpy: bool = False,
+                        dtype: Union[str, np.dtype] = 'float32',
+                        truncate_dim: Optional[int] = None) -> Union[List[List[float]], np.ndarray]:
         """
         Generates embeddings for a list of documents.
 
+        Texts are tokenized once, grouped into length-homogeneous batches so
+        short texts are not padded to the longest one in the corpus, embedded
+        batch by batch and returned in the original order.
+
         Args:
             texts: A list of strings to embed.
+            batch_size: Maximum texts per forward pass (defaults to the instance setting).
+            max_tokens_per_batch: Maximum padded tokens per forward pass (defaults
+                to the instance setting).
+            return_numpy: Return one (len(texts), dim) array instead of lists,
+                skipping the conversion to Python floats.
+            dtype: 'float32' or 'float16' (applied after normalization).
+            truncate_dim: Keep the first N dimensions and re-normalize, for
+                Matryoshka-trained models (defaults to the instance setting).
 
         Returns:
-            A list of embeddings, where each embedding is a list of floats.
+            A list of embeddings, where each embedding is a list of floats, or
+            a NumPy array when `return_numpy` is set.
         """
-        print(f"Generating embeddings for {len(texts)} documents...")
-        # Tokenize the input texts
-        encoded_input = self.tokenizer(texts, padding=True, truncation=True, return_tensors='pt')
-        encoded_input = {k: v.to(self.device) for k, v in encoded_input.items()}
+        logger.debug("Generating embeddings for %d documents...", len(texts))
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported dtype '{dtype}', expected float32 or float16.")
+        if truncate_dim is None:
+            truncate_dim = self.truncate_dim
+        if not texts:
+            return np.empty((0, self._width(truncate_dim)), dtype=dtype) if return_numpy else []
+        batch_size = max(1, batch_size or self.batch_size)
+        if max_tokens_per_batch is None:
+            max_tokens_per_batch = self.max_tokens_per_batch
+
+        t0 = time.perf_counter()
+        # Tokenize the input texts once, without padding
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        lengths = [len(ids) for ids in encoded['input_ids']]
+
+        results = self._embed_encoded(encoded, lengths, batch_size, max_tokens_per_batch, dtype, truncate_dim)
+
+        logger.debug("Embedded %d documents in %.3fs", len(texts), time.perf_counter() - t0)
+        return results if return_numpy else results.tolist()
+
+    def _embed_encoded(self, encoded, lengths: List[int], batch_size: int, max_tokens_per_batch: Optional[int],
+                       dtype: np.dtype, truncate_dim: Optional[int]) -> np.ndarray:
+        """Embeds already tokenized sequences in length buckets, returning rows in input order."""
+        keys = [k for k in encoded.keys() if k in self.tokenizer.model_input_names]
+        results: Optional[np.ndarray] = None
+        for batch in self._length_batches(lengths, batch_size, max_tokens_per_batch):
+            features = {k: [encoded[k][i] for i in batch] for k in keys}
+            vectors = self._embed_batch(features)
+            if truncate_dim:
+                vectors = vectors[:, :truncate_dim]
+                vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+            if results is None:
+                results = np.empty((len(lengths), vectors.shape[1]), dtype=dtype)
+            results[batch] = vectors
+        return results
+
+    def _window_size(self, window_tokens: Optional[int]) -> int:
+        limit = self.tokenizer.model_max_length
+        if not limit or limit > 100_000:  # tokenizers without a configured limit report a huge sentinel
+            limit = 512
+        if self.max_length:
+            limit = min(limit, self.max_length)
+        return min(window_tokens or limit, limit)
+
+    def embed_long_documents(self, texts: List[str], window_tokens: Optional[int] = None, overlap: int = 64,
+                             pool: bool = True, batch_size: Optional[int] = None,
+                             max_tokens_per_batch: Optional[int] = None, return_numpy: bool = False,
+                             dtype: Union[str, np.dtype] = 'float32', truncate_dim: Optional[int] = None,
+                             ) -> Union[List[List[float]], np.ndarray, List[List[WindowEmbedding]]]:
+        """
+        Embeds documents longer than the model's context with overlapping token windows.
+
+        Each text is tokenized once by the fast tokenizer, which cuts it into
+        windows of `window_tokens` tokens (special tokens included) that
+        overlap by `overlap` tokens; the windows of all documents are then
+        embedded together in length-bucketed batches. Texts that fit in one
+        window give the same vector as `embed_documents`.
+
+        Args:
+            texts: A list of strings to embed.
+            window_tokens: Window length in tokens (defaults to, and is capped at,
+                the model's maximum sequence length).
+            overlap: Tokens shared by consecutive windows.
+            pool: Return one vector per document (the token-weighted mean of its
+                window vectors, re-normalized) instead of per-window results.
+            batch_size, max_tokens_per_batch, return_numpy, dtype, truncate_dim:
+                As in `embed_documents`; `return_numpy` only applies when pooling.
+
+        Returns:
+            With `pool`, one embedding per text like `embed_documents`; otherwise
+            a list per text of `WindowEmbedding`s with their character and token
+            offsets.
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float16):
+            raise ValueError(f"Unsupported dtype '{dtype}', expected float32 or float16.")
+        if truncate_dim is None:
+            truncate_dim = self.truncate_dim
+        if not texts:
+            if pool and return_numpy:
+                return np.empty((0, self._width(truncate_dim)), dtype=dtype)
+            return []
+        if not self.tokenizer.is_fast:
+            raise ValueError("embed_long_documents requires a fast (Rust) tokenizer.")
+        batch_size = max(1, batch_size or self.batch_size)
+        if max_tokens_per_batch is None:
+            max_tokens_per_batch = self.max_tokens_per_batch
+
+        window = self._window_size(window_tokens)
+        specials = self.tokenizer.num_special_tokens_to_add(pair=False)
+        if window <= specials + 1:
+            raise ValueError(f"window_tokens must be larger than {specials + 1}.")
+        overlap = max(0, min(overlap, window - specials - 1))
+
+        t0 = time.perf_counter()
+        encoded = self.tokenizer(texts, truncation=True, max_length=window, stride=overlap,
+                                 return_overflowing_tokens=True, return_offsets_mapping=True,
+                                 return_special_tokens_mask=True)
+        owners = encoded['overflow_to_sample_mapping']
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        # vectors are pooled in float32 and cast at the end
+        vectors = self._embed_encoded(encoded, lengths, batch_size, max_tokens_per_batch, np.dtype(np.float32),
+                                      truncate_dim)
+        logger.debug("Embedded %d documents as %d windows in %.3fs", len(texts), len(lengths),
+                     time.perf_counter() - t0)
 
-        # Get model output
-        model_output = self.model(**encoded_input)
+        # Content tokens (no specials) and character span of every window
+        tokens, spans = [], []
+        for offsets, special in zip(encoded['offset_mapping'], encoded['special_tokens_mask']):
+            content = [o for o, s in zip(offsets, special) if not s]
+            tokens.append(len(content))
+            spans.append((content[0][0], content[-1][1]) if content else (0, 0))
 
-        # Perform pooling and normalization
-        sentence_embeddings = self._mean_pooling(model_output, encoded_input['attention_mask'])
-        normalized_embeddings = torch.nn.functional.normalize(sentence_embeddings, p=2, dim=1)
+        if not pool:
+            windows: List[List[WindowEmbedding]] = [[] for _ in texts]
+            token_start = [0] * len(texts)
+            for w, doc in enumerate(owners):
+                start = token_start[doc]
+                windows[doc].append(WindowEmbedding(vectors[w].astype(dtype).tolist(), spans[w][0], spans[w][1],
+                                                    start, start + tokens[w]))
+                token_start[doc] = start + tokens[w] - overlap
+            return windows
 
-        print("Embeddings generated successfully.")
-        return normalized_embeddings.tolist()
+        pooled = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, vectors * np.maximum(tokens, 1)[:, None])
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        pooled = pooled.astype(dtype, copy=False)
+        return pooled if return_numpy else pooled.tolist()
 
 
 # Example usage:
@@ -0,0 +1,109 @@
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'purecpp_huggingface_embedding', 'onnx')
+
+
+def _last_hidden_state_module(model, input_names: List[str]):
+    """Wraps a transformers model so the ONNX graph takes positional inputs
+    and returns only `last_hidden_state` (all the pooling needs)."""
+    import torch
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    return LastHiddenState()
+
+
+class OnnxEngine:
+    """ONNX Runtime inference for a Hugging Face encoder.
+
+    The model is exported once to `cache_dir/<model id>/model.onnx` (and, with
+    `quantize=True`, dynamically quantized to int8 weights in
+    `model.int8.onnx`); later instances load the cached file directly. `embed`
+    reproduces the torch path: mean pooling over the attention mask followed
+    by L2 normalization.
+    """
+
+    def __init__(self, model_id: str, tokenizer, quantize: bool = False, device: str = 'cpu',
+                 cache_dir: Optional[str] = None, num_threads: Optional[int] = None,
+                 model_path: Optional[str] = None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "engine='onnx' requires onnxruntime: pip install 'purecpp_huggingface_embedding[onnx]'"
+            ) from e
+
+        self.model_id = model_id
+        self.model_path = model_path or model_id
+        self.input_names = list(tokenizer.model_input_names)
+        folder = os.path.join(cache_dir or DEFAULT_CACHE_DIR, re.sub(r'[^A-Za-z0-9._-]+', '--', model_id))
+        os.makedirs(folder, exist_ok=True)
+
+        fp32_path = os.path.join(folder, 'model.onnx')
+        if not os.path.exists(fp32_path):
+            self._export(self.model_path, tokenizer, fp32_path)
+        self.path = fp32_path
+        if quantize:
+            self.path = os.path.join(folder, 'model.int8.onnx')
+            if not os.path.exists(self.path):
+                self._quantize(fp32_path, self.path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        providers = ['CPUExecutionProvider']
+        if device.startswith('cuda') and 'CUDAExecutionProvider' in ort.get_available_providers():
+            providers.insert(0, 'CUDAExecutionProvider')
+        self.session = ort.InferenceSession(self.path, sess_options=options, providers=providers)
+        self._session_inputs = {i.name for i in self.session.get_inputs()}
+
+    def _export(self, model_path: str, tokenizer, path: str) -> None:
+        import torch
+        from transformers import AutoModel
+
+        model = AutoModel.from_pretrained(model_path)
+        model.eval()
+        sample = tokenizer(["ONNX export sample", "a second, longer ONNX export sample"],
+                           padding=True, return_tensors='pt')
+        inputs = tuple(sample[name] for name in self.input_names)
+        axes = {name: {0: 'batch', 1: 'sequence'} for name in self.input_names}
+        axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+        tmp = path + '.tmp'
+        with torch.no_grad():
+            torch.onnx.export(
+                _last_hidden_state_module(model, self.input_names), inputs, tmp,
+                input_names=self.input_names, output_names=['last_hidden_state'],
+                dynamic_axes=axes, opset_version=17, dynamo=False,
+            )
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _quantize(src: str, dst: str) -> None:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        tmp = dst + '.tmp'
+        quantize_dynamic(src, tmp, weight_type=QuantType.QInt8)
+        os.replace(tmp, dst)
+
+    def embed(self, encoded_input: Dict[str, np.ndarray]) -> np.ndarray:
+        """Runs one padded batch (numpy inputs) and returns normalized float32 embeddings."""
+        feeds = {k: np.asarray(v, dtype=np.int64) for k, v in encoded_input.items() if k in self._session_inputs}
+        token_embeddings = self.session.run(['last_hidden_state'], feeds)[0]
+
+        mask = np.asarray(encoded_input['attention_mask'], dtype=np.float32)[..., None]
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return (pooled / norms).astype(np.float32)
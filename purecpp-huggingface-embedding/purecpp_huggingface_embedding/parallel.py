@@ -0,0 +1,213 @@
+import math
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .embedding import MODEL_ALIASES
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attaches to the parent's buffer without registering it with the resource tracker.
+
+    The tracker is shared with the parent, which owns (and unlinks) the
+    segment; registering it again from a worker makes the tracker unlink or
+    warn about it on its own, and unregistering it drops the parent's entry.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+_POLL_S = 1.0  # how often a waiting caller checks that the workers are still alive
+
+
+def _worker_main(model_name: str, kwargs: Dict[str, Any], threads: int, tasks, results) -> None:
+    """Worker process: loads its own model copy and embeds shards into shared memory."""
+    # Thread caps must be in place before torch is imported in this process.
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    from .embedding import HuggingFaceEmbeddings
+
+    try:
+        embedder = HuggingFaceEmbeddings(model_name=model_name, **kwargs)
+        dim = len(embedder.embed_documents(["dimension probe"])[0])
+    except Exception as e:
+        results.put(('error', None, repr(e)))
+        return
+    results.put(('ready', None, dim))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        task_id, shm_name, offset, texts = task
+        try:
+            vectors = np.asarray(embedder.embed_documents(texts), dtype=np.float32)
+            shm = _attach(shm_name)
+            try:
+                out = np.ndarray((offset + len(texts), dim), dtype=np.float32, buffer=shm.buf)
+                out[offset:offset + len(texts)] = vectors
+                del out
+            finally:
+                shm.close()
+            results.put(('done', task_id, None))
+        except Exception as e:
+            results.put(('error', task_id, repr(e)))
+
+
+class ParallelEmbeddings:
+    """Embeds with N worker processes, each holding its own `HuggingFaceEmbeddings`.
+
+    Texts are sorted by length and cut into shards (so every shard is
+    length-homogeneous), the shards are distributed over the workers through a
+    task queue and each worker writes its float32 rows straight into one
+    shared-memory result buffer; only texts go over the pipes, never vectors.
+    Each worker is capped at `threads_per_worker` intra-op threads, so N
+    workers x threads stays within the machine's cores.
+    """
+
+    def __init__(self, model_name: str = 'mini-lm', num_workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None, shards_per_worker: int = 4,
+                 timeout: Optional[float] = None, **kwargs: Any):
+        """
+        Starts the worker processes and waits until every model is loaded.
+
+        Args:
+            model_name: The name or alias of the Hugging Face model to use.
+            num_workers: Worker processes (defaults to the number of CPUs).
+            threads_per_worker: Intra-op threads per worker (defaults to CPUs / workers).
+            shards_per_worker: Shards per worker for each call; more shards balance
+                uneven texts better, fewer reduce per-task overhead.
+            timeout: Seconds to wait for any single worker reply (a model load or a
+                shard) before the pool is stopped and `TimeoutError` raised; `None`
+                waits as long as the workers are alive. A worker that dies always
+                stops the pool with a `RuntimeError`.
+            **kwargs: Passed to each worker's `HuggingFaceEmbeddings` (device,
+                batch_size, engine, ...).
+        """
+        cpus = os.cpu_count() or 1
+        self.num_workers = max(1, num_workers or cpus)
+        self.threads_per_worker = max(1, threads_per_worker or cpus // self.num_workers)
+        self.shards_per_worker = max(1, shards_per_worker)
+        self.timeout = timeout
+        # identity of the vectors, as on HuggingFaceEmbeddings (used e.g. for cache namespaces)
+        self.model_id = MODEL_ALIASES.get(model_name, model_name)
+        self.engine = kwargs.get('engine', 'torch')
+        self.quantize = bool(kwargs.get('quantize', False)) and self.engine == 'onnx'
+        self.truncate_dim = kwargs.get('truncate_dim')
+        self.max_length = kwargs.get('max_length')
+
+        ctx = mp.get_context('spawn')
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._lock = threading.Lock()
+        self._procs = [
+            ctx.Process(target=_worker_main,
+                        args=(model_name, kwargs, self.threads_per_worker, self._tasks, self._results),
+                        daemon=True)
+            for _ in range(self.num_workers)
+        ]
+        for p in self._procs:
+            p.start()
+
+        self.dim: Optional[int] = None
+        for _ in self._procs:
+            kind, _, payload = self._next_result()
+            if kind == 'error':
+                self.close()
+                raise RuntimeError(f"ParallelEmbeddings worker failed to load the model: {payload}")
+            self.dim = payload
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Generates embeddings for `texts` across all workers, in input order."""
+        if not texts:
+            return []
+        if not self._procs:
+            raise RuntimeError("ParallelEmbeddings is closed.")
+
+        with self._lock:
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            shard = max(1, math.ceil(len(texts) / (self.num_workers * self.shards_per_worker)))
+            shm = shared_memory.SharedMemory(create=True, size=len(texts) * self.dim * 4)
+            try:
+                pending = set()
+                for task_id, offset in enumerate(range(0, len(order), shard)):
+                    shard_texts = [texts[i] for i in order[offset:offset + shard]]
+                    self._tasks.put((task_id, shm.name, offset, shard_texts))
+                    pending.add(task_id)
+
+                error = None
+                while pending:
+                    kind, task_id, payload = self._next_result()
+                    pending.discard(task_id)
+                    if kind == 'error' and error is None:
+                        error = payload
+                if error is not None:
+                    raise RuntimeError(f"ParallelEmbeddings worker error: {error}")
+
+                sorted_vectors = np.ndarray((len(texts), self.dim), dtype=np.float32, buffer=shm.buf)
+                vectors = np.empty_like(sorted_vectors)
+                vectors[order] = sorted_vectors
+                del sorted_vectors
+            finally:
+                shm.close()
+                shm.unlink()
+        return vectors.tolist()
+
+    def _next_result(self):
+        """Next worker message; stops the pool and raises if a worker died or `timeout` passed."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            wait = _POLL_S if deadline is None else min(_POLL_S, deadline - time.monotonic())
+            if wait <= 0:
+                self._terminate()
+                raise TimeoutError(f"ParallelEmbeddings worker did not reply within {self.timeout}s")
+            try:
+                return self._results.get(timeout=wait)
+            except queue.Empty:
+                pass
+            dead = [p for p in self._procs if not p.is_alive()]
+            if dead:
+                self._terminate()
+                raise RuntimeError(f"ParallelEmbeddings worker exited unexpectedly (exit code {dead[0].exitcode})")
+
+    def _terminate(self) -> None:
+        for p in self._procs:
+            p.terminate()
+        for p in self._procs:
+            p.join(timeout=10)
+        self._procs = []
+        for q in (self._tasks, self._results):
+            q.close()
+            q.cancel_join_thread()
+
+    def close(self) -> None:
+        """Stops the worker processes."""
+        for _ in self._procs:
+            self._tasks.put(None)
+        for p in self._procs:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+
+    def __enter__(self) -> 'ParallelEmbeddings':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -8,7 +8,11 @@ setup(
         'transformers',
         'sentence-transformers',
         'torch',
+        'numpy',
     ],
+    extras_require={
+        'onnx': ['onnx', 'onnxruntime'],
+    },
     author='PureCpp',
     author_email='',
     description='A Python package for generating text embeddings using Hugging Face models.',
@@ -1,5 +1,12 @@
+import asyncio
+import importlib.util
+import tempfile
 import unittest
+import numpy as np
 from purecpp_huggingface_embedding.embedding import HuggingFaceEmbeddings
+from purecpp_huggingface_embedding.parallel import ParallelEmbeddings
+from purecpp_huggingface_embedding.cache import EmbeddingCache, CachedEmbeddings
+from purecpp_huggingface_embedding.batcher import EmbeddingBatcher
 
 class TestHuggingFaceEmbeddings(unittest.TestCase):
 
@@ -19,5 +26,179 @@ class TestHuggingFaceEmbeddings(unittest.TestCase):
         # Check the dimension of the embedding for the default model
         self.assertEqual(len(embeddings[0]), 384)
 
+    def test_embed_documents_length_batches(self):
+        """Tests that length-bucketed batches return embeddings in input order."""
+        embedder = HuggingFaceEmbeddings(model_name='mini-lm')
+        texts = ["Short.", "A much longer sentence " * 20, "Medium length sentence here.", "Hi"]
+        expected = [embedder.embed_documents([t])[0] for t in texts]
+        embeddings = embedder.embed_documents(texts, batch_size=2, max_tokens_per_batch=256)
+
+        self.assertEqual(len(embeddings), len(texts))
+        for got, want in zip(embeddings, expected):
+            for a, b in zip(got, want):
+                self.assertAlmostEqual(a, b, places=4)
+
+    @unittest.skipUnless(importlib.util.find_spec('onnxruntime'), "onnxruntime not installed")
+    def test_onnx_engine_parity(self):
+        """Tests that the ONNX Runtime engine matches the torch embeddings."""
+        texts = ["This is a test sentence.", "ONNX Runtime should give the same vector " * 5]
+        expected = HuggingFaceEmbeddings(model_name='mini-lm').embed_documents(texts)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            onnx_embedder = HuggingFaceEmbeddings(model_name='mini-lm', engine='onnx', onnx_cache_dir=cache_dir)
+            embeddings = onnx_embedder.embed_documents(texts)
+            for got, want in zip(embeddings, expected):
+                for a, b in zip(got, want):
+                    self.assertAlmostEqual(a, b, places=4)
+
+            # int8 weights: same direction, not bit-exact
+            int8_embedder = HuggingFaceEmbeddings(model_name='mini-lm', engine='onnx', quantize=True,
+                                                  onnx_cache_dir=cache_dir)
+            for got, want in zip(int8_embedder.embed_documents(texts), expected):
+                self.assertGreater(sum(a * b for a, b in zip(got, want)), 0.95)
+
+    def test_parallel_embeddings_order(self):
+        """Tests that the multi-process pool matches a single process, in input order."""
+        texts = [f"Sentence number {i} " * (i % 7 + 1) for i in range(20)]
+        expected = HuggingFaceEmbeddings(model_name='mini-lm').embed_documents(texts)
+        with ParallelEmbeddings(model_name='mini-lm', num_workers=2) as pool:
+            embeddings = pool.embed_documents(texts)
+        self.assertEqual(len(embeddings), len(texts))
+        for got, want in zip(embeddings, expected):
+            for a, b in zip(got, want):
+                self.assertAlmostEqual(a, b, places=4)
+
+    def test_parallel_embeddings_dead_worker(self):
+        """Tests that a worker dying mid-call fails the call instead of hanging."""
+        pool = ParallelEmbeddings(model_name='mini-lm', num_workers=2)
+        try:
+            pool._procs[0].kill()
+            pool._procs[0].join()
+            with self.assertRaisesRegex(RuntimeError, "exited unexpectedly"):
+                pool.embed_documents([f"Sentence {i}" for i in range(50)])
+            with self.assertRaisesRegex(RuntimeError, "closed"):
+                pool.embed_documents(["after"])
+        finally:
+            pool.close()
+
+    def test_cached_embeddings(self):
+        """Tests that cached embeddings are reused across cache instances."""
+        embedder = HuggingFaceEmbeddings(model_name='mini-lm')
+        texts = ["This is a test sentence.", "This  is a test sentence. ", "Another one."]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/cache.sqlite"
+            cached = CachedEmbeddings(embedder, EmbeddingCache(path))
+            embeddings = cached.embed_documents(texts)
+            # whitespace-normalized duplicates share one entry
+            self.assertEqual(embeddings[0], embeddings[1])
+            self.assertEqual(cached.cache.stats()['entries'], 2)
+
+            reopened = CachedEmbeddings(embedder, EmbeddingCache(path, memory_items=0))
+            for got, want in zip(reopened.embed(texts), embeddings):
+                for a, b in zip(got, want):
+                    self.assertAlmostEqual(a, b, places=6)
+
+    def test_cached_embeddings_namespace(self):
+        """Tests that every setting that changes the vectors changes the default cache namespace."""
+        def namespace(**kwargs):
+            return CachedEmbeddings(HuggingFaceEmbeddings(lazy=True, **kwargs), EmbeddingCache(':memory:')).namespace
+
+        base = namespace(model_name='mini-lm')
+        variants = [namespace(model_name='bge-base'), namespace(model_name='mini-lm', truncate_dim=128),
+                    namespace(model_name='mini-lm', max_length=128), namespace(model_name='mini-lm', engine='onnx'),
+                    namespace(model_name='mini-lm', engine='onnx', quantize=True)]
+        self.assertEqual(namespace(model_name='sentence-transformers/all-MiniLM-L6-v2'), base)
+        self.assertEqual(len({base, *variants}), 6)
+
+        class Anonymous:
+            dim = 384
+            def embed(self, texts):
+                return [[0.0] * 384 for _ in texts]
+
+        with self.assertRaisesRegex(ValueError, "namespace"):
+            CachedEmbeddings(Anonymous(), EmbeddingCache(':memory:'))
+        self.assertEqual(CachedEmbeddings(Anonymous(), EmbeddingCache(':memory:'), namespace='anon').namespace, 'anon')
+
+    def test_embedding_batcher(self):
+        """Tests that concurrent single-text requests are batched and resolved per caller."""
+        embedder = HuggingFaceEmbeddings(model_name='mini-lm')
+        texts = [f"Query number {i}" for i in range(10)]
+        expected = embedder.embed_documents(texts)
+
+        async def run():
+            async with EmbeddingBatcher(embedder, max_batch_size=4, max_wait_ms=5) as batcher:
+                return await asyncio.gather(*(batcher.embed(t) for t in texts))
+
+        for got, want in zip(asyncio.run(run()), expected):
+            for a, b in zip(got, want):
+                self.assertAlmostEqual(a, b, places=4)
+
+    def test_batcher_close_during_collection(self):
+        """Requests already pulled into a batch that is still forming are cancelled by aclose()."""
+        class Counting:
+            def embed(self, texts):
+                return [[float(len(t))] for t in texts]
+
+        async def run():
+            batcher = EmbeddingBatcher(Counting(), max_batch_size=4, max_wait_ms=500)
+            pending = asyncio.ensure_future(batcher.embed('x'))
+            await asyncio.sleep(0.01)
+            await batcher.aclose()
+            return await asyncio.wait_for(asyncio.gather(pending, return_exceptions=True), 1)
+
+        (result,) = asyncio.run(run())
+        self.assertIsInstance(result, asyncio.CancelledError)
+
+    def test_empty_input_keeps_width(self):
+        """An empty NumPy result is (0, dim), so it still stacks with real batches."""
+        embedder = HuggingFaceEmbeddings(model_name='mini-lm')
+        self.assertEqual(embedder.embed_documents([], return_numpy=True).shape, (0, 384))
+        self.assertEqual(embedder.embed_documents([], return_numpy=True, truncate_dim=64).shape, (0, 64))
+
+    def test_embed_documents_numpy_output(self):
+        """Tests NumPy/float16 output and Matryoshka truncation."""
+        embedder = HuggingFaceEmbeddings(model_name='mini-lm')
+        texts = ["This is a test sentence.", "This is another test sentence."]
+        full = embedder.embed_documents(texts, return_numpy=True)
+        self.assertEqual(full.shape, (2, 384))
+        self.assertEqual(full.dtype, np.float32)
+
+        half = embedder.embed_documents(texts, return_numpy=True, dtype='float16', truncate_dim=128)
+        self.assertEqual(half.shape, (2, 128))
+        self.assertEqual(half.dtype, np.float16)
+        np.testing.assert_allclose(np.linalg.norm(half.astype(np.float32), axis=1), 1.0, atol=1e-3)
+
+    def test_lazy_load_and_local_model_cache(self):
+        """Tests deferred loading and that the local safetensors copy gives the same vectors."""
+        embedder = HuggingFaceEmbeddings(model_name='mini-lm', lazy=True)
+        self.assertFalse(embedder._loaded)
+        expected = embedder.embed_documents(["A lazily loaded model."])[0]
+        self.assertTrue(embedder._loaded)
+
+        with tempfile.TemporaryDirectory() as folder:
+            HuggingFaceEmbeddings(model_name='mini-lm', model_cache_dir=folder)
+            local = HuggingFaceEmbeddings(model_name='mini-lm', model_cache_dir=folder)
+            got = local.embed_documents(["A lazily loaded model."])[0]
+        for a, b in zip(got, expected):
+            self.assertAlmostEqual(a, b, places=5)
+
+    def test_embed_long_documents(self):
+        """Tests sliding-window embedding: short-text parity, window offsets and pooling."""
+        embedder = HuggingFaceEmbeddings(model_name='mini-lm')
+        short = ["This is a test sentence."]
+        np.testing.assert_allclose(embedder.embed_long_documents(short, return_numpy=True),
+                                   embedder.embed_documents(short, return_numpy=True), atol=1e-5)
+
+        long_text = " ".join(f"Sentence number {i} about a long web page." for i in range(200))
+        windows = embedder.embed_long_documents([long_text, "Short."], window_tokens=128, overlap=32, pool=False)
+        self.assertGreater(len(windows[0]), 1)
+        self.assertEqual(len(windows[1]), 1)
+        self.assertEqual(windows[0][0].start, 0)
+        self.assertEqual(windows[0][-1].end, len(long_text))
+        self.assertEqual(windows[0][1].token_start, windows[0][0].token_end - 32)
+
+        pooled = embedder.embed_long_documents([long_text], window_tokens=128, overlap=32, return_numpy=True)
+        self.assertEqual(pooled.shape, (1, 384))
+        self.assertAlmostEqual(float(np.linalg.norm(pooled[0])), 1.0, places=4)
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import Dict, List, Optional, Iterable, Tuple
-import json, uuid
+from typing import Dict, List, Optional, Iterable, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import json, time, uuid
 import oracledb
 import numpy as np
 
@@ -9,7 +10,20 @@ from ..document import Document
 from ..types import QueryResult
 from ..exceptions import BackendClosed, DimensionMismatch, InsertionError, QueryError, InvalidConfiguration
 from ..registry import Registry
-from ..utils import pack_f32, unpack_f32, cosine_distance
+from ..utils import (pack_f32, unpack_f32, cosine_distances, top_k_smallest, push_top_k, sorted_top_k,
+                     group_extents)
+from ..sidecar import VectorSidecar
+
+_MAX_IN_LIST = 1000  # ORA-01795: maximum number of expressions in a list is 1000
+
+def _lob_output_handler(cursor, metadata):
+    """Fetches CLOB/BLOB columns inline as str/bytes instead of LOB locators (no `.read()` round trip per value)."""
+    if metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+    if metadata.type_code is oracledb.DB_TYPE_BLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG_RAW, arraysize=cursor.arraysize)
+    return None
+
 
 class RDSOracleVectorBackend(VectorBackend):
     """Vector backend for **AWS RDS Oracle (19c/21c)**.
@@ -27,7 +41,23 @@ Stores embeddings as BLOBs (float32) and ranks by cosine similarity in the app.
       "dim": 768,
       "ensure_schema": True,
       "candidate_limit": 3000,       
-      "debug": False
+      "debug": False,
+
+      # fetch tuning (optional)
+      "fetch_arraysize": 1000,       # rows per round trip when downloading candidates
+      "prefetch_rows": 1000,         # rows returned together with the execute() response
+
+      # parallel exact scan (optional)
+      "parallel_scan": False,        # query() scores the whole table instead of candidate_limit rows
+      "scan_workers": 4,             # pooled connections fetching ranges concurrently
+      "scan_chunks": 16,             # ranges the table is split into (default: 4 * scan_workers)
+      "scan_split": "rowid",         # rowid | hash (ORA_HASH(id) buckets)
+      "scan_arraysize": 1000,        # default: fetch_arraysize
+
+      # local memory-mapped copy of the embeddings (optional)
+      "sidecar_dir": "/var/lib/vdb/VDB_DOCS",
+      "sidecar_sync": True           # pull rows changed since the watermark on startup;
+                                     # False for read-only workers sharing the files
     }
     """
 
@@ -42,16 +72,48 @@ Stores embeddings as BLOBs (float32) and ranks by cosine similarity in the app.
         self.ensure_schema = bool(cfg.get("ensure_schema", True))
         self.candidate_limit = int(cfg.get("candidate_limit", 2000))
         self.debug = bool(cfg.get("debug", False))
+        self.fetch_arraysize = max(1, int(cfg.get("fetch_arraysize", 1000)))
+        self.prefetch_rows = max(0, int(cfg.get("prefetch_rows", self.fetch_arraysize)))
+
+        self.parallel_scan = bool(cfg.get("parallel_scan", False))
+        self.scan_workers = max(1, int(cfg.get("scan_workers", 4)))
+        self.scan_chunks = max(1, int(cfg.get("scan_chunks", 4 * self.scan_workers)))
+        self.scan_split = str(cfg.get("scan_split", "rowid")).lower()
+        self.scan_arraysize = int(cfg.get("scan_arraysize", self.fetch_arraysize))
+        self.sidecar_dir = cfg.get("sidecar_dir")
+        self.sidecar_sync = bool(cfg.get("sidecar_sync", True))
 
         if not self.service_name:
             raise InvalidConfiguration("Define `'service_name'` to connect to the Oracle RDS.")
+        if self.scan_split not in {"rowid", "hash"}:
+            raise InvalidConfiguration("`scan_split` must be either `rowid` or `hash`.")
 
         dsn = oracledb.makedsn(self.host, self.port, service_name=self.service_name)
-        self.conn = oracledb.connect(user=self.user, password=self.password, dsn=dsn)
+        self.pool = None
+        self._scan_pool: Optional[ThreadPoolExecutor] = None
+        if self.parallel_scan:
+            self.pool = oracledb.create_pool(
+                user=self.user, password=self.password, dsn=dsn,
+                min=1, max=self.scan_workers + 1, increment=1,
+            )
+            self._scan_pool = ThreadPoolExecutor(max_workers=self.scan_workers)
+            self.conn = self.pool.acquire()
+        else:
+            self.conn = oracledb.connect(user=self.user, password=self.password, dsn=dsn)
+        self.conn.outputtypehandler = _lob_output_handler
 
         if self.ensure_schema:
             self._ensure_schema()
 
+        # seconds spent per phase by the last query(): sql, fetch, score, docs (scan when parallel)
+        self.last_timings: Dict[str, float] = {}
+
+        self.sidecar: Optional[VectorSidecar] = None
+        if self.sidecar_dir:
+            self.sidecar = VectorSidecar(self.sidecar_dir, self.dim, self.table.upper())
+            if self.sidecar_sync:
+                self.sync_sidecar()
+
     # ---------- DDL ----------
     def _ensure_schema(self) -> None:
         stmts = [
@@ -82,17 +144,30 @@ Stores embeddings as BLOBs (float32) and ranks by cosine similarity in the app.
         except oracledb.Error:
             return False
 
-    def insert(self, docs: Iterable[Document]) -> None:
+    def insert(self, docs: Iterable[Document], ids: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Inserts the documents and returns their ids, in input order.
+
+        Ids are generated unless `ids` gives one per document (e.g. deterministic chunk ids,
+        so a retried batch can be found and deleted).
+        """
         if not self.is_open():
             raise BackendClosed("closed connection")
+        docs = list(docs)
+        if ids is not None and len(ids) != len(docs):
+            raise InsertionError(f"{len(ids)} ids for {len(docs)} documents")
+        if ids is not None and any("\n" in str(doc_id) for doc_id in ids):
+            raise InsertionError("ids must not contain newlines (the vector sidecar stores one id per line)")
         rows: List[Tuple[str, str, str, bytes, int, float]] = []
-        for d in docs:
+        vecs: List[List[float]] = []
+        for n, d in enumerate(docs):
             if len(d.embedding) != self.dim:
                 raise DimensionMismatch(f"expected dim={self.dim}, received={len(d.embedding)}")
-            doc_id = str(uuid.uuid4())
+            doc_id = str(uuid.uuid4()) if ids is None else str(ids[n])
             buf = pack_f32(d.embedding)
             l2 = float(np.linalg.norm(d.embedding))
             rows.append((doc_id, d.page_content, json.dumps(d.metadata or {}), buf, self.dim, l2))
+            vecs.append(d.embedding)
         sql = f"INSERT INTO {self.table} (id, page_content, metadata, embedding, dim, l2norm) VALUES (:1,:2,:3,:4,:5,:6)"
         try:
             with self.conn.cursor() as c:
@@ -100,28 +175,46 @@ Stores embeddings as BLOBs (float32) and ranks by cosine similarity in the app.
             self.conn.commit()
         except oracledb.Error as e:
             raise InsertionError(str(e)) from e
+        if self.sidecar is not None and rows:
+            self.sidecar.upsert([r[0] for r in rows], np.asarray(vecs, dtype=np.float32))
+        return [r[0] for r in rows]
+
+    def delete(self, ids: Iterable[str]) -> int:
+        """Deletes documents by id and returns how many rows were removed."""
+        if not self.is_open():
+            raise BackendClosed("closed connection")
+        ids = list(ids)
+        if not ids:
+            return 0
+        try:
+            with self.conn.cursor() as c:
+                c.executemany(f"DELETE FROM {self.table} WHERE id = :1", [(i,) for i in ids], arraydmlrowcounts=True)
+                removed = sum(c.getarraydmlrowcounts())
+            self.conn.commit()
+        except oracledb.Error as e:
+            raise QueryError(str(e)) from e
+        if self.sidecar is not None:
+            self.sidecar.remove(ids)
+        return removed
 
     def query(self, embedding: List[float], k: int, filter: Optional[Dict[str,str]] = None) -> List[QueryResult]:
         if not self.is_open():
             raise BackendClosed("closed connection")
         if len(embedding) != self.dim:
             raise DimensionMismatch(f"expected dim={self.dim}, **received**={len(embedding)}")
+        self.last_timings = {}
+        if self.sidecar is not None and not filter:
+            return self._query_sidecar(embedding, k)
+        if self.parallel_scan:
+            return self._query_parallel(embedding, k, filter)
 
-        where = ["dim = :dim"]
-        binds: Dict[str, object] = {"dim": self.dim}
-        if filter:
-            for i, (key, val) in enumerate(filter.items(), 1):
-                if val is None:
-                    continue
-                b = f"b{i}"  
-                where.append(f"JSON_VALUE(metadata, '$.\"{key}\"') = :{b}")
-                binds[b] = str(val)
-
+        where, binds = self._where(filter)
         where_sql = "WHERE " + " AND ".join(where)
 
+        # only id + embedding for the candidates; page_content/metadata are loaded for the top-k ids
         limit = max(self.candidate_limit, int(k))
         sql = f"""
-            SELECT id, page_content, metadata, embedding
+            SELECT id, embedding
             FROM {self.table}
             {where_sql}
             FETCH FIRST {limit} ROWS ONLY
@@ -131,54 +224,237 @@ Stores embeddings as BLOBs (float32) and ranks by cosine similarity in the app.
             print("[RDSOracleVectorBackend] SQL:\n", sql)
             print("[RDSOracleVectorBackend] BINDS:", binds)
 
+        t0 = time.perf_counter()
         try:
             with self.conn.cursor() as c:
+                c.arraysize = self.fetch_arraysize
+                c.prefetchrows = min(self.prefetch_rows, limit + 1)
                 c.execute(sql, binds)
+                t1 = time.perf_counter()
                 rows = c.fetchall() or []
         except oracledb.Error as e:
             raise QueryError(str(e)) from e
+        t2 = time.perf_counter()
+        self.last_timings.update(sql=t1 - t0, fetch=t2 - t1)
+        if not rows:
+            return []
+
+        q = np.asarray(embedding, dtype=np.float32)
+        mat = unpack_f32(b"".join(emb for _, emb in rows)).reshape(len(rows), self.dim)
+        dists = cosine_distances(mat, q)
+        top = [(float(dists[i]), rows[i][0]) for i in top_k_smallest(dists, int(k))]
+        self.last_timings["score"] = time.perf_counter() - t2
+
+        docs = self._fetch_documents([doc_id for _, doc_id in top])
+        return [self._result(doc_id, *docs[doc_id], dist) for dist, doc_id in top if doc_id in docs]
+
+    # ---------- helpers ----------
+    def _where(self, filter: Optional[Dict[str, str]]) -> Tuple[List[str], Dict[str, object]]:
+        where = ["dim = :dim"]
+        binds: Dict[str, object] = {"dim": self.dim}
+        if filter:
+            for i, (key, val) in enumerate(filter.items(), 1):
+                if val is None:
+                    continue
+                b = f"b{i}"  
+                where.append(f"JSON_VALUE(metadata, '$.\"{key}\"') = :{b}")
+                binds[b] = str(val)
+        return where, binds
+
+    @staticmethod
+    def _result(doc_id: str, page_text, meta_text, dist: float) -> QueryResult:
+        md = {}
+        if isinstance(meta_text, (bytes, bytearray)):
+            try:
+                meta_text = meta_text.decode("utf-8", errors="ignore")
+            except Exception:
+                meta_text = ""
+        if isinstance(meta_text, str) and meta_text:
+            try:
+                md = json.loads(meta_text)
+            except Exception:
+                md = {}
+        md["id"] = doc_id
+        return QueryResult(doc=Document(page_text, [], md), score=float(dist))
+
+    def _fetch_documents(self, ids: List[str]) -> Dict[str, Tuple[object, object]]:
+        """
+        Loads `page_content`/`metadata` for the given ids: {id: (page_text, meta_text)}.
+
+        Ids deleted since they were scored are simply absent from the result; callers drop those hits.
+        """
+        if not ids:
+            return {}
+        t0 = time.perf_counter()
+        found: Dict[str, Tuple[object, object]] = {}
+        try:
+            with self.conn.cursor() as c:
+                for start in range(0, len(ids), _MAX_IN_LIST):
+                    group = ids[start:start + _MAX_IN_LIST]
+                    names = [f"i{n}" for n in range(len(group))]
+                    c.arraysize = len(group)
+                    c.prefetchrows = len(group) + 1
+                    c.execute(f"SELECT id, page_content, metadata FROM {self.table} "
+                              f"WHERE id IN ({', '.join(':' + n for n in names)})", dict(zip(names, group)))
+                    for doc_id, page, meta in c.fetchall() or []:
+                        found[doc_id] = (page or "", meta)
+        except oracledb.Error as e:
+            raise QueryError(str(e)) from e
+        self.last_timings["docs"] = time.perf_counter() - t0
+        return found
+
+    # ---------- parallel exact scan ----------
+    def _scan_ranges(self) -> List[Tuple[str, Dict[str, object]]]:
+        """
+        Splits the table into `scan_chunks` ranges.
+
+        `rowid`: groups the segment extents (USER_EXTENTS) into contiguous ROWID ranges
+        holding roughly the same number of blocks, so each worker reads disjoint blocks.
+        `hash`: ORA_HASH(id) buckets; used as fallback when the extents are not visible
+        (table owned by another schema, partitioned table, ...).
+        """
+        if self.scan_split == "rowid":
+            sql = """
+                SELECT DBMS_ROWID.ROWID_CREATE(1, o.data_object_id, e.relative_fno, e.block_id, 0),
+                       DBMS_ROWID.ROWID_CREATE(1, o.data_object_id, e.relative_fno,
+                                               e.block_id + e.blocks - 1, 32767),
+                       e.blocks
+                FROM user_extents e
+                JOIN user_objects o
+                  ON o.object_name = e.segment_name AND o.object_type = 'TABLE'
+                WHERE e.segment_name = :seg
+                ORDER BY e.relative_fno, e.block_id
+            """
+            try:
+                with self.conn.cursor() as c:
+                    c.execute(sql, {"seg": self.table.upper()})
+                    extents = c.fetchall() or []
+            except oracledb.Error:
+                extents = []
+            if extents:
+                return [("ROWID BETWEEN CHARTOROWID(:lo) AND CHARTOROWID(:hi)", {"lo": lo, "hi": hi})
+                        for lo, hi in group_extents(extents, self.scan_chunks)]
+        n = self.scan_chunks
+        return [("ORA_HASH(id, :nb) = :bucket", {"nb": n - 1, "bucket": i}) for i in range(n)]
+
+    def _scan_chunk(self, q: np.ndarray, k: int, sql: str, binds: Dict[str, object]) -> List[Tuple[float, str]]:
+        """
+        Fetches one range on its own pooled connection and returns its local top-k.
 
+        Rows are scored one `fetchmany(scan_arraysize)` batch at a time into a running
+        heap, so memory stays at one batch + k whatever the size of the range.
+        """
+        best: List[Tuple[float, str]] = []
+        with self.pool.acquire() as conn:
+            conn.outputtypehandler = _lob_output_handler
+            with conn.cursor() as c:
+                c.arraysize = self.scan_arraysize
+                c.prefetchrows = self.scan_arraysize
+                c.execute(sql, binds)
+                while True:
+                    rows = c.fetchmany(self.scan_arraysize)
+                    if not rows:
+                        break
+                    mat = unpack_f32(b"".join(emb for _, emb in rows)).reshape(len(rows), self.dim)
+                    dists = cosine_distances(mat, q)
+                    push_top_k(best, k, ((float(dists[i]), rows[i][0]) for i in top_k_smallest(dists, k)))
+        return sorted_top_k(best)
+
+    def _query_parallel(self, embedding: List[float], k: int, filter: Optional[Dict[str, str]]) -> List[QueryResult]:
+        where, binds = self._where(filter)
         q = np.asarray(embedding, dtype=np.float32)
-        scored: List[Tuple[float, str, object, object]] = []
+        k = int(k)
 
-        for (doc_id, page, meta, emb_lob) in rows:
-            emb_bytes = emb_lob.read() if hasattr(emb_lob, "read") else emb_lob
-            a = unpack_f32(emb_bytes)
-            dist = cosine_distance(a, q)
+        t0 = time.perf_counter()
+        futs = []
+        for range_sql, range_binds in self._scan_ranges():
+            sql = (f"SELECT id, embedding FROM {self.table} "
+                   f"WHERE {' AND '.join(where + [range_sql])}")
+            futs.append(self._scan_pool.submit(self._scan_chunk, q, k, sql, {**binds, **range_binds}))
 
-            # page_content (CLOB) -> str
-            page_text = page.read() if hasattr(page, "read") else page
+        if self.debug:
+            print(f"[RDSOracleVectorBackend] parallel scan: {len(futs)} ranges, {self.scan_workers} workers")
 
-            # metadata (CLOB) -> str -> dict
-            meta_text = meta.read() if hasattr(meta, "read") else meta
-            scored.append((dist, doc_id, page_text, meta_text))
+        best: List[Tuple[float, str]] = []  # max-heap of the k best as (-dist, id)
+        try:
+            for f in as_completed(futs):
+                push_top_k(best, k, f.result())
+        except Exception as e:
+            # any failed range stops the scans still queued; every error surfaces as QueryError
+            for f in futs:
+                f.cancel()
+            if isinstance(e, QueryError):
+                raise
+            raise QueryError(str(e)) from e
 
-        scored.sort(key=lambda x: x[0])
+        top = sorted_top_k(best)
+        self.last_timings["scan"] = time.perf_counter() - t0
+        docs = self._fetch_documents([doc_id for _, doc_id in top])
+        return [self._result(doc_id, *docs[doc_id], dist) for dist, doc_id in top if doc_id in docs]
 
-        out: List[QueryResult] = []
-        for dist, doc_id, page_text, meta_text in scored[:k]:
-            md = {}
-            if isinstance(meta_text, (bytes, bytearray)):
-                try:
-                    meta_text = meta_text.decode("utf-8", errors="ignore")
-                except Exception:
-                    meta_text = ""
-            if isinstance(meta_text, str) and meta_text:
-                try:
-                    md = json.loads(meta_text)
-                except Exception:
-                    md = {}
-            md["id"] = doc_id
-            out.append(QueryResult(doc=Document(page_text, [], md), score=float(dist)))
-        return out
+    # ---------- local sidecar ----------
+    def sync_sidecar(self, batch_size: int = 10000) -> int:
+        """
+        Pulls rows changed since the sidecar watermark into the local file and returns how many.
 
+        The watermark is the highest `ORA_ROWSCN` already copied, so a restart only
+        downloads what was inserted/updated meanwhile. Rows are upserted by id, which
+        makes re-reading a block (ORA_ROWSCN is per block) harmless. Deleted rows are
+        not detected: call `self.sidecar.clear()` and sync again to rebuild.
+        """
+        if self.sidecar is None:
+            raise InvalidConfiguration("Define `'sidecar_dir'` to use the local sidecar.")
+        if not self.is_open():
+            raise BackendClosed("closed connection")
+
+        where, binds = self._where(None)
+        if self.sidecar.watermark is not None:
+            where.append("ORA_ROWSCN > :wm")
+            binds["wm"] = int(self.sidecar.watermark)
+        sql = f"SELECT id, embedding, ORA_ROWSCN FROM {self.table} WHERE {' AND '.join(where)} ORDER BY ORA_ROWSCN"
 
+        synced = 0
+        try:
+            with self.conn.cursor() as c:
+                c.arraysize = batch_size
+                c.prefetchrows = batch_size
+                c.execute(sql, binds)
+                while True:
+                    rows = c.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    ids = [r[0] for r in rows]
+                    buf = b"".join(r[1] for r in rows)
+                    # rows sharing the last SCN may continue in the next batch: keep it re-readable
+                    self.sidecar.upsert(ids, unpack_f32(buf), watermark=int(rows[-1][2]) - 1)
+                    synced += len(rows)
+                    last_scn = int(rows[-1][2])
+        except oracledb.Error as e:
+            raise QueryError(str(e)) from e
+        if synced:
+            self.sidecar.upsert([], np.empty((0, self.dim), dtype=np.float32), watermark=last_scn)
+
+        if self.debug:
+            print(f"[RDSOracleVectorBackend] sidecar sync: {synced} rows, {len(self.sidecar)} total")
+        return synced
 
+    def _query_sidecar(self, embedding: List[float], k: int) -> List[QueryResult]:
+        t0 = time.perf_counter()
+        top = self.sidecar.search(embedding, int(k))
+        self.last_timings["score"] = time.perf_counter() - t0
+        docs = self._fetch_documents([doc_id for _, doc_id in top])
+        return [self._result(doc_id, *docs[doc_id], dist) for dist, doc_id in top if doc_id in docs]
 
     def close(self) -> None:
         try:
+            if self._scan_pool is not None:
+                self._scan_pool.shutdown(wait=True)
             if self.conn: self.conn.close()
+            if self.pool is not None:
+                self.pool.close()
         finally:
+            self._scan_pool = None
             self.conn = None
+            self.pool = None
 
 Registry.register_backend("oracle_rds", lambda cfg: RDSOracleVectorBackend(cfg))
\ No newline at end of file
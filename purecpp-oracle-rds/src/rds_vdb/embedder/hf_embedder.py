@@ -16,6 +16,11 @@ class HuggingFaceEmbedder(Embedder):
         self.model = SentenceTransformer(model_name, device=device)
         self.normalize = normalize
         self.dim = int(self.model.get_sentence_embedding_dimension())
+        # identity of the vectors (e.g. for CachedEmbeddings namespaces)
+        self.model_id = model_name
+        self.engine = "sentence-transformers"
+        self.quantize = False
+        self.max_length = self.model.max_seq_length
     def embed(self, texts: List[str]) -> List[List[float]]:
         vecs = self.model.encode(texts, normalize_embeddings=self.normalize, convert_to_numpy=True)
         return vecs.astype(np.float32).tolist()
\ No newline at end of file
@@ -0,0 +1,307 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import queue, threading, time
+
+from .backend import VectorBackend
+from .document import Document
+from .embedder.base import Embedder
+
+
+def read_text_file(path: str) -> str:
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return f.read()
+
+def chunk(text: str, size: int, overlap: int) -> List[str]:
+    if size <= 0: return [text]
+    out = []
+    i = 0
+    while i < len(text):
+        out.append(text[i:i+size])
+        i += max(1, size-overlap)
+    return out
+
+
+_STOP = object()
+
+
+class StageStats:
+    __slots__ = ("name", "unit", "items", "busy")
+    def __init__(self, name: str, unit: str) -> None:
+        self.name = name; self.unit = unit; self.items = 0; self.busy = 0.0
+
+
+class IngestPipeline:
+    """
+    Multi-stage ingest: read → chunk → embed → insert.
+
+    Every stage runs its own workers and talks to the next one through a bounded
+    queue, so a slow stage applies backpressure upstream instead of buffering the
+    whole corpus, and the embedder keeps working while the previous batch is being
+    written. The embed stage batches chunks across files (`embed_batch`).
+
+    `chunk_processes > 0` runs the chunker in a process pool (CPU-bound splitting of
+    large files); the chunk stage then gets at least `chunk_processes` threads so every
+    process can be kept busy. Readers and inserters are threads (I/O-bound).
+
+    Hooks (all optional, called from worker threads):
+      `skip_chunks(path) -> set of chunk indexes` already stored, which are not re-embedded;
+      `chunk_ids(path, [chunk index, ...]) -> [id, ...]` ids to insert the chunks under
+      (passed to `backend.insert(docs, ids)`; default: ids generated by the backend);
+      `on_batch_inserted(path, [(chunk index, id), ...])` right after every committed insert
+      (ids are whatever `backend.insert` returned, `None` if it returns nothing);
+      `on_file_done(path, n_chunks)` once all chunks of a file were inserted.
+    """
+
+    def __init__(
+        self,
+        backend: VectorBackend,
+        embedder: Embedder,
+        *,
+        chunk_size: int = 800,
+        overlap: int = 100,
+        metadata_fn: Optional[Callable[[str], Dict[str, str]]] = None,
+        read_workers: int = 4,
+        chunk_workers: int = 2,
+        chunk_processes: int = 0,
+        embed_workers: int = 1,
+        insert_workers: int = 1,
+        embed_batch: int = 256,
+        queue_size: int = 64,
+        skip_chunks: Optional[Callable[[str], Set[int]]] = None,
+        chunk_ids: Optional[Callable[[str, List[int]], List[str]]] = None,
+        on_batch_inserted: Optional[Callable[[str, List[Tuple[int, Optional[str]]]], None]] = None,
+        on_file_done: Optional[Callable[[str, int], None]] = None,
+    ) -> None:
+        self.backend = backend
+        self.embedder = embedder
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.metadata_fn = metadata_fn or (lambda path: {"source": path})
+        self.read_workers = max(1, read_workers)
+        self.chunk_workers = max(1, chunk_workers)
+        self.chunk_processes = max(0, chunk_processes)
+        self.embed_workers = max(1, embed_workers)
+        self.insert_workers = max(1, insert_workers)
+        self.embed_batch = max(1, embed_batch)
+        self.queue_size = max(1, queue_size)
+        self.skip_chunks = skip_chunks
+        self.chunk_ids = chunk_ids
+        self.on_batch_inserted = on_batch_inserted
+        self.on_file_done = on_file_done
+
+        self.stats: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._failed = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._pending: Dict[str, List[int]] = {}  # path -> [chunks left, chunks total]
+        self._procs: Optional[ProcessPoolExecutor] = None
+        self._pbar = None
+        self._t0 = 0.0
+
+    # ---------- queue helpers (abort-aware) ----------
+    def _put(self, q: "queue.Queue", item) -> None:
+        while not self._failed.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: "queue.Queue", timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._failed.is_set():
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty
+            try:
+                return q.get(timeout=wait)
+            except queue.Empty:
+                continue
+        return _STOP
+
+    def _fail(self, e: BaseException) -> None:
+        with self._lock:
+            if self._error is None:
+                self._error = e
+        self._failed.set()
+
+    def _observe(self, stage: str, n: int, t0: float) -> None:
+        with self._lock:
+            s = self.stats[stage]
+            s.items += n; s.busy += time.perf_counter() - t0
+
+    # ---------- stages ----------
+    def _run_stage(self, inq: "queue.Queue", fn: Callable[[object], None]) -> None:
+        try:
+            while True:
+                item = self._get(inq)
+                if item is _STOP:
+                    self._put(inq, _STOP)  # let sibling workers see it too
+                    return
+                fn(item)
+        except BaseException as e:
+            self._fail(e)
+
+    def _read(self, path: str, outq: "queue.Queue") -> None:
+        t0 = time.perf_counter()
+        text = read_text_file(path)
+        self._observe("read", 1, t0)
+        self._put(outq, (path, text))
+
+    def _chunk(self, item: Tuple[str, str], outq: "queue.Queue") -> None:
+        path, text = item
+        t0 = time.perf_counter()
+        if self._procs is not None:
+            parts = self._procs.submit(chunk, text, self.chunk_size, self.overlap).result()
+        else:
+            parts = chunk(text, self.chunk_size, self.overlap)
+        self._observe("chunk", len(parts), t0)
+        skip = self.skip_chunks(path) if self.skip_chunks is not None else set()
+        todo = [(idx, part) for idx, part in enumerate(parts) if idx not in skip]
+        with self._lock:
+            self._pending[path] = [len(todo), len(parts)]
+        if not todo:
+            self._file_progress(path, 0)
+            return
+        md = self.metadata_fn(path)
+        self._put(outq, [(path, idx, part, md) for idx, part in todo])
+
+    def _embed_worker(self, inq: "queue.Queue", outq: "queue.Queue") -> None:
+        buf: List[Tuple[str, int, str, Dict[str, str]]] = []
+
+        def flush() -> None:
+            t0 = time.perf_counter()
+            vecs = self.embedder.embed([part for _, _, part, _ in buf])
+            docs = [(path, idx, Document(page_content=part, embedding=vec, metadata=dict(md)))
+                    for (path, idx, part, md), vec in zip(buf, vecs)]
+            self._observe("embed", len(docs), t0)
+            buf.clear()
+            self._put(outq, docs)
+
+        try:
+            while True:
+                try:
+                    # wait briefly for more files to fill the batch, then flush what we have
+                    item = self._get(inq, timeout=None if not buf else 0.05)
+                except queue.Empty:
+                    flush()
+                    continue
+                if item is _STOP:
+                    self._put(inq, _STOP)
+                    if buf and not self._failed.is_set():
+                        flush()
+                    return
+                buf.extend(item)
+                while len(buf) >= self.embed_batch:
+                    rest = buf[self.embed_batch:]
+                    del buf[self.embed_batch:]
+                    flush()
+                    buf.extend(rest)
+        except BaseException as e:
+            self._fail(e)
+
+    def _insert(self, batch: List[Tuple[str, int, Document]]) -> None:
+        t0 = time.perf_counter()
+        docs = [doc for _, _, doc in batch]
+        if self.chunk_ids is not None:
+            by_path: Dict[str, List[int]] = {}
+            for path, idx, _ in batch:
+                by_path.setdefault(path, []).append(idx)
+            named = {path: iter(self.chunk_ids(path, idxs)) for path, idxs in by_path.items()}
+            wanted = [next(named[path]) for path, _, _ in batch]
+            ids = self.backend.insert(docs, wanted) or wanted
+        else:
+            ids = self.backend.insert(docs) or [None] * len(batch)
+        self._observe("insert", len(batch), t0)
+        done: Dict[str, List[Tuple[int, Optional[str]]]] = {}
+        for (path, idx, _), doc_id in zip(batch, ids):
+            done.setdefault(path, []).append((idx, doc_id))
+        for path, items in done.items():
+            if self.on_batch_inserted is not None:
+                self.on_batch_inserted(path, items)
+            self._file_progress(path, len(items))
+
+    def _file_progress(self, path: str, n: int) -> None:
+        with self._lock:
+            counts = self._pending.get(path, [0, 0])
+            counts[0] -= n
+            if counts[0] > 0:
+                return
+            total = self._pending.pop(path, counts)[1]
+        if self.on_file_done is not None:
+            self.on_file_done(path, total)
+        if self._pbar is not None:
+            with self._lock:
+                self._pbar.set_postfix_str(self.throughput_str(), refresh=False)
+                self._pbar.update(1)
+
+    # ---------- reporting ----------
+    def throughput(self) -> Dict[str, float]:
+        """Items per second of wall time for each stage since `run()` started."""
+        elapsed = max(time.perf_counter() - self._t0, 1e-9)
+        return {name: s.items / elapsed for name, s in self.stats.items()}
+
+    def throughput_str(self) -> str:
+        rates = self.throughput()
+        return " ".join(f"{n}={rates[n]:.1f}{s.unit}/s" for n, s in self.stats.items())
+
+    # ---------- driver ----------
+    def run(self, files: Sequence[str], progress: bool = True, desc: str = "ingest") -> Dict[str, Dict[str, float]]:
+        self.stats = {
+            "read": StageStats("read", "files"),
+            "chunk": StageStats("chunk", "chunks"),
+            "embed": StageStats("embed", "chunks"),
+            "insert": StageStats("insert", "chunks"),
+        }
+        self._failed.clear(); self._error = None; self._pending.clear()
+        self._t0 = time.perf_counter()
+
+        if progress:
+            from tqdm import tqdm
+            self._pbar = tqdm(total=len(files), desc=desc)
+        if self.chunk_processes:
+            self._procs = ProcessPoolExecutor(max_workers=self.chunk_processes)
+
+        q_paths: "queue.Queue" = queue.Queue(self.queue_size)
+        q_text: "queue.Queue" = queue.Queue(self.queue_size)
+        q_chunks: "queue.Queue" = queue.Queue(self.queue_size)
+        q_docs: "queue.Queue" = queue.Queue(self.queue_size)
+
+        def spawn(n: int, target, *args) -> List[threading.Thread]:
+            ts = [threading.Thread(target=target, args=args, daemon=True) for _ in range(n)]
+            for t in ts: t.start()
+            return ts
+
+        stages = [
+            (spawn(self.read_workers, self._run_stage, q_paths, lambda p: self._read(p, q_text)), q_text),
+            (spawn(max(self.chunk_workers, self.chunk_processes), self._run_stage, q_text,
+                   lambda it: self._chunk(it, q_chunks)), q_chunks),
+            (spawn(self.embed_workers, self._embed_worker, q_chunks, q_docs), q_docs),
+            (spawn(self.insert_workers, self._run_stage, q_docs, self._insert), None),
+        ]
+        try:
+            for path in files:
+                self._put(q_paths, path)
+            self._put(q_paths, _STOP)
+            # a stage is finished once all its workers exited; then stop the next one
+            for workers, outq in stages:
+                for t in workers:
+                    t.join()
+                if outq is not None:
+                    self._put(outq, _STOP)
+        finally:
+            self._failed.set()  # unblocks anything still waiting after an error
+            if self._procs is not None:
+                self._procs.shutdown(wait=True)
+                self._procs = None
+            if self._pbar is not None:
+                self._pbar.set_postfix_str(self.throughput_str())
+                self._pbar.close()
+                self._pbar = None
+
+        if self._error is not None:
+            raise self._error
+        elapsed = time.perf_counter() - self._t0
+        return {n: {"items": s.items, "busy_s": s.busy, "per_s": s.items / max(elapsed, 1e-9)}
+                for n, s in self.stats.items()}
@@ -0,0 +1,128 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import hashlib, sqlite3, threading
+
+
+def file_sha256(path: str, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@dataclass
+class FileEntry:
+    source: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    params: str
+    done: bool
+    chunks: Optional[int] = None
+
+
+class IngestManifest:
+    """
+    Local SQLite record of what `ingest_files.py` already wrote to the VDB.
+
+    files(source → size, mtime, sha256, chunking params, done) and
+    chunks(source, idx → id): chunk ids are committed right after every insert
+    batch, so after a crash a file whose content did not change resumes from
+    the chunks that are missing instead of starting over.
+
+    The VDB commit and the manifest write are separate transactions: a crash
+    in between leaves rows the manifest does not know about. `ingest_files.py`
+    inserts chunks under deterministic ids (`chunk_id`) and records the chunk
+    count of every file version here, so those rows can be found and deleted
+    on the next run.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS files (
+                source   TEXT PRIMARY KEY,
+                size     INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256   TEXT NOT NULL,
+                params   TEXT NOT NULL,
+                done     INTEGER NOT NULL DEFAULT 0,
+                chunks   INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                source TEXT NOT NULL,
+                idx    INTEGER NOT NULL,
+                id     TEXT NOT NULL,
+                PRIMARY KEY (source, idx)
+            );
+        """)
+        if "chunks" not in {r[1] for r in self._db.execute("PRAGMA table_info(files)")}:
+            self._db.execute("ALTER TABLE files ADD COLUMN chunks INTEGER")
+        self._db.commit()
+
+    def get(self, source: str) -> Optional[FileEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT source, size, mtime_ns, sha256, params, done, chunks FROM files WHERE source = ?", (source,)
+            ).fetchone()
+        return None if row is None else FileEntry(*row[:5], done=bool(row[5]), chunks=row[6])
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT source FROM files")]
+
+    def chunk_ids(self, source: str) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT id FROM chunks WHERE source = ? ORDER BY idx", (source,))]
+
+    def chunk_indexes(self, source: str) -> Set[int]:
+        with self._lock:
+            return {r[0] for r in self._db.execute("SELECT idx FROM chunks WHERE source = ?", (source,))}
+
+    def begin(self, source: str, size: int, mtime_ns: int, sha256: str, params: str,
+              chunks: Optional[int] = None) -> None:
+        """(Re)starts a file: keeps already recorded chunks only if content and params are unchanged."""
+        with self._lock, self._db:
+            row = self._db.execute("SELECT sha256, params FROM files WHERE source = ?", (source,)).fetchone()
+            if row is None or tuple(row) != (sha256, params):
+                self._db.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (source, size, mtime_ns, sha256, params, done, chunks) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                (source, size, mtime_ns, sha256, params, chunks),
+            )
+
+    def touch(self, source: str, size: int, mtime_ns: int) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE source = ?", (size, mtime_ns, source))
+
+    def add_chunks(self, source: str, items: Iterable[Tuple[int, str]]) -> None:
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (source, idx, id) VALUES (?, ?, ?)",
+                [(source, idx, doc_id) for idx, doc_id in items],
+            )
+
+    def mark_done(self, source: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("UPDATE files SET done = 1 WHERE source = ?", (source,))
+
+    def forget(self, source: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM chunks WHERE source = ?", (source,))
+            self._db.execute("DELETE FROM files WHERE source = ?", (source,))
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            files, done = self._db.execute("SELECT COUNT(*), COALESCE(SUM(done), 0) FROM files").fetchone()
+            chunks = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {"files": files, "done": done, "chunks": chunks}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -1,26 +1,67 @@
 from __future__ import annotations
-import argparse, json, os, glob
-from typing import List, Dict
-from tqdm import tqdm
+import argparse, json, os, glob, uuid
+from typing import Callable, Dict, List
 
 from rds_vdb.registry import Registry
-from rds_vdb.document import Document
 from rds_vdb.embedder.dummy import DummyEmbedder
+from rds_vdb.ingest import IngestPipeline, chunk, read_text_file
+from rds_vdb.manifest import IngestManifest, file_sha256
 
 
+def chunk_id(source: str, sha256: str, params: str, idx: int) -> str:
+    """Deterministic id of chunk `idx` of one version (content + params) of a file."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"rds_vdb:{source}:{sha256}:{params}:{idx}"))
 
-def read_text_file(path: str) -> str:
-    with open(path, "r", encoding="utf-8", errors="ignore") as f:
-        return f.read()
+def _stale_ids(manifest: IngestManifest, source: str, entry) -> List[str]:
+    """Recorded chunk ids of `source` plus every deterministic id its recorded version could have used."""
+    ids = dict.fromkeys(manifest.chunk_ids(source))
+    if entry is not None and entry.chunks:
+        ids.update(dict.fromkeys(chunk_id(source, entry.sha256, entry.params, i) for i in range(entry.chunks)))
+    return list(ids)
 
-def chunk(text: str, size: int, overlap: int) -> List[str]:
-    if size <= 0: return [text]
-    out = []
-    i = 0
-    while i < len(text):
-        out.append(text[i:i+size])
-        i += max(1, size-overlap)
-    return out
+def plan_files(files: List[str], folder: str, manifest: IngestManifest, bk, params: str,
+               n_chunks: Callable[[str], int]) -> List[str]:
+    """
+    Returns the files that need (re)ingesting; drops the old chunks of files whose content changed.
+
+    Chunks committed to the VDB but not yet recorded in the manifest when a run died are
+    deleted here by their deterministic ids, so a resumed file is never stored twice.
+    """
+    todo = []
+    for path in files:
+        src = os.path.relpath(path, folder)
+        st = os.stat(path)
+        entry = manifest.get(src)
+        if (entry and entry.done and entry.params == params
+                and (entry.size, entry.mtime_ns) == (st.st_size, st.st_mtime_ns)):
+            continue
+        digest = file_sha256(path)
+        if entry and (entry.sha256, entry.params) == (digest, params):
+            if entry.done:  # touched but identical
+                manifest.touch(src, st.st_size, st.st_mtime_ns)
+                continue
+            # interrupted run: resumes from the chunks already recorded
+            count = n_chunks(path)
+            recorded = manifest.chunk_indexes(src)
+            orphans = [chunk_id(src, digest, params, i) for i in range(count) if i not in recorded]
+            if orphans:
+                bk.delete(orphans)
+        else:
+            if entry:
+                bk.delete(_stale_ids(manifest, src, entry))
+            count = n_chunks(path)
+        manifest.begin(src, st.st_size, st.st_mtime_ns, digest, params, count)
+        todo.append(path)
+    return todo
+
+def prune_missing(files: List[str], folder: str, manifest: IngestManifest, bk) -> int:
+    """Deletes the chunks of manifest entries that no longer match any file."""
+    present = {os.path.relpath(p, folder) for p in files}
+    gone = [src for src in manifest.sources() if src not in present]
+    for src in gone:
+        bk.delete(_stale_ids(manifest, src, manifest.get(src)))
+        manifest.forget(src)
+    return len(gone)
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser(description="Ingest text files into the VDB (RDS Oracle)")
@@ -37,6 +78,18 @@ if __name__ == "__main__":
     ap.add_argument("--service_name", required=True)
     ap.add_argument("--table", default="VDB_DOCS")
     ap.add_argument("--candidate_limit", type=int, default=3000)
+
+    ap.add_argument("--read_workers", type=int, default=4)
+    ap.add_argument("--chunk_workers", type=int, default=2)
+    ap.add_argument("--chunk_processes", type=int, default=0, help="process pool for chunking (0 = threads)")
+    ap.add_argument("--embed_workers", type=int, default=1)
+    ap.add_argument("--insert_workers", type=int, default=1)
+    ap.add_argument("--embed_batch", type=int, default=256, help="chunks per embed call (across files)")
+    ap.add_argument("--queue_size", type=int, default=64, help="bound of each inter-stage queue")
+
+    ap.add_argument("--manifest", default=None, help="default: <folder>/.ingest_<table>.sqlite")
+    ap.add_argument("--no_manifest", action="store_true", help="ingest every file again (no skip/resume)")
+    ap.add_argument("--prune", action="store_true", help="delete chunks of files no longer matched by --pattern")
     args = ap.parse_args()
 
     cfg = {
@@ -60,16 +113,54 @@ if __name__ == "__main__":
         files.extend(glob.glob(os.path.join(args.folder, p), recursive=True))
     files = sorted(set(files))
 
-    for path in tqdm(files, desc="ingest"):
-        text = read_text_file(path)
-        parts = chunk(text, args.chunk, args.overlap)
-        vecs = embedder.embed(parts)
-        docs = []
-        for part, vec in zip(parts, vecs):
-            md = dict(meta_base)
-            md.update({"source": os.path.relpath(path, args.folder)})
-            docs.append(Document(page_content=part, embedding=vec, metadata=md))
-        if docs:
-            bk.insert(docs)
-
-    bk.close()
\ No newline at end of file
+    def metadata_for(path: str) -> Dict[str, str]:
+        md = dict(meta_base)
+        md.update({"source": os.path.relpath(path, args.folder)})
+        return md
+
+    manifest = None
+    hooks = {}
+    if not args.no_manifest:
+        manifest = IngestManifest(args.manifest or os.path.join(args.folder, f".ingest_{args.table}.sqlite"))
+        params = json.dumps({"chunk": args.chunk, "overlap": args.overlap, "dim": args.dim,
+                             "metadata": meta_base}, sort_keys=True)
+        if args.prune:
+            print(f"pruned {prune_missing(files, args.folder, manifest, bk)} removed files")
+        total = len(files)
+        files = plan_files(files, args.folder, manifest, bk, params,
+                           n_chunks=lambda path: len(chunk(read_text_file(path), args.chunk, args.overlap)))
+        print(f"{total - len(files)} unchanged files skipped, {len(files)} to ingest")
+
+        src = lambda path: os.path.relpath(path, args.folder)
+
+        def ids_for(path: str, idxs: List[int]) -> List[str]:
+            digest = manifest.get(src(path)).sha256
+            return [chunk_id(src(path), digest, params, i) for i in idxs]
+
+        hooks = dict(
+            skip_chunks=lambda path: manifest.chunk_indexes(src(path)),
+            chunk_ids=ids_for,
+            on_batch_inserted=lambda path, items: manifest.add_chunks(src(path), items),
+            on_file_done=lambda path, n: manifest.mark_done(src(path)),
+        )
+
+    pipeline = IngestPipeline(
+        bk, embedder,
+        chunk_size=args.chunk,
+        overlap=args.overlap,
+        metadata_fn=metadata_for,
+        read_workers=args.read_workers,
+        chunk_workers=args.chunk_workers,
+        chunk_processes=args.chunk_processes,
+        embed_workers=args.embed_workers,
+        insert_workers=args.insert_workers,
+        embed_batch=args.embed_batch,
+        queue_size=args.queue_size,
+        **hooks,
+    )
+    try:
+        pipeline.run(files, desc="ingest")
+    finally:
+        if manifest is not None:
+            manifest.close()
+        bk.close()
\ No newline at end of file
@@ -1,11 +1,102 @@
 from __future__ import annotations
-import argparse, json
+import argparse, json, socketserver, sys, time
+from typing import Dict, List, Tuple
 from rds_vdb.registry import Registry
 from rds_vdb.embedder.dummy import DummyEmbedder
+from rds_vdb.types import QueryResult
+
+
+def run_query(bk, embedder, text: str, k: int, flt: Dict[str, str]) -> Tuple[List[QueryResult], Dict[str, float]]:
+    """Embeds and searches one query; returns the results and the latency breakdown in ms."""
+    t0 = time.perf_counter()
+    qvec = embedder.embed([text])[0]
+    t1 = time.perf_counter()
+    results = bk.query(qvec, k=k, filter=flt)
+    t2 = time.perf_counter()
+    timings = {"embed": t1 - t0}
+    timings.update(getattr(bk, "last_timings", {}) or {})
+    timings["total"] = t2 - t0
+    return results, {name: round(v * 1000.0, 3) for name, v in timings.items()}
+
+def print_results(results: List[QueryResult], timings: Dict[str, float]) -> None:
+    for i, r in enumerate(results, 1):
+        print(f"#{i} score={r.score:.6f} id={r.doc.metadata.get('id')} meta={r.doc.metadata}")
+        print(r.doc.page_content[:240].replace("\n"," ") + ("..." if len(r.doc.page_content)>240 else ""))
+        print("-")
+    print("[ms] " + " ".join(f"{name}={v:.1f}" for name, v in timings.items()))
+
+def answer_json(bk, embedder, line: str, k: int, flt: Dict[str, str]) -> str:
+    """One JSONL request -> one JSONL response. Request: {"text": ..., "k"?: ..., "filter"?: {...}} or plain text."""
+    try:
+        req = json.loads(line)
+        if not isinstance(req, dict):
+            req = {"text": str(req)}
+    except json.JSONDecodeError:
+        req = {"text": line}
+    try:
+        results, timings = run_query(bk, embedder, req["text"], int(req.get("k", k)), req.get("filter", flt))
+    except Exception as e:
+        return json.dumps({"text": req.get("text"), "error": f"{type(e).__name__}: {e}"}, ensure_ascii=False)
+    return json.dumps({
+        "text": req["text"],
+        "results": [{"score": r.score, "page_content": r.doc.page_content, "metadata": r.doc.metadata} for r in results],
+        "timings_ms": timings,
+    }, ensure_ascii=False)
+
+def answer_raw(bk, embedder, raw: bytes, k: int, flt: Dict[str, str]) -> str:
+    """`answer_json` for a raw socket line; undecodable bytes get a JSON error, not a dropped connection."""
+    try:
+        line = raw.decode("utf-8").strip()
+    except UnicodeDecodeError as e:
+        return json.dumps({"text": None, "error": f"{type(e).__name__}: {e}"}, ensure_ascii=False)
+    return answer_json(bk, embedder, line, k, flt) if line else ""
+
+def repl(bk, embedder, k: int, flt: Dict[str, str]) -> None:
+    print("Type a query (:k N, :filter {json}, :quit).")
+    while True:
+        try:
+            line = input("query> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            return
+        if not line:
+            continue
+        if line in (":q", ":quit", ":exit"):
+            return
+        try:
+            if line.startswith(":k "):
+                k = int(line[3:]); continue
+            if line.startswith(":filter "):
+                new_flt = json.loads(line[8:])
+                if not isinstance(new_flt, dict):
+                    raise ValueError("filter must be a JSON object")
+                flt = new_flt; continue
+            print_results(*run_query(bk, embedder, line, k, flt))
+        except Exception as e:
+            print(f"error: {type(e).__name__}: {e}")
+
+def serve(bk, embedder, address: str, k: int, flt: Dict[str, str]) -> None:
+    """Line-oriented JSONL over TCP; requests are served one at a time on the shared connection."""
+    host, _, port = address.rpartition(":")
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            for raw in self.rfile:
+                reply = answer_raw(bk, embedder, raw, k, flt)
+                if reply:
+                    self.wfile.write((reply + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+    with socketserver.TCPServer((host or "127.0.0.1", int(port)), Handler) as srv:
+        print(f"listening on {host or '127.0.0.1'}:{port}", file=sys.stderr)
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser(description="Similarity search (cosine) on the Oracle RDS VDB")
-    ap.add_argument("text")
+    ap.add_argument("text", nargs="?", help="single query; omit with --repl/--jsonl/--serve")
     ap.add_argument("--k", type=int, default=5)
     ap.add_argument("--filter", default="{}", help='JSON ex: {"lang":"pt"}')
     ap.add_argument("--dim", type=int, default=768)
@@ -16,7 +107,15 @@ if __name__ == "__main__":
     ap.add_argument("--service_name", required=True)
     ap.add_argument("--table", default="VDB_DOCS")
     ap.add_argument("--candidate_limit", type=int, default=3000)
+    ap.add_argument("--fetch_arraysize", type=int, default=1000)
+
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--repl", action="store_true", help="interactive prompt, connection and model stay warm")
+    mode.add_argument("--jsonl", action="store_true", help="read queries from stdin (JSONL or plain lines), write JSONL")
+    mode.add_argument("--serve", metavar="HOST:PORT", help="JSONL over a local TCP socket, e.g. 127.0.0.1:7878")
     args = ap.parse_args()
+    if not (args.text or args.repl or args.jsonl or args.serve):
+        ap.error("give a query text or one of --repl/--jsonl/--serve")
 
     cfg = {
         "user": args.user,
@@ -27,17 +126,23 @@ if __name__ == "__main__":
         "dim": args.dim,
         "ensure_schema": False,
         "candidate_limit": args.candidate_limit,
+        "fetch_arraysize": args.fetch_arraysize,
     }
     bk = Registry.make("oracle_rds", cfg)
     embedder = DummyEmbedder(dim=args.dim)
-
-    qvec = embedder.embed([args.text])[0]
     flt = json.loads(args.filter)
-    results = bk.query(qvec, k=args.k, filter=flt)
-
-    for i, r in enumerate(results, 1):
-        print(f"#{i} score={r.score:.6f} id={r.doc.metadata.get('id')} meta={r.doc.metadata}")
-        print(r.doc.page_content[:240].replace("\n"," ") + ("..." if len(r.doc.page_content)>240 else ""))
-        print("-")
 
-    bk.close()
\ No newline at end of file
+    try:
+        if args.repl:
+            repl(bk, embedder, args.k, flt)
+        elif args.jsonl:
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    print(answer_json(bk, embedder, line, args.k, flt), flush=True)
+        elif args.serve:
+            serve(bk, embedder, args.serve, args.k, flt)
+        else:
+            print_results(*run_query(bk, embedder, args.text, args.k, flt))
+    finally:
+        bk.close()
@@ -0,0 +1,267 @@
+from __future__ import annotations
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from contextlib import contextmanager
+import json, os
+import numpy as np
+
+from .exceptions import DimensionMismatch, InvalidConfiguration
+from .utils import cosine_distances, top_k_smallest
+
+try:
+    import fcntl
+except ImportError:  # Windows: single writer is up to the caller
+    fcntl = None  # type: ignore
+
+
+class VectorSidecar:
+    """Local, memory-mapped copy of the embeddings of one table.
+
+    Layout of `path/`:
+      vectors.f32     flat float32 matrix (count, dim), row-major
+      ids.txt         one document id per line, same order as the rows
+      sidecar.json    {"table", "dim", "count", "ids_bytes", "dead", "generation", "epoch",
+                       "watermark"} -- the commit point
+      sidecar.lock    advisory lock held by the (single) writer
+
+    Readers map `vectors.f32` read-only, so N worker processes share the same
+    page-cache pages instead of each holding a private copy. Writers append
+    rows, fsync them and only then publish the new `count` by atomically
+    replacing `sidecar.json`; anything past `count` (`ids_bytes` in ids.txt)
+    is garbage from an interrupted sync and is truncated by the next writer.
+
+    Every publish bumps `generation`; `epoch` only changes when the files are
+    rewritten (`clear`, `compact`). Within an epoch ids.txt is append-only, so
+    readers and writers only ever read the tail past the `ids_bytes` they
+    already hold.
+
+    `remove` tombstones rows in place (NaN vectors) and counts them in `dead`;
+    once more than `compact_ratio` of the rows are dead the files are
+    rewritten without them.
+    """
+
+    VECTORS = "vectors.f32"
+    IDS = "ids.txt"
+    META = "sidecar.json"
+    LOCK = "sidecar.lock"
+
+    def __init__(self, path: str, dim: int, table: str = "", compact_ratio: float = 0.25) -> None:
+        self.path = path
+        self.dim = int(dim)
+        self.table = table
+        self.compact_ratio = float(compact_ratio)
+        os.makedirs(path, exist_ok=True)
+
+        self.count = 0
+        self.dead = 0
+        self.watermark: Optional[int] = None
+        self.generation = 0
+        self.epoch = 0
+        self._ids: List[str] = []
+        self._ids_bytes = 0
+        self._index: Dict[str, int] = {}
+        self._mat: Optional[np.ndarray] = None
+        self.refresh(force=True)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    # ---------- read side ----------
+    def _read_meta(self) -> Dict:
+        try:
+            with open(self._file(self.META), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return {"table": self.table, "dim": self.dim, "count": 0, "ids_bytes": 0, "dead": 0,
+                    "generation": 0, "epoch": 0, "watermark": None}
+        if int(meta.get("dim", self.dim)) != self.dim:
+            raise DimensionMismatch(f"sidecar '{self.path}' has dim={meta.get('dim')}, expected dim={self.dim}")
+        if self.table and meta.get("table") and meta["table"] != self.table:
+            raise InvalidConfiguration(f"sidecar '{self.path}' belongs to table '{meta['table']}'")
+        return meta
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-maps the files if another process published a new version. Returns True if reloaded."""
+        reloaded = False
+        while True:
+            meta = self._read_meta()
+            generation, epoch = int(meta.get("generation", 0)), int(meta.get("epoch", 0))
+            if not force and generation == self.generation and epoch == self.epoch:
+                return reloaded
+            try:
+                self._load(meta, full=force or epoch != self.epoch)
+            except (OSError, ValueError):
+                if self._read_meta() == meta:
+                    raise
+                force = True  # files were rewritten while loading: start over
+                continue
+            reloaded, force = True, False
+
+    def _load(self, meta: Dict, full: bool) -> None:
+        count = int(meta.get("count", 0))
+        if full or count < len(self._ids):
+            self._ids, self._ids_bytes, self._index = [], 0, {}
+        if count > len(self._ids):
+            self._read_ids(count, meta.get("ids_bytes"))
+        self._mat = (np.memmap(self._file(self.VECTORS), dtype=np.float32, mode="r", shape=(count, self.dim))
+                     if count else np.empty((0, self.dim), dtype=np.float32))
+        self.count = count
+        self.dead = int(meta.get("dead", 0))
+        self.watermark = meta.get("watermark")
+        self.generation, self.epoch = int(meta.get("generation", 0)), int(meta.get("epoch", 0))
+
+    def _read_ids(self, count: int, ids_bytes: Optional[int]) -> None:
+        """Appends ids `len(self._ids)`..`count` from ids.txt, starting at the byte offset already loaded."""
+        with open(self._file(self.IDS), "rb") as f:
+            f.seek(self._ids_bytes)
+            if ids_bytes is not None:
+                lines = [line + b"\n" for line in f.read(int(ids_bytes) - self._ids_bytes).split(b"\n")[:-1]]
+            else:  # sidecar.json written before `ids_bytes` existed
+                lines = [f.readline() for _ in range(count - len(self._ids))]
+        for line in lines[:count - len(self._ids)]:
+            doc_id = line.decode("utf-8").rstrip("\n")
+            self._index[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+            self._ids_bytes += len(line)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._index
+
+    def search(self, embedding: Sequence[float], k: int) -> List[Tuple[float, str]]:
+        """Exact cosine search over the mapped matrix: [(distance, id), ...] ascending."""
+        self.refresh()
+        if not self.count:
+            return []
+        q = np.asarray(embedding, dtype=np.float32)
+        dists = cosine_distances(self._mat, q)
+        return [(float(dists[i]), self._ids[i]) for i in top_k_smallest(dists, int(k)) if not np.isnan(dists[i])]
+
+    # ---------- write side ----------
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self._file(self.LOCK), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def upsert(self, ids: Sequence[str], vectors: np.ndarray, watermark: Optional[int] = None) -> None:
+        """Overwrites rows of known ids in place, appends the rest and publishes the new count."""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if len(ids) != vectors.shape[0]:
+            raise ValueError(f"{len(ids)} ids for {vectors.shape[0]} vectors")
+        bad = next((doc_id for doc_id in ids if "\n" in doc_id), None)
+        if bad is not None:
+            # ids.txt is newline-delimited: one such id would shift every later row
+            raise ValueError(f"id contains a newline: {bad!r}")
+
+        with self._locked():
+            self.refresh()
+            count = self.count
+            added: Dict[str, int] = {}
+            updates: List[Tuple[int, int]] = []
+            new_ids: List[str] = []
+            new_rows: List[int] = []
+            for j, doc_id in enumerate(ids):
+                row = self._index.get(doc_id, added.get(doc_id))
+                if row is None:
+                    added[doc_id] = count + len(new_ids)
+                    new_ids.append(doc_id)
+                    new_rows.append(j)
+                else:
+                    updates.append((row, j))
+
+            row_bytes = self.dim * 4
+            with open(self._file(self.VECTORS), "ab") as f:
+                f.truncate(count * row_bytes)
+                f.write(vectors[new_rows].tobytes(order="C"))
+                f.flush(); os.fsync(f.fileno())
+            revived = len({row for row, _ in updates if row < count and np.isnan(self._mat[row, 0])})
+            if updates:
+                mm = np.memmap(self._file(self.VECTORS), dtype=np.float32, mode="r+",
+                               shape=(count + len(new_ids), self.dim))
+                for row, j in updates:
+                    mm[row] = vectors[j]
+                mm.flush()
+                del mm
+            tail = "".join(f"{doc_id}\n" for doc_id in new_ids).encode("utf-8")
+            with open(self._file(self.IDS), "ab") as f:
+                f.truncate(self._ids_bytes)
+                f.write(tail)
+                f.flush(); os.fsync(f.fileno())
+
+            wm = self.watermark
+            if watermark is not None:
+                wm = watermark if wm is None else max(int(wm), int(watermark))
+            self._publish(count + len(new_ids), self._ids_bytes + len(tail), wm, dead=self.dead - revived)
+            self.refresh()
+
+    def remove(self, ids: Sequence[str]) -> None:
+        """Tombstones rows in place (NaN vectors rank last and are never returned as matches)."""
+        with self._locked():
+            self.refresh()
+            rows = sorted({self._index[doc_id] for doc_id in ids if doc_id in self._index})
+            rows = [row for row in rows if not np.isnan(self._mat[row, 0])]
+            if not rows:
+                return
+            mm = np.memmap(self._file(self.VECTORS), dtype=np.float32, mode="r+", shape=(self.count, self.dim))
+            mm[rows] = np.nan
+            mm.flush()
+            del mm
+            self._publish(self.count, self._ids_bytes, self.watermark, dead=self.dead + len(rows))
+            self.refresh()
+            if self.dead > self.compact_ratio * self.count:
+                self._compact()
+
+    def compact(self) -> None:
+        """Rewrites the files without tombstoned rows."""
+        with self._locked():
+            self.refresh()
+            self._compact()
+
+    def _compact(self, block: int = 65536) -> None:
+        # write the live rows to new files and swap them in, so readers still mapping the old ones don't fault
+        live_ids: List[str] = []
+        with open(self._file(self.VECTORS + ".tmp"), "wb") as f:
+            for start in range(0, self.count, block):
+                rows = np.asarray(self._mat[start:start + block])
+                keep = ~np.isnan(rows[:, 0])
+                f.write(rows[keep].tobytes(order="C"))
+                live_ids.extend(self._ids[start + i] for i in np.flatnonzero(keep))
+            f.flush(); os.fsync(f.fileno())
+        tail = "".join(f"{doc_id}\n" for doc_id in live_ids).encode("utf-8")
+        with open(self._file(self.IDS + ".tmp"), "wb") as f:
+            f.write(tail)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(self._file(self.VECTORS + ".tmp"), self._file(self.VECTORS))
+        os.replace(self._file(self.IDS + ".tmp"), self._file(self.IDS))
+        self._publish(len(live_ids), len(tail), self.watermark, epoch=self.epoch + 1, dead=0)
+        self.refresh()
+
+    def _publish(self, count: int, ids_bytes: int, watermark: Optional[int], epoch: Optional[int] = None,
+                 dead: Optional[int] = None) -> None:
+        tmp = self._file(self.META + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"table": self.table, "dim": self.dim, "count": count, "ids_bytes": ids_bytes,
+                       "dead": self.dead if dead is None else dead, "generation": self.generation + 1,
+                       "epoch": self.epoch if epoch is None else epoch, "watermark": watermark}, f)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, self._file(self.META))
+
+    def clear(self) -> None:
+        """Drops every row and the watermark (next sync rebuilds from scratch)."""
+        with self._locked():
+            self.refresh()
+            self._publish(0, 0, None, epoch=self.epoch + 1, dead=0)
+            # replace (not truncate) so readers still mapping the old file don't fault
+            for name in (self.VECTORS, self.IDS):
+                tmp = self._file(name + ".tmp")
+                with open(tmp, "wb"):
+                    pass
+                os.replace(tmp, self._file(name))
+            self.refresh(force=True)
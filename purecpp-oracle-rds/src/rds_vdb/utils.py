@@ -1,6 +1,7 @@
 from __future__ import annotations
+import heapq
 import numpy as np
-from typing import List
+from typing import Iterable, List, Sequence, Tuple
 
 
 
@@ -12,4 +13,52 @@ def unpack_f32(buf: bytes) -> np.ndarray:
 
 def cosine_distance(a: np.ndarray, b: np.ndarray) -> float:
     denom = (np.linalg.norm(a) * np.linalg.norm(b)) or 1e-12
-    return 1.0 - float(a.dot(b) / denom)
\ No newline at end of file
+    return 1.0 - float(a.dot(b) / denom)
+
+def cosine_distances(mat: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Cosine distance between every row of `mat` (n, dim) and `q` (dim,)."""
+    denom = np.linalg.norm(mat, axis=1) * (np.linalg.norm(q) or 1e-12)
+    denom[denom == 0] = 1e-12
+    return 1.0 - (mat @ q) / denom
+
+def top_k_smallest(dists: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` smallest values of `dists`, sorted ascending."""
+    if k <= 0 or dists.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < dists.size:
+        idx = np.argpartition(dists, k - 1)[:k]
+    else:
+        idx = np.arange(dists.size)
+    return idx[np.argsort(dists[idx], kind="stable")]
+
+def push_top_k(heap: List[Tuple[float, str]], k: int, scored: Iterable[Tuple[float, str]]) -> None:
+    """Keeps the `k` smallest (dist, id) pairs seen so far in `heap`, a max-heap of (-dist, id)."""
+    for dist, doc_id in scored:
+        if len(heap) < k:
+            heapq.heappush(heap, (-dist, doc_id))
+        elif -heap[0][0] > dist:
+            heapq.heapreplace(heap, (-dist, doc_id))
+
+def sorted_top_k(heap: List[Tuple[float, str]]) -> List[Tuple[float, str]]:
+    """(dist, id) pairs of a `push_top_k` heap, closest first."""
+    return sorted((-d, doc_id) for d, doc_id in heap)
+
+def group_extents(extents: Sequence[Tuple[str, str, int]], chunks: int) -> List[Tuple[str, str]]:
+    """
+    Groups ordered (lo_rowid, hi_rowid, blocks) extents into at most ~`chunks`
+    contiguous (lo, hi) ranges holding roughly the same number of blocks.
+    """
+    if not extents:
+        return []
+    target = max(1, -(-sum(int(b) for _, _, b in extents) // max(1, chunks)))
+    ranges: List[Tuple[str, str]] = []
+    lo, acc = None, 0
+    for ext_lo, ext_hi, blocks in extents:
+        lo = lo or ext_lo
+        acc += int(blocks)
+        if acc >= target:
+            ranges.append((lo, ext_hi))
+            lo, acc = None, 0
+    if lo is not None:
+        ranges.append((lo, extents[-1][1]))
+    return ranges
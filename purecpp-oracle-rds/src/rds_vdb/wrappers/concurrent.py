@@ -1,6 +1,6 @@
 from __future__ import annotations
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 import threading
 from ..backend import VectorBackend
 from ..document import Document
@@ -16,9 +16,13 @@ class ConcurrentSearchWrapper(VectorBackend):
     def is_open(self) -> bool:
         return self._backend.is_open()
 
-    def insert(self, docs: List[Document]) -> None:
+    def insert(self, docs: List[Document], ids: Optional[Sequence[str]] = None) -> Optional[List[str]]:
         with self._lock:
-            self._backend.insert(docs)
+            return self._backend.insert(docs) if ids is None else self._backend.insert(docs, ids)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._lock:
+            return self._backend.delete(ids)
 
     def query(self, embedding: List[float], k: int, filter: Optional[Dict[str, str]] = None) -> List[QueryResult]:
         if not self._backend_thread_safe:
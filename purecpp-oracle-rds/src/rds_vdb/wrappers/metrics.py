@@ -26,7 +26,10 @@ class MetricsWrapper(VectorBackend):
             with self._lock:
                 s = self._stats.setdefault(method, CallStats()); s.observe(dt, ok)
     def is_open(self) -> bool: return self._measure("is_open", self._backend.is_open)
-    def insert(self, docs): return self._measure("insert", self._backend.insert, docs)
+    def insert(self, docs, ids=None):
+        if ids is None: return self._measure("insert", self._backend.insert, docs)
+        return self._measure("insert", self._backend.insert, docs, ids)
+    def delete(self, ids): return self._measure("delete", self._backend.delete, ids)
     def query(self, embedding, k, filter=None): return self._measure("query", self._backend.query, embedding, k, filter)
     def close(self) -> None: return self._measure("close", self._backend.close)
     def snapshot(self) -> Dict[str, Dict[str, float]]:
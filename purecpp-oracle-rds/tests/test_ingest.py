@@ -0,0 +1,160 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from rds_vdb.ingest import IngestPipeline, chunk
+
+
+class FakeEmbedder:
+    dim = 2
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.batches = []
+
+    def embed(self, texts):
+        self.batches.append(len(texts))
+        if self.fail_on is not None and any(self.fail_on in t for t in texts):
+            raise RuntimeError("embed failed")
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class FakeBackend:
+    dim = 2
+
+    def __init__(self):
+        self.docs = []
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        return True
+
+    def insert(self, docs):
+        with self._lock:
+            start = len(self.docs)
+            self.docs.extend(docs)
+            return [f"id{n}" for n in range(start, len(self.docs))]
+
+    def query(self, embedding, k, filter=None):
+        return []
+
+    def close(self):
+        pass
+
+
+class TestIngestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.files = self._write_files()
+
+    def _write_files(self, copy=0):
+        files = []
+        for i, n in enumerate((25, 3, 0, 41)):
+            path = os.path.join(self._tmp.name, f"f{i}_{copy}.txt")
+            with open(path, "w") as f:
+                f.write("".join(chr(ord("a") + i) for _ in range(n)))
+            files.append(path)
+        return files
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _pipeline(self, backend, embedder, skip=None, **kw):
+        self.inserted, self.done = {}, []
+        skip = skip or {}
+        lock = threading.Lock()
+
+        def on_batch(path, items):
+            with lock:
+                self.inserted.setdefault(path, []).extend(items)
+
+        def on_done(path, n):
+            with lock:
+                self.assertEqual(len(self.inserted.get(path, [])), n - len(skip.get(path, ())))
+                self.done.append(path)
+
+        return IngestPipeline(backend, embedder, chunk_size=10, overlap=2, embed_batch=4,
+                              on_batch_inserted=on_batch, on_file_done=on_done,
+                              skip_chunks=lambda p: set(skip.get(p, ())), **kw)
+
+    def test_every_chunk_inserted_once(self):
+        """All chunks reach the backend with their file's metadata; hooks see each (index, id) once."""
+        backend, embedder = FakeBackend(), FakeEmbedder()
+        stats = self._pipeline(backend, embedder, read_workers=3, chunk_workers=2).run(self.files, progress=False)
+        expected = {p: len(chunk(open(p).read(), 10, 2)) for p in self.files}
+        self.assertEqual(len(backend.docs), sum(expected.values()))
+        self.assertEqual(stats["insert"]["items"], len(backend.docs))
+        self.assertTrue(all(n <= 4 for n in embedder.batches))
+        for path, n in expected.items():
+            self.assertEqual(sorted(idx for idx, _ in self.inserted.get(path, [])), list(range(n)))
+        for doc in backend.docs:
+            self.assertIn(doc.page_content, open(doc.metadata["source"]).read())
+        self.assertEqual(sorted(self.done), sorted(self.files))
+        ids = [doc_id for items in self.inserted.values() for _, doc_id in items]
+        self.assertEqual(sorted(ids), sorted(f"id{n}" for n in range(len(backend.docs))))
+
+    def test_single_workers_keep_file_order(self):
+        """With one worker per stage chunks are inserted in file order, then chunk order."""
+        backend = FakeBackend()
+        self._pipeline(backend, FakeEmbedder(), read_workers=1, chunk_workers=1).run(self.files, progress=False)
+        order = [(d.metadata["source"], d.page_content) for d in backend.docs]
+        expected = [(p, part) for p in self.files for part in chunk(open(p).read(), 10, 2)]
+        self.assertEqual(order, expected)
+        self.assertEqual([p for p in self.done if p in self.inserted], [p for p in self.files if p in self.inserted])
+
+    def test_skip_chunks(self):
+        """Chunk indexes reported by `skip_chunks` are not re-embedded; fully skipped files still finish."""
+        backend = FakeBackend()
+        skip = {self.files[0]: {0, 1}, self.files[1]: {0}}
+        self._pipeline(backend, FakeEmbedder(), skip=skip).run(self.files, progress=False)
+        self.assertEqual(sorted(idx for idx, _ in self.inserted[self.files[0]]), [2, 3])
+        self.assertNotIn(self.files[1], self.inserted)
+        self.assertEqual(sorted(self.done), sorted(self.files))
+
+    def test_error_propagates(self):
+        """A failing stage aborts the run and its exception is re-raised by run()."""
+        backend = FakeBackend()
+        files = [path for copy in range(20) for path in self._write_files(copy)]
+        with self.assertRaisesRegex(RuntimeError, "embed failed"):
+            self._pipeline(backend, FakeEmbedder(fail_on="d"), queue_size=1).run(files, progress=False)
+        self.assertFalse(any("d" in d.page_content for d in backend.docs))
+
+    def test_chunk_ids_hook(self):
+        """`chunk_ids` names every chunk; the backend receives those ids and the hooks report them."""
+        backend = FakeBackend()
+        inserted_ids = []
+        original = backend.insert
+
+        def insert(docs, ids=None):
+            inserted_ids.extend(ids)
+            original(docs)
+            return list(ids)
+
+        backend.insert = insert
+        pipe = self._pipeline(backend, FakeEmbedder(), chunk_ids=lambda path, idxs: [f"{path}#{i}" for i in idxs])
+        pipe.run(self.files, progress=False)
+        self.assertEqual(sorted(inserted_ids), sorted(f"{p}#{i}" for p in self.files
+                                                      for i in range(len(chunk(open(p).read(), 10, 2)))))
+        for path, items in self.inserted.items():
+            self.assertEqual([doc_id for _, doc_id in items], [f"{path}#{idx}" for idx, _ in items])
+
+    def test_chunk_processes(self):
+        """With a process pool the chunk stage runs one thread per process, even if chunk_workers is lower."""
+        backend = FakeBackend()
+        pipe = self._pipeline(backend, FakeEmbedder(), read_workers=1, chunk_workers=1, chunk_processes=2)
+        both_busy = threading.Barrier(2, timeout=10)  # breaks (and fails the run) with a single chunk thread
+        original = pipe._chunk
+
+        def paired(item, outq):
+            both_busy.wait()
+            original(item, outq)
+
+        pipe._chunk = paired
+        pipe.run(self.files, progress=False)
+        self.assertEqual(len(backend.docs), sum(len(chunk(open(p).read(), 10, 2)) for p in self.files))
+
+
+if __name__ == '__main__':
+    unittest.main()
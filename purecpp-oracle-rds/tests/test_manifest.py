@@ -0,0 +1,151 @@
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from rds_vdb.ingest import chunk, read_text_file
+from rds_vdb.manifest import IngestManifest, file_sha256
+from rds_vdb.scripts.ingest_files import chunk_id, plan_files, prune_missing
+
+PARAMS = json.dumps({"chunk": 4, "overlap": 0}, sort_keys=True)
+
+
+class FakeBackend:
+    def __init__(self):
+        self.deleted = []
+
+    def delete(self, ids):
+        ids = list(ids)
+        self.deleted.extend(ids)
+        return len(ids)
+
+
+def n_chunks(path):
+    return len(chunk(read_text_file(path), 4, 0))
+
+
+class TestIngestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.manifest = IngestManifest(os.path.join(self._tmp.name, "m.sqlite"))
+
+    def tearDown(self):
+        self.manifest.close()
+        self._tmp.cleanup()
+
+    def test_begin_keeps_chunks_of_same_version(self):
+        """Chunks survive a restart of the same content/params and are dropped when either changes."""
+        m = self.manifest
+        m.begin("a.txt", 10, 1, "sha1", PARAMS, 3)
+        m.add_chunks("a.txt", [(0, "x0"), (2, "x2")])
+        m.begin("a.txt", 10, 2, "sha1", PARAMS, 3)
+        self.assertEqual(m.chunk_indexes("a.txt"), {0, 2})
+        self.assertEqual(m.chunk_ids("a.txt"), ["x0", "x2"])
+        m.begin("a.txt", 11, 3, "sha2", PARAMS, 4)
+        self.assertEqual(m.chunk_ids("a.txt"), [])
+        entry = m.get("a.txt")
+        self.assertEqual((entry.sha256, entry.mtime_ns, entry.chunks, entry.done), ("sha2", 3, 4, False))
+
+    def test_mark_done_touch_forget_summary(self):
+        m = self.manifest
+        m.begin("a.txt", 1, 1, "s", PARAMS)
+        m.begin("b.txt", 1, 1, "s", PARAMS)
+        m.add_chunks("a.txt", [(0, "x")])
+        m.mark_done("a.txt")
+        m.touch("a.txt", 5, 6)
+        self.assertEqual((m.get("a.txt").done, m.get("a.txt").size, m.get("a.txt").mtime_ns), (True, 5, 6))
+        self.assertEqual(m.summary(), {"files": 2, "done": 1, "chunks": 1})
+        m.forget("a.txt")
+        self.assertIsNone(m.get("a.txt"))
+        self.assertEqual(sorted(m.sources()), ["b.txt"])
+        self.assertEqual(m.summary(), {"files": 1, "done": 0, "chunks": 0})
+
+    def test_opens_manifest_without_chunk_counts(self):
+        """Manifests created before the `chunks` column existed are migrated on open."""
+        path = os.path.join(self._tmp.name, "old.sqlite")
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE files (source TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                   " sha256 TEXT NOT NULL, params TEXT NOT NULL, done INTEGER NOT NULL DEFAULT 0)")
+        db.execute("INSERT INTO files VALUES ('a.txt', 1, 1, 's', 'p', 1)")
+        db.commit(); db.close()
+        m = IngestManifest(path)
+        try:
+            self.assertEqual((m.get("a.txt").done, m.get("a.txt").chunks), (True, None))
+        finally:
+            m.close()
+
+
+class TestPlanFiles(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.folder = os.path.join(self._tmp.name, "docs")
+        os.makedirs(self.folder)
+        self.manifest = IngestManifest(os.path.join(self._tmp.name, "m.sqlite"))
+        self.bk = FakeBackend()
+
+    def tearDown(self):
+        self.manifest.close()
+        self._tmp.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.folder, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def _plan(self, files):
+        return plan_files(files, self.folder, self.manifest, self.bk, PARAMS, n_chunks)
+
+    def test_new_done_and_touched_files(self):
+        """New files are planned; done files are skipped, also when only their mtime changed."""
+        a = self._write("a.txt", "abcdefgh")
+        self.assertEqual(self._plan([a]), [a])
+        self.assertEqual(self.manifest.get("a.txt").chunks, 2)
+        self.manifest.mark_done("a.txt")
+        self.assertEqual(self._plan([a]), [])
+        os.utime(a, ns=(1, 1))
+        self.assertEqual(self._plan([a]), [])
+        self.assertEqual(self.manifest.get("a.txt").mtime_ns, 1)
+        self.assertEqual(self.bk.deleted, [])
+
+    def test_interrupted_file_deletes_unrecorded_chunks(self):
+        """Resuming deletes the deterministic ids of chunks committed but never recorded."""
+        a = self._write("a.txt", "abcdefghijkl")
+        self._plan([a])
+        digest = file_sha256(a)
+        self.manifest.add_chunks("a.txt", [(0, chunk_id("a.txt", digest, PARAMS, 0))])
+        self.assertEqual(self._plan([a]), [a])
+        self.assertEqual(self.bk.deleted, [chunk_id("a.txt", digest, PARAMS, i) for i in (1, 2)])
+        self.assertEqual(self.manifest.chunk_indexes("a.txt"), {0})
+
+    def test_changed_file_drops_old_version(self):
+        """A changed file loses its recorded chunks and every id its old version could have used."""
+        a = self._write("a.txt", "abcdefgh")
+        self._plan([a])
+        old = file_sha256(a)
+        self.manifest.add_chunks("a.txt", [(0, "legacy-uuid")])
+        self.manifest.mark_done("a.txt")
+        self._write("a.txt", "changed!")
+        self.assertEqual(self._plan([a]), [a])
+        self.assertEqual(self.bk.deleted, ["legacy-uuid"] + [chunk_id("a.txt", old, PARAMS, i) for i in (0, 1)])
+        self.assertEqual(self.manifest.get("a.txt").sha256, file_sha256(a))
+
+    def test_prune_missing(self):
+        """Entries without a file are deleted from the backend and forgotten."""
+        a, b = self._write("a.txt", "abcd"), self._write("b.txt", "efgh")
+        self._plan([a, b])
+        self.assertEqual(prune_missing([a], self.folder, self.manifest, self.bk), 1)
+        self.assertEqual(self.bk.deleted, [chunk_id("b.txt", file_sha256(b), PARAMS, 0)])
+        self.assertEqual(self.manifest.sources(), ["a.txt"])
+
+    def test_chunk_ids_are_deterministic(self):
+        self.assertEqual(chunk_id("a", "s", PARAMS, 1), chunk_id("a", "s", PARAMS, 1))
+        self.assertEqual(len({chunk_id("a", "s", PARAMS, 1), chunk_id("a", "s", PARAMS, 2),
+                              chunk_id("a", "t", PARAMS, 1), chunk_id("b", "s", PARAMS, 1)}), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
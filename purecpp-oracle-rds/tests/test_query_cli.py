@@ -0,0 +1,66 @@
+import contextlib
+import io
+import json
+import unittest
+from unittest import mock
+
+from rds_vdb.scripts.query_cli import answer_raw, repl
+
+
+class FakeEmbedder:
+    def embed(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+
+class FakeBackend:
+    def __init__(self):
+        self.calls = []
+
+    def query(self, embedding, k, filter=None):
+        self.calls.append((k, filter))
+        return []
+
+
+class TestRepl(unittest.TestCase):
+
+    def _run(self, lines):
+        bk = FakeBackend()
+        out = io.StringIO()
+        with mock.patch("builtins.input", side_effect=lines), contextlib.redirect_stdout(out):
+            repl(bk, FakeEmbedder(), 5, {})
+        return bk, out.getvalue()
+
+    def test_bad_commands_keep_the_session(self):
+        """Malformed :k / :filter print an error and leave the previous settings in place."""
+        bk, out = self._run([":k ten", ":filter {oops", ":filter [1]", "q1", ":k 3",
+                             ':filter {"lang": "pt"}', "q2", ":quit"])
+        self.assertEqual(out.count("error:"), 3)
+        self.assertIn("ValueError", out)
+        self.assertIn("JSONDecodeError", out)
+        self.assertEqual(bk.calls, [(5, {}), (3, {"lang": "pt"})])
+
+    def test_eof_ends_the_session(self):
+        bk, _ = self._run(EOFError())
+        self.assertEqual(bk.calls, [])
+
+
+class TestAnswerRaw(unittest.TestCase):
+
+    def test_invalid_utf8_gets_json_error(self):
+        """A non-UTF-8 socket line is answered with the usual JSON error shape."""
+        bk = FakeBackend()
+        reply = json.loads(answer_raw(bk, FakeEmbedder(), b"caf\xe9\n", 5, {}))
+        self.assertIsNone(reply["text"])
+        self.assertTrue(reply["error"].startswith("UnicodeDecodeError"))
+        self.assertEqual(bk.calls, [])
+
+    def test_lines(self):
+        bk = FakeBackend()
+        self.assertEqual(answer_raw(bk, FakeEmbedder(), b"  \n", 5, {}), "")
+        reply = json.loads(answer_raw(bk, FakeEmbedder(), '{"text": "ação", "k": 2}\n'.encode("utf-8"), 5, {}))
+        self.assertEqual((reply["text"], reply["results"]), ("ação", []))
+        self.assertEqual(bk.calls, [(2, {})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,217 @@
+import importlib.util
+import time
+import unittest
+import numpy as np
+
+from rds_vdb.utils import (cosine_distances, top_k_smallest, push_top_k, sorted_top_k, group_extents,
+                           pack_f32)
+
+HAS_ORACLEDB = importlib.util.find_spec("oracledb") is not None
+
+
+class FakeCursor:
+    def __init__(self, rows, log):
+        self._rows = list(rows)
+        self._log = log
+        self.arraysize = 100
+        self.prefetchrows = 2
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, binds=None):
+        self._log.append(("execute", sql, binds))
+
+    def fetchmany(self, n):
+        self._log.append(("fetchmany", n))
+        batch, self._rows = self._rows[:n], self._rows[n:]
+        return batch
+
+    def fetchall(self):
+        self._log.append(("fetchall",))
+        rows, self._rows = self._rows, []
+        return rows
+
+
+class FakeConnection:
+    def __init__(self, rows, log):
+        self._rows, self._log = rows, log
+        self.outputtypehandler = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self):
+        return FakeCursor(self._rows, self._log)
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows, self.log = rows, []
+
+    def acquire(self):
+        return FakeConnection(self.rows, self.log)
+
+
+class TestTopK(unittest.TestCase):
+
+    def test_cosine_distances_matches_definition(self):
+        """Row-wise cosine distance equals 1 - cos(angle), zero rows included."""
+        rng = np.random.default_rng(0)
+        mat = rng.normal(size=(20, 8)).astype(np.float32)
+        mat[3] = 0.0
+        q = rng.normal(size=8).astype(np.float32)
+        d = cosine_distances(mat, q)
+        for i in (0, 7, 19):
+            expected = 1 - mat[i] @ q / (np.linalg.norm(mat[i]) * np.linalg.norm(q))
+            self.assertAlmostEqual(float(d[i]), float(expected), places=5)
+        self.assertAlmostEqual(float(d[3]), 1.0)
+
+    def test_top_k_smallest_sorted(self):
+        """The k smallest values come back sorted, with k larger than the input and k <= 0 handled."""
+        dists = np.array([0.5, 0.1, 0.9, 0.3, 0.1])
+        self.assertEqual(top_k_smallest(dists, 3).tolist(), [1, 4, 3])
+        self.assertEqual(top_k_smallest(dists, 10).tolist(), [1, 4, 3, 0, 2])
+        self.assertEqual(top_k_smallest(dists, 0).tolist(), [])
+        self.assertEqual(top_k_smallest(np.array([]), 3).tolist(), [])
+
+    def test_push_top_k_matches_global_sort(self):
+        """Merging batches into the running heap gives the same top-k as sorting everything."""
+        rng = np.random.default_rng(1)
+        scored = [(float(d), f"id{i}") for i, d in enumerate(rng.random(1000))]
+        heap = []
+        for start in range(0, len(scored), 64):
+            push_top_k(heap, 10, scored[start:start + 64])
+        self.assertEqual(sorted_top_k(heap), sorted(scored)[:10])
+
+
+class TestGroupExtents(unittest.TestCase):
+
+    def test_balanced_contiguous_ranges(self):
+        """Extents are grouped in order into ranges of about total/chunks blocks."""
+        extents = [(f"lo{i}", f"hi{i}", 8) for i in range(8)]
+        self.assertEqual(group_extents(extents, 4),
+                         [("lo0", "hi1"), ("lo2", "hi3"), ("lo4", "hi5"), ("lo6", "hi7")])
+
+    def test_uneven_extents_and_tail(self):
+        """A big extent closes a range alone; leftover extents form a last range."""
+        extents = [("a", "A", 8), ("b", "B", 128), ("c", "C", 8), ("d", "D", 8)]
+        ranges = group_extents(extents, 3)
+        self.assertEqual(ranges[0], ("a", "B"))
+        self.assertEqual(ranges[-1][1], "D")
+        covered = [lo for lo, _ in ranges]
+        self.assertEqual(covered, sorted(covered))
+
+    def test_more_chunks_than_extents(self):
+        """Each extent becomes its own range; no extents gives no ranges."""
+        extents = [("a", "A", 8), ("b", "B", 8)]
+        self.assertEqual(group_extents(extents, 16), [("a", "A"), ("b", "B")])
+        self.assertEqual(group_extents([], 4), [])
+
+
+@unittest.skipUnless(HAS_ORACLEDB, "oracledb not installed")
+class TestParallelScan(unittest.TestCase):
+
+    def _backend(self, rows, dim=4, arraysize=3, chunks=2):
+        from rds_vdb.backends.rds_oracle_backend import RDSOracleVectorBackend
+        bk = RDSOracleVectorBackend.__new__(RDSOracleVectorBackend)
+        bk.dim, bk.scan_arraysize, bk.scan_chunks = dim, arraysize, chunks
+        bk.table, bk.scan_split = "VDB_DOCS", "rowid"
+        bk.pool = FakePool(rows)
+        return bk
+
+    def test_scan_chunk_scores_batches(self):
+        """_scan_chunk reads with fetchmany(arraysize) and returns the exact local top-k."""
+        rng = np.random.default_rng(2)
+        vecs = rng.normal(size=(10, 4)).astype(np.float32)
+        rows = [(f"id{i}", pack_f32(v.tolist())) for i, v in enumerate(vecs)]
+        bk = self._backend(rows)
+        q = rng.normal(size=4).astype(np.float32)
+        top = bk._scan_chunk(q, 3, "SELECT ...", {})
+        d = cosine_distances(vecs, q)
+        self.assertEqual([doc_id for _, doc_id in top], [f"id{i}" for i in top_k_smallest(d, 3)])
+        self.assertEqual([e for e in bk.pool.log if e[0].startswith("fetch")], [("fetchmany", 3)] * 5)
+
+    def test_scan_ranges_from_extents(self):
+        """rowid split turns USER_EXTENTS rows into ROWID BETWEEN ranges; no extents falls back to hash."""
+        bk = self._backend([("r0", "R0", 8), ("r1", "R1", 8), ("r2", "R2", 8)], chunks=2)
+        bk.conn = bk.pool.acquire()
+        ranges = bk._scan_ranges()
+        self.assertEqual([b for _, b in ranges], [{"lo": "r0", "hi": "R1"}, {"lo": "r2", "hi": "R2"}])
+        bk.conn = FakePool([]).acquire()
+        ranges = bk._scan_ranges()
+        self.assertEqual(len(ranges), 2)
+        self.assertTrue(all(sql.startswith("ORA_HASH") for sql, _ in ranges))
+
+    def test_failed_range_cancels_the_rest(self):
+        """A non-oracledb error in one range cancels the queued ranges and is raised as QueryError."""
+        from concurrent.futures import ThreadPoolExecutor
+        from rds_vdb.exceptions import QueryError
+        bk = self._backend([])
+        bk.last_timings, bk.debug, bk.scan_workers = {}, False, 1
+        bk._scan_ranges = lambda: [(f"r{i}", {}) for i in range(4)]
+        bk._scan_pool = ThreadPoolExecutor(max_workers=1)
+        scanned = []
+
+        def scan_chunk(q, k, sql, binds):
+            scanned.append(sql)
+            if sql.endswith("r0"):
+                raise ValueError("bad row")
+            time.sleep(0.2)
+            return []
+
+        bk._scan_chunk = scan_chunk
+        try:
+            with self.assertRaisesRegex(QueryError, "bad row"):
+                bk._query_parallel([1, 0, 0, 0], 2, None)
+        finally:
+            bk._scan_pool.shutdown(wait=True)
+        self.assertLessEqual(len(scanned), 2)
+
+
+class DocsCursor(FakeCursor):
+    """Answers `id IN (...)` lookups from a {id: (page, meta)} table."""
+
+    def __init__(self, table, log):
+        super().__init__([], log)
+        self._table = table
+
+    def execute(self, sql, binds=None):
+        super().execute(sql, binds)
+        self._rows = [(i, *self._table[i]) for i in binds.values() if i in self._table]
+
+
+@unittest.skipUnless(HAS_ORACLEDB, "oracledb not installed")
+class TestFetchDocuments(unittest.TestCase):
+
+    def _backend(self, table):
+        from rds_vdb.backends.rds_oracle_backend import RDSOracleVectorBackend
+        bk = RDSOracleVectorBackend.__new__(RDSOracleVectorBackend)
+        bk.table, bk.last_timings, bk.log = "VDB_DOCS", {}, []
+        bk.conn = type("Conn", (), {"cursor": lambda _self: DocsCursor(table, bk.log)})()
+        return bk
+
+    def test_in_list_is_chunked(self):
+        """More than 1000 ids are looked up in IN-lists of at most 1000 binds (ORA-01795)."""
+        table = {f"id{i}": (f"p{i}", "{}") for i in range(2500)}
+        bk = self._backend(table)
+        docs = bk._fetch_documents(list(table))
+        self.assertEqual(docs, {doc_id: (page, meta) for doc_id, (page, meta) in table.items()})
+        sizes = [len(e[2]) for e in bk.log if e[0] == "execute"]
+        self.assertEqual(sizes, [1000, 1000, 500])
+
+    def test_missing_ids_are_absent(self):
+        """Ids deleted after scoring are left out instead of coming back as empty documents."""
+        bk = self._backend({"a": (None, '{"x": 1}')})
+        self.assertEqual(bk._fetch_documents(["a", "gone"]), {"a": ("", '{"x": 1}')})
+        self.assertEqual(bk._fetch_documents([]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
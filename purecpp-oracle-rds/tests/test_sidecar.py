@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+
+from rds_vdb.exceptions import DimensionMismatch
+from rds_vdb.sidecar import VectorSidecar
+
+
+class TestVectorSidecar(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = self._tmp.name
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _meta(self):
+        with open(os.path.join(self.path, VectorSidecar.META)) as f:
+            return json.load(f)
+
+    def test_upsert_appends_and_overwrites(self):
+        """New ids are appended, known ids are overwritten in place, duplicates in a batch keep the last."""
+        sc = VectorSidecar(self.path, 4, "T")
+        v = self.rng.normal(size=(3, 4)).astype(np.float32)
+        sc.upsert(["a", "b", "c"], v, watermark=10)
+        sc.upsert(["b", "d", "d"], np.stack([v[0], -v[2], v[2]]), watermark=5)
+        self.assertEqual(len(sc), 4)
+        self.assertEqual(sc.watermark, 10)
+        self.assertEqual({doc_id for _, doc_id in sc.search(v[0], 2)}, {"a", "b"})
+        self.assertAlmostEqual(sc.search(v[0], 1)[0][0], 0.0, places=5)
+        self.assertEqual({doc_id for _, doc_id in sc.search(v[2], 2)}, {"c", "d"})
+        with open(os.path.join(self.path, VectorSidecar.IDS), "rb") as f:
+            self.assertEqual(f.read(), b"a\nb\nc\nd\n")
+        meta = self._meta()
+        self.assertEqual((meta["count"], meta["ids_bytes"], meta["generation"]), (4, 8, 2))
+
+    def test_upsert_truncates_unpublished_tail(self):
+        """Bytes past the published offset (an interrupted writer) are dropped by the next upsert."""
+        sc = VectorSidecar(self.path, 2)
+        sc.upsert(["a"], [[1, 0]])
+        with open(os.path.join(self.path, VectorSidecar.IDS), "ab") as f:
+            f.write(b"garbage\n")
+        with open(os.path.join(self.path, VectorSidecar.VECTORS), "ab") as f:
+            f.write(b"\0" * 8)
+        sc.upsert(["b"], [[0, 1]])
+        with open(os.path.join(self.path, VectorSidecar.IDS), "rb") as f:
+            self.assertEqual(f.read(), b"a\nb\n")
+        self.assertEqual(os.path.getsize(os.path.join(self.path, VectorSidecar.VECTORS)), 16)
+        self.assertEqual(VectorSidecar(self.path, 2).search([0, 1], 1)[0][1], "b")
+
+    def test_refresh_sees_other_writer(self):
+        """A reader picks up appends and clears published by another instance, generation by generation."""
+        reader = VectorSidecar(self.path, 2)
+        writer = VectorSidecar(self.path, 2)
+        self.assertFalse(reader.refresh())
+        writer.upsert(["a", "b"], [[1, 0], [0, 1]])
+        self.assertTrue(reader.refresh())
+        self.assertFalse(reader.refresh())
+        writer.upsert(["c"], [[1, 1]])
+        self.assertEqual(reader.search([1, 1], 1)[0][1], "c")
+        self.assertIn("c", reader)
+        self.assertEqual(reader.generation, writer.generation)
+        writer.clear()
+        writer.upsert(["z"], [[1, 0]])
+        self.assertTrue(reader.refresh())
+        self.assertEqual((len(reader), "a" in reader, "z" in reader), (1, False, True))
+
+    def test_reads_sidecar_without_offsets(self):
+        """sidecar.json files written before `ids_bytes`/`generation` existed still load."""
+        VectorSidecar(self.path, 2).upsert(["a", "b"], [[1, 0], [0, 1]], watermark=3)
+        with open(os.path.join(self.path, VectorSidecar.META), "w") as f:
+            json.dump({"table": "", "dim": 2, "count": 2, "watermark": 3}, f)
+        sc = VectorSidecar(self.path, 2)
+        self.assertEqual(sc.search([0, 1], 1)[0][1], "b")
+        sc.upsert(["c"], [[1, 1]])
+        self.assertEqual((len(sc), self._meta()["ids_bytes"]), (3, 6))
+
+    def test_removed_rows_are_not_returned(self):
+        """Tombstoned rows (NaN vectors) never come back from search, also in other readers."""
+        sc = VectorSidecar(self.path, 2)
+        other = VectorSidecar(self.path, 2)
+        sc.upsert(["a", "b", "c"], [[1, 0], [0.9, 0.1], [0, 1]])
+        sc.remove(["a", "missing"])
+        self.assertEqual([doc_id for _, doc_id in sc.search([1, 0], 3)], ["b", "c"])
+        self.assertEqual([doc_id for _, doc_id in other.search([1, 0], 3)], ["b", "c"])
+
+    def test_tombstones_are_compacted(self):
+        """Past `compact_ratio` dead rows the files are rewritten without them; readers follow."""
+        sc = VectorSidecar(self.path, 2, compact_ratio=0.5)
+        reader = VectorSidecar(self.path, 2)
+        ids = [f"id{i}" for i in range(10)]
+        sc.upsert(ids, [[1, i] for i in range(10)])
+        sc.remove(ids[:5])
+        self.assertEqual((len(sc), sc.dead, sc.epoch), (10, 5, 0))
+        sc.remove(ids[:6])
+        self.assertEqual((len(sc), sc.dead, sc.epoch), (4, 0, 1))
+        self.assertEqual(os.path.getsize(os.path.join(self.path, VectorSidecar.VECTORS)), 4 * 2 * 4)
+        self.assertEqual(sorted(doc_id for _, doc_id in reader.search([1, 0], 10)), ids[6:])
+        self.assertNotIn("id0", reader)
+        sc.upsert(["id0", "id9"], [[1, 0], [1, 9]])
+        self.assertEqual(reader.search([1, 0], 1)[0][1], "id0")
+        self.assertEqual(len(reader), 5)
+
+    def test_upsert_revives_removed_id(self):
+        """Re-inserting a tombstoned id overwrites its row and no longer counts it as dead."""
+        sc = VectorSidecar(self.path, 2, compact_ratio=1.0)
+        sc.upsert(["a", "b"], [[1, 0], [0, 1]])
+        sc.remove(["a"])
+        sc.remove(["a"])
+        self.assertEqual(sc.dead, 1)
+        sc.upsert(["a"], [[1, 0]])
+        self.assertEqual((sc.dead, len(sc)), (0, 2))
+        self.assertEqual(sc.search([1, 0], 1)[0][1], "a")
+        sc.remove(["a", "b"])
+        sc.compact()
+        self.assertEqual((len(sc), sc.search([1, 0], 1)), (0, []))
+
+    def test_rejects_ids_with_newlines(self):
+        """A newline in an id would shift ids.txt against the vectors; the whole batch is refused."""
+        sc = VectorSidecar(self.path, 2)
+        sc.upsert(["a"], [[1, 0]])
+        with self.assertRaises(ValueError):
+            sc.upsert(["a\nb", "c"], [[0, 1], [1, 1]])
+        reopened = VectorSidecar(self.path, 2)
+        self.assertEqual((len(reopened), "c" in reopened), (1, False))
+        self.assertEqual(reopened.search([1, 0], 1)[0][1], "a")
+
+    def test_dimension_mismatch(self):
+        """Opening a sidecar with another dim raises."""
+        VectorSidecar(self.path, 2).upsert(["a"], [[1, 0]])
+        with self.assertRaises(DimensionMismatch):
+            VectorSidecar(self.path, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: SimpleCleaner (html.parser + markdownify) vs FastCleaner (lxml, single pass).
+
+    python bench_cleaners.py                     # generated pages of several sizes
+    python bench_cleaners.py --dir ./pages       # your own *.html files
+    python bench_cleaners.py --out report.json
+
+Prints ms/page and MB/s per cleaner, the speedup, and how many pages produced
+identical markdown.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import time
+
+from purecpp_websearch.websearch.cleaners import FastCleaner, SimpleCleaner
+
+
+def generated_pages():
+    """Synthetic news/doc pages: nav, scripts, articles, lists, tables, code."""
+    pages = {}
+    for sections in (5, 50, 400):
+        body = []
+        for i in range(sections):
+            body.append(
+                f"<div class='post' style='margin:0' onclick='track({i})'>"
+                f"<h2>Section {i}</h2><p>Paragraph with <a href='/p/{i}'>a link_{i}</a>, <b>bold</b>, "
+                f"<em>emphasis</em> and <code>inline*code</code>. " + "Lorem ipsum dolor sit amet. " * 6 + "</p>"
+                f"<ul><li>item one</li><li>item <i>two</i><ul><li>nested</li></ul></li></ul>"
+                f"<table><tr><th>k</th><th>v</th></tr><tr><td>{i}</td><td>value</td></tr></table>"
+                f"<pre>def f_{i}(x):\n    return x * {i}</pre>"
+                f"<script>window.dataLayer.push({{id: {i}}})</script><svg><path d='M0 0'/></svg></div>\n"
+            )
+        pages[f"generated-{sections}"] = (
+            "<!DOCTYPE html><html><head><title>Bench</title><style>.post{color:red}</style></head><body>"
+            "<nav><a href='/'>Home</a> <a href='/about'>About</a></nav><noscript>enable js</noscript>"
+            + "".join(body) + "</body></html>"
+        )
+    return pages
+
+
+def load_dir(path):
+    pages = {}
+    for file in sorted(glob.glob(os.path.join(path, "**", "*.htm*"), recursive=True)):
+        with open(file, encoding="utf-8", errors="replace") as f:
+            pages[os.path.relpath(file, path)] = f.read()
+    return pages
+
+
+def time_cleaner(cleaner, html, repeat):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cleaner.to_markdown(html, "text/html")
+        runs.append(time.perf_counter() - t0)
+    return statistics.median(runs)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--dir", help="directory of .html files (default: generated pages)")
+    p.add_argument("--repeat", type=int, default=5, help="runs per page (median is reported)")
+    p.add_argument("--out", help="write the JSON report here")
+    args = p.parse_args()
+
+    pages = load_dir(args.dir) if args.dir else generated_pages()
+    simple, fast = SimpleCleaner(), FastCleaner()
+
+    rows = []
+    for name, html in pages.items():
+        same = simple.to_markdown(html, "text/html") == fast.to_markdown(html, "text/html")
+        t_simple = time_cleaner(simple, html, args.repeat)
+        t_fast = time_cleaner(fast, html, args.repeat)
+        rows.append({"page": name, "bytes": len(html.encode("utf-8")), "simple_ms": t_simple * 1e3,
+                     "fast_ms": t_fast * 1e3, "speedup": t_simple / t_fast, "identical": same})
+
+    total_mb = sum(r["bytes"] for r in rows) / 1e6
+    total_simple = sum(r["simple_ms"] for r in rows) / 1e3
+    total_fast = sum(r["fast_ms"] for r in rows) / 1e3
+    summary = {
+        "pages": len(rows),
+        "identical": sum(r["identical"] for r in rows),
+        "simple_mb_s": total_mb / total_simple,
+        "fast_mb_s": total_mb / total_fast,
+        "speedup": total_simple / total_fast,
+        "median_page_speedup": statistics.median(r["speedup"] for r in rows),
+    }
+
+    if len(rows) <= 20:
+        print(f"{'page':<28}{'KB':>9}{'simple ms':>12}{'fast ms':>10}{'speedup':>9}  same")
+        for r in rows:
+            print(f"{r['page'][:27]:<28}{r['bytes'] / 1e3:>9.1f}{r['simple_ms']:>12.2f}{r['fast_ms']:>10.2f}"
+                  f"{r['speedup']:>8.1f}x  {'yes' if r['identical'] else 'NO'}")
+    print(f"\n{summary['pages']} pages, {summary['identical']} identical | "
+          f"simple {summary['simple_mb_s']:.2f} MB/s, fast {summary['fast_mb_s']:.2f} MB/s | "
+          f"speedup {summary['speedup']:.1f}x (median per page {summary['median_page_speedup']:.1f}x)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"summary": summary, "pages": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
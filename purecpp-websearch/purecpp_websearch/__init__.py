@@ -1,4 +1,4 @@
-from .websearch import WebSearch, Document, SearchResult, CleanerRouter, ICleaner
+from .websearch import WebSearch, AsyncWebSearch, Document, SearchResult, CleanerRouter, ICleaner
 
-__all__ = ["WebSearch", "Document", "SearchResult", "CleanerRouter", "ICleaner"]
+__all__ = ["WebSearch", "AsyncWebSearch", "Document", "SearchResult", "CleanerRouter", "ICleaner"]
 __version__ = "0.1.0"
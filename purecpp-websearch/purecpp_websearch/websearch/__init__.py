@@ -1,6 +1,7 @@
 from .pipeline import WebSearch
+from .async_pipeline import AsyncWebSearch
 from .schemas import Document, SearchResult
 from .router import CleanerRouter
 from .cleaners.base import ICleaner
 
-__all__ = ["WebSearch", "Document", "SearchResult", "CleanerRouter", "ICleaner"]
+__all__ = ["WebSearch", "AsyncWebSearch", "Document", "SearchResult", "CleanerRouter", "ICleaner"]
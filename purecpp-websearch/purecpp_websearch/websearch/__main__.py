@@ -1,6 +1,7 @@
 from __future__ import annotations
 import argparse
 from .pipeline import WebSearch
+from .settings import Settings
 
 def main(argv: list[str] | None = None) -> int:
     p = argparse.ArgumentParser("purecpp_websearch.websearch")
@@ -9,12 +10,18 @@ def main(argv: list[str] | None = None) -> int:
     p.add_argument("--q", dest="query", help="Query para busca")
     p.add_argument("--k", type=int, default=3)
     p.add_argument("--mime", default="text/html")
+    p.add_argument("--workers", type=int, default=None, help="páginas lidas em paralelo")
+    p.add_argument("--deadline", type=float, default=None, help="tempo máximo total de leitura (s)")
+    p.add_argument("--clean-processes", type=int, default=None, help="processos para limpeza do HTML")
     args = p.parse_args(argv)
 
-    ws = WebSearch(provider=args.provider, cleaner=args.cleaner)
+    settings = Settings.from_env()
+    if args.clean_processes is not None:
+        settings.clean_processes = args.clean_processes
+    ws = WebSearch(provider=args.provider, cleaner=args.cleaner, settings=settings)
     if not args.query:
         p.error("--q é obrigatório")
-    docs = ws.search_and_read(args.query, k=args.k, mime=args.mime)
+    docs = ws.search_and_read(args.query, k=args.k, mime=args.mime, workers=args.workers, deadline_s=args.deadline)
     for i, d in enumerate(docs, 1):
         print(f"# [{i}] {d.title or d.url}\n\n{d.content}\n\n---\n")
     return 0
@@ -0,0 +1,227 @@
+from __future__ import annotations
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Dict, Optional, Type
+
+from .schemas import Document, Documents, Results
+from .settings import Settings
+from .router import CleanerRouter
+from .fetchers.http_fetcher import AsyncHttpFetcher, open_cache
+from .http import build_async_client
+from .providers.brave import AsyncBraveProvider
+from .cleaners.base import ICleaner
+from .cleaners.pool import ProcessPoolCleaner
+from .output import build_search_response
+from .pipeline import _MarkdownCacheMixin
+
+
+class AsyncWebSearch(_MarkdownCacheMixin):
+    """Asyncio version of `WebSearch`: provider → fetch → cleaner.
+
+    Network I/O runs on one pooled `httpx.AsyncClient`; cleaners are CPU work
+    and run in `executor` (the loop's default executor when None), or in the
+    cleaner process pool when `settings.clean_processes` > 0, so they never
+    block the event loop. Cancelling a call cancels its pending fetches.
+    """
+
+    def __init__(self, provider: str = "brave", cleaner: str = "simple", settings: Settings | None = None,
+                 executor: Executor | None = None):
+        self.settings = settings or Settings.from_env()
+        self.cleaner_name = cleaner
+        self._executor = executor
+
+        self._providers: dict[str, Type[AsyncBraveProvider]] = {
+            "brave": AsyncBraveProvider,
+        }
+        # The cleaner first: an unknown name fails before anything needs closing
+        # (a cleaner pool only starts its processes on the first page).
+        self._cleaners = CleanerRouter()
+        self._cleaner: ICleaner = self._cleaners.create(cleaner, processes=self.settings.clean_processes)
+
+        self._client = self._provider = self._cache = None
+        try:
+            # One keep-alive pool shared by the provider and the fetcher
+            self._client = build_async_client(self.settings)
+            self._provider = self._providers[provider](self.settings, client=self._client)
+            self._cache = open_cache(self.settings)
+            self._fetcher = AsyncHttpFetcher(self.settings, client=self._client, cache=self._cache)
+        except Exception:
+            self._close_unused()
+            raise
+
+    def _close_unused(self) -> None:
+        """Synchronous cleanup for a failed __init__: nothing has used the client
+        yet, so it holds no connections and only the caches and processes need closing."""
+        if self._provider is not None and self._provider.cache is not None:
+            self._provider.cache.close()
+        if self._cache is not None:
+            self._cache.close()
+        if isinstance(self._cleaner, ProcessPoolCleaner):
+            self._cleaner.close()
+
+    async def aclose(self) -> None:
+        """Closes the pooled HTTP connections, the caches and the cleaner processes."""
+        await self._provider.aclose()
+        await self._client.aclose()
+        if self._cache is not None:
+            self._cache.close()
+        if isinstance(self._cleaner, ProcessPoolCleaner):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._cleaner.close)
+
+    async def __aenter__(self) -> "AsyncWebSearch":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def search(self, query: str, k: int = 5, **kwargs) -> Results:
+        return await self._provider.search(query, k=k, **kwargs)
+
+    async def read(self, url: str, *, mime: str = "text/html", deadline_s: Optional[float] = None) -> Document:
+        html = await self._fetcher.fetch_html(url, deadline_s=deadline_s)
+        loop = asyncio.get_running_loop()
+        # markdown cache lookups are SQLite I/O (and hash the page): keep them off the loop too
+        caching = self._cache is not None and self.settings.cache_markdown
+        md = await loop.run_in_executor(self._executor, self._cached_markdown, url, html, mime) if caching else None
+        if md is None:
+            if isinstance(self._cleaner, ProcessPoolCleaner):
+                md = await asyncio.wrap_future(self._cleaner.submit(html, mime))
+            else:
+                md = await loop.run_in_executor(self._executor, self._cleaner.to_markdown, html, mime)
+            if caching:
+                await loop.run_in_executor(self._executor, self._store_markdown, url, html, mime, md)
+        return Document(url=url, content=md, raw_html=html, mime=mime)
+
+    async def iter_read(
+        self,
+        results: Results,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+    ) -> AsyncIterator[Document]:
+        """Async `WebSearch.iter_read`: yields Documents (with `rank`) as their reads complete.
+
+        Closing the iterator early (or cancelling the consumer) cancels the
+        remaining reads; use `contextlib.aclosing` to close it promptly.
+        """
+        if not results:
+            return
+        workers = max(1, min(workers or self.settings.fetch_workers, len(results)))
+        if request_deadline_s is None:
+            request_deadline_s = self.settings.request_deadline_s
+        if deadline_s is None:
+            deadline_s = self.settings.read_deadline_s
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        slots = asyncio.Semaphore(workers)
+
+        async def read_one(url: str) -> Document:
+            async with slots:
+                return await self.read(url, mime=mime, deadline_s=request_deadline_s)
+
+        tasks = {asyncio.ensure_future(read_one(r.url)): rank for rank, r in enumerate(results)}
+        pending = set(tasks)
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    r = results[tasks[task]]
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        print(f"[AsyncWebSearch] Failed to read '{r.url}': {task.exception()}")
+                        continue
+                    doc = task.result()
+                    doc.title = r.title
+                    doc.rank = tasks[task]
+                    yield doc
+                if not done:  # overall deadline reached
+                    for task in pending:
+                        print(f"[AsyncWebSearch] Deadline reached before reading '{results[tasks[task]].url}'")
+                    break
+        finally:
+            # also runs when the caller is cancelled
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def read_many(
+        self,
+        results: Results,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+    ) -> Documents:
+        """Async `WebSearch.read_many`: concurrent reads, rank order, partial results at the deadline."""
+        docs = [doc async for doc in self.iter_read(results, mime=mime, workers=workers,
+                                                    request_deadline_s=request_deadline_s,
+                                                    deadline_s=deadline_s)]
+        return sorted(docs, key=lambda d: d.rank)
+
+    async def search_and_read(
+        self,
+        query: str,
+        k: int = 3,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+        **kwargs,
+    ) -> Documents:
+        results = await self.search(query, k=k, **kwargs)
+        return await self.read_many(results, mime=mime, workers=workers,
+                                    request_deadline_s=request_deadline_s, deadline_s=deadline_s)
+
+    async def iter_search_and_read(
+        self,
+        query: str,
+        k: int = 3,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncIterator[Document]:
+        """Like `search_and_read`, but yields each Document (tagged with its rank) as soon as it is read."""
+        results = await self.search(query, k=k, **kwargs)
+        async for doc in self.iter_read(results, mime=mime, workers=workers,
+                                        request_deadline_s=request_deadline_s, deadline_s=deadline_s):
+            yield doc
+
+    async def search_and_read_structured(
+        self,
+        query: str,
+        k: int = 3,
+        *,
+        mime: str = "text/html",
+        include_raw_html: bool = False,
+        schema: str = "langchain",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """Async `WebSearch.search_and_read_structured` (same payload)."""
+        results = await self.search(query, k=k, **kwargs)
+        docs = await self.read_many(results, mime=mime, workers=workers,
+                                    request_deadline_s=request_deadline_s, deadline_s=deadline_s)
+        params: Dict[str, Any] = {"k": k, "mime": mime}
+        params.update(kwargs or {})
+        return build_search_response(
+            query=query,
+            provider=getattr(self._provider, "name", type(self._provider).__name__),
+            params=params,
+            results=results,
+            documents=docs,
+            include_raw_html=include_raw_html,
+            schema=schema,
+        )
@@ -0,0 +1,419 @@
+from __future__ import annotations
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Response headers kept with a cached page (everything revalidation needs).
+_KEPT_HEADERS = ("cache-control", "content-type", "date", "etag", "expires", "last-modified")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_DIRECTIVE_RE = re.compile(r"([a-z-]+)\s*(?:=\s*\"?([^\",]*)\"?)?")
+_HEURISTIC_MAX_S = 24 * 3600.0
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def canonical_url(url: str) -> str:
+    """Cache key for `url`: lowercase scheme/host, no default port, no fragment, sorted query."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    return {m.group(1): m.group(2) for m in _DIRECTIVE_RE.finditer((value or "").lower())}
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness_lifetime(headers: Dict[str, str], default_ttl_s: float = 0.0) -> Optional[float]:
+    """Seconds a response stays fresh (RFC 9111), or None when it must not be stored."""
+    cc = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in cc:
+        return None
+    if "no-cache" in cc:
+        return 0.0
+    for directive in ("s-maxage", "max-age"):
+        if cc.get(directive):
+            try:
+                return max(0.0, float(cc[directive]))
+            except ValueError:
+                pass
+    expires = _http_date(headers.get("expires"))
+    if expires is not None:
+        return max(0.0, expires - (_http_date(headers.get("date")) or time.time()))
+    last_modified = _http_date(headers.get("last-modified"))
+    if last_modified is not None:
+        # heuristic freshness: 10% of the document's age, capped
+        age = (_http_date(headers.get("date")) or time.time()) - last_modified
+        return min(max(0.0, age * 0.1), _HEURISTIC_MAX_S)
+    return default_ttl_s
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: str
+    headers: Dict[str, str]
+    stored_at: float
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since for revalidating this page."""
+        h: Dict[str, str] = {}
+        if self.headers.get("etag"):
+            h["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            h["If-Modified-Since"] = self.headers["last-modified"]
+        return h
+
+
+class HttpCache:
+    """On-disk cache of fetched pages (body + headers keyed by canonical URL).
+
+    Freshness follows Cache-Control / Expires (Last-Modified heuristic
+    otherwise); stale pages with an ETag or Last-Modified are revalidated with
+    a conditional request, so an unchanged page costs a 304. Cleaned markdown
+    can be stored per cleaner next to the page, tied to the exact body it was
+    produced from. SQLite in WAL mode, shareable between processes; least
+    recently used pages are evicted above `max_bytes`.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 512 * 1024 ** 2, default_ttl_s: float = 0.0):
+        """
+        Args:
+            path: SQLite file (its directory is created).
+            max_bytes: Size cap of stored bodies + markdown.
+            default_ttl_s: Freshness of responses without any caching headers.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.default_ttl_s = default_ttl_s
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS pages (
+                key        TEXT PRIMARY KEY,
+                url        TEXT NOT NULL,
+                headers    TEXT NOT NULL,
+                body       TEXT NOT NULL,
+                stored_at  REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                atime      REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS pages_atime ON pages(atime);
+            CREATE TABLE IF NOT EXISTS markdown (
+                key       TEXT NOT NULL,
+                cleaner   TEXT NOT NULL,
+                body_hash TEXT NOT NULL,
+                content   TEXT NOT NULL,
+                PRIMARY KEY (key, cleaner)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+            INSERT OR IGNORE INTO cache_size (id, bytes) VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS pages_add AFTER INSERT ON pages
+                BEGIN UPDATE cache_size SET bytes = bytes + length(CAST(NEW.body AS BLOB)) WHERE id = 0; END;
+            CREATE TRIGGER IF NOT EXISTS pages_del AFTER DELETE ON pages
+                BEGIN UPDATE cache_size SET bytes = bytes - length(CAST(OLD.body AS BLOB)) WHERE id = 0;
+                      DELETE FROM markdown WHERE key = OLD.key; END;
+            CREATE TRIGGER IF NOT EXISTS markdown_add AFTER INSERT ON markdown
+                BEGIN UPDATE cache_size SET bytes = bytes + length(CAST(NEW.content AS BLOB)) WHERE id = 0; END;
+            CREATE TRIGGER IF NOT EXISTS markdown_del AFTER DELETE ON markdown
+                BEGIN UPDATE cache_size SET bytes = bytes - length(CAST(OLD.content AS BLOB)) WHERE id = 0; END;
+        """)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        key = canonical_url(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, headers, body, stored_at, expires_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE pages SET atime = ? WHERE key = ?", (time.time(), key))
+        return CachedPage(url=row[0], headers=json.loads(row[1]), body=row[2], stored_at=row[3], expires_at=row[4])
+
+    def put(self, url: str, body: str, headers: Any) -> Optional[CachedPage]:
+        """Stores a 200 response if it is cacheable; returns the entry."""
+        kept = {name: headers[name] for name in _KEPT_HEADERS if headers.get(name)}
+        lifetime = freshness_lifetime(kept, self.default_ttl_s)
+        if lifetime is None or (lifetime == 0 and "etag" not in kept and "last-modified" not in kept):
+            return None  # no-store, or nothing that could ever be served or revalidated
+        now = time.time()
+        page = CachedPage(url=url, body=body, headers=kept, stored_at=now, expires_at=now + lifetime)
+        key = canonical_url(url)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # delete + insert (not REPLACE) so the size triggers and markdown cleanup fire
+                self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._db.execute(
+                    "INSERT INTO pages (key, url, headers, body, stored_at, expires_at, atime) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, url, json.dumps(kept), body, now, page.expires_at, now),
+                )
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return page
+
+    def revalidated(self, page: CachedPage, headers: Any) -> CachedPage:
+        """Refreshes a stored page after a 304, merging the new caching headers."""
+        merged = dict(page.headers)
+        merged.update({name: headers[name] for name in _KEPT_HEADERS if headers.get(name)})
+        lifetime = freshness_lifetime(merged, self.default_ttl_s) or 0.0
+        now = time.time()
+        page = CachedPage(url=page.url, body=page.body, headers=merged, stored_at=now, expires_at=now + lifetime)
+        with self._lock:
+            self._db.execute(
+                "UPDATE pages SET headers = ?, stored_at = ?, expires_at = ?, atime = ? WHERE key = ?",
+                (json.dumps(merged), now, page.expires_at, now, canonical_url(page.url)),
+            )
+        return page
+
+    @staticmethod
+    def body_hash(body: str) -> str:
+        return hashlib.sha1(body.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get_markdown(self, url: str, cleaner: str, body: str) -> Optional[str]:
+        """Markdown `cleaner` produced from exactly this `body` of `url`, if cached."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content FROM markdown WHERE key = ? AND cleaner = ? AND body_hash = ?",
+                (canonical_url(url), cleaner, self.body_hash(body)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_markdown(self, url: str, cleaner: str, body: str, content: str) -> None:
+        key = canonical_url(url)
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # only while the page itself is cached (its delete trigger drops the markdown)
+                if self._db.execute("SELECT 1 FROM pages WHERE key = ?", (key,)).fetchone():
+                    self._db.execute("DELETE FROM markdown WHERE key = ? AND cleaner = ?", (key, cleaner))
+                    self._db.execute(
+                        "INSERT INTO markdown (key, cleaner, body_hash, content) VALUES (?, ?, ?, ?)",
+                        (key, cleaner, self.body_hash(body), content),
+                    )
+                    self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        size = self._db.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        if size <= self.max_bytes:
+            return
+        # drop to 90% of the cap so eviction does not run on every insert
+        target = int(self.max_bytes * 0.9)
+        for key, body_len in self._db.execute("SELECT key, length(CAST(body AS BLOB)) FROM pages ORDER BY atime").fetchall():
+            if size <= target:
+                break
+            md_len = self._db.execute(
+                "SELECT COALESCE(SUM(length(CAST(content AS BLOB))), 0) FROM markdown WHERE key = ?", (key,)
+            ).fetchone()[0]
+            self._db.execute("DELETE FROM pages WHERE key = ?", (key,))
+            size -= body_len + md_len
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            markdown = self._db.execute("SELECT COUNT(*) FROM markdown").fetchone()[0]
+            size = self._db.execute("SELECT bytes FROM cache_size WHERE id = 0").fetchone()[0]
+        return {"pages": pages, "markdown": markdown, "bytes": size}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM pages")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def normalize_query(query: str) -> str:
+    """NFKC, casefolded, collapsed whitespace: near-identical queries share a cache entry."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", query)).strip().casefold()
+
+
+class SearchCache:
+    """TTL cache of provider results keyed by normalized query + effective params.
+
+    Entries live in an in-memory LRU and, with `path`, in SQLite so they
+    survive restarts and are shared between processes. Concurrent lookups of
+    the same key are coalesced: one caller runs the upstream request and the
+    others wait for its result (`get_or_compute` for threads,
+    `aget_or_compute` for asyncio).
+    """
+
+    def __init__(self, ttl_s: float = 600.0, max_items: int = 1024, path: Optional[str] = None):
+        self.ttl_s = ttl_s
+        self.max_items = max_items
+        self._memory: "OrderedDict[str, Tuple[float, list]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._inflight: Dict[str, Future] = {}
+        self._ainflight: Dict[str, asyncio.Task] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.executescript("""
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                CREATE TABLE IF NOT EXISTS search_results (
+                    key        TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL,
+                    payload    TEXT NOT NULL
+                ) WITHOUT ROWID;
+            """)
+
+    @classmethod
+    def from_settings(cls, settings) -> Optional["SearchCache"]:
+        if settings.search_cache_ttl_s <= 0:
+            return None
+        return cls(ttl_s=settings.search_cache_ttl_s, max_items=settings.search_cache_size,
+                   path=settings.search_cache_path)
+
+    @staticmethod
+    def make_key(provider: str, params: Dict[str, Any], query_param: str = "q") -> str:
+        params = dict(params)
+        if query_param in params:
+            params[query_param] = normalize_query(str(params[query_param]))
+        raw = json.dumps([provider, sorted(params.items())], ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[list]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    return entry[1]
+                del self._memory[key]
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT expires_at, payload FROM search_results WHERE key = ?", (key,)).fetchone()
+            if row is None or row[0] <= now:
+                return None
+            results = self._decode(row[1])
+            self._remember(key, row[0], results)
+            return results
+
+    def put(self, key: str, results: list) -> None:
+        expires_at = time.time() + self.ttl_s
+        with self._lock:
+            self._remember(key, expires_at, results)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO search_results (key, expires_at, payload) VALUES (?, ?, ?)",
+                                 (key, expires_at, self._encode(results)))
+                self._db.execute("DELETE FROM search_results WHERE expires_at <= ?", (time.time(),))
+
+    def _remember(self, key: str, expires_at: float, results: list) -> None:
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _encode(results: list) -> str:
+        return json.dumps([asdict(r) for r in results], ensure_ascii=False, default=str)
+
+    @staticmethod
+    def _decode(payload: str) -> list:
+        from .schemas import SearchResult
+        return [SearchResult(**item) for item in json.loads(payload)]
+
+    @staticmethod
+    def _copy(results: list) -> list:
+        # deep: callers may edit `metadata` (nested provider payload) without touching the cache
+        return copy.deepcopy(results)
+
+    def get_or_compute(self, key: str, compute: Callable[[], list]) -> list:
+        """Cached results for `key`, or the result of `compute()`, run once across concurrent callers."""
+        with self._lock:
+            hit = self.get(key)
+            if hit is not None:
+                return self._copy(hit)
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return self._copy(future.result())
+        try:
+            results = compute()
+            self.put(key, results)
+            future.set_result(results)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return self._copy(results)
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[list]]) -> list:
+        """Async `get_or_compute`; the upstream request survives the cancellation of any one waiter.
+
+        Lookups and stores (SQLite with `path`) run in a worker thread.
+        """
+        hit = await asyncio.to_thread(self.get, key)
+        if hit is not None:
+            return self._copy(hit)
+        task = self._ainflight.get(key)
+        if task is None:
+            async def run() -> list:
+                try:
+                    results = await compute()
+                    await asyncio.to_thread(self.put, key, results)
+                    return results
+                finally:
+                    self._ainflight.pop(key, None)
+            task = self._ainflight[key] = asyncio.ensure_future(run())
+        return self._copy(await asyncio.shield(task))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM search_results")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from .base import ICleaner
 from .simple import SimpleCleaner
+from .fast import FastCleaner
+from .pool import ProcessPoolCleaner
 
 try:
     from .readability import ReadabilityCleaner  
 except Exception: 
     ReadabilityCleaner = None 
 
-__all__ = ["ICleaner", "SimpleCleaner", "ReadabilityCleaner"]
+__all__ = ["ICleaner", "SimpleCleaner", "FastCleaner", "ReadabilityCleaner", "ProcessPoolCleaner"]
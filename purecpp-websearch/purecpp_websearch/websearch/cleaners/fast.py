@@ -0,0 +1,432 @@
+from __future__ import annotations
+import re
+from typing import List, Optional, Union
+
+from ..exceptions import UnsupportedMimeError, DependencyNotInstalled
+from ..mimes import Mime
+from ..utils import normalize_whitespace
+from .base import ICleaner
+
+try:
+    from lxml import etree  # type: ignore
+except Exception as e:
+    etree = None  # type: ignore
+    _lxml_error: Optional[Exception] = e
+else:
+    _lxml_error = None
+
+
+# Same noisy subtrees SimpleCleaner decomposes.
+_DROP = frozenset({"script", "style", "noscript", "iframe", "template", "svg"})
+
+# Block elements whose inner/outer whitespace is dropped (markdownify rules).
+_WS_INSIDE = frozenset({
+    "p", "blockquote", "article", "div", "section", "ol", "ul", "li", "dl", "dt", "dd",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th",
+})
+_NOFORMAT_TAGS = frozenset({"pre", "code", "kbd", "samp"})
+
+_HEADING_RE = re.compile(r"h(\d+)")
+_LINE_RE = re.compile(r"^(.*)", flags=re.MULTILINE)
+_WS_RE = re.compile(r"[\t ]+")
+_ALL_WS_RE = re.compile(r"[\t \r\n]+")
+_NEWLINE_WS_RE = re.compile(r"[\t \r\n]*[\r\n][\t \r\n]*")
+_PRE_LSTRIP_RE = re.compile(r"^[ \n]*\n")
+_PRE_RSTRIP_RE = re.compile(r"[ \n]*$")
+_EXTRACT_NL_RE = re.compile(r"^(\n*)((?:.*[^\n])?)(\n*)$", flags=re.DOTALL)
+_BACKTICKS_RE = re.compile(r"`+")
+_XML_DECL_RE = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+# Context flags passed down the traversal (what markdownify keeps in `parent_tags`).
+_INLINE, _NOFORMAT, _PRE, _LI = 1, 2, 4, 8
+
+_Item = Union[str, "etree._Element"]
+
+
+def _heading_level(tag: str) -> int:
+    m = _HEADING_RE.match(tag)
+    return int(m.group(1)) if m else 0
+
+
+def _ws_inside(tag: str) -> bool:
+    return tag in _WS_INSIDE or _heading_level(tag) > 0
+
+
+def _ws_outside(item: Optional[_Item]) -> bool:
+    if item is None or isinstance(item, str):
+        return False
+    return item.tag == "pre" or _ws_inside(item.tag)
+
+
+def _chomp(text: str):
+    prefix = " " if text and text[0] == " " else ""
+    suffix = " " if text and text[-1] == " " else ""
+    return prefix, suffix, text.strip()
+
+
+def _children(el) -> List[_Item]:
+    """Text and child elements in document order, dropped subtrees removed.
+
+    Text around a dropped subtree is merged, as if the cleaned page had been
+    serialized and parsed again (what SimpleCleaner does).
+    """
+    items: List[_Item] = []
+    if el.text:
+        items.append(el.text)
+    for child in el:
+        tag = child.tag
+        if isinstance(tag, str) and tag not in _DROP:
+            items.append(child)
+        tail = child.tail
+        if tail:
+            if items and isinstance(items[-1], str):
+                items[-1] += tail
+            else:
+                items.append(tail)
+    return items
+
+
+def _prev_element(el):
+    for sib in el.itersiblings(preceding=True):
+        if isinstance(sib.tag, str) and sib.tag not in _DROP:
+            return sib
+    return None
+
+
+def _colspan(el) -> int:
+    value = el.get("colspan")
+    if value and value.isdigit():
+        return max(1, min(1000, int(value)))
+    return 1
+
+
+class _MarkdownWriter:
+    """Emits markdown for an lxml tree in one recursive traversal.
+
+    Follows markdownify's default conversion rules (underlined h1/h2,
+    `*` for emphasis, escaped `*` and `_`, `  \\n` line breaks) so the output
+    matches `SimpleCleaner`, without building a BeautifulSoup tree.
+    """
+
+    def convert(self, root) -> str:
+        return self._tag(root, root.tag, 0, None).strip("\n")
+
+    # --- traversal ---------------------------------------------------------
+    def _text(self, text: str, prev: Optional[_Item], nxt: Optional[_Item], inside: bool, flags: int) -> str:
+        if not flags & _PRE:
+            text = _NEWLINE_WS_RE.sub("\n", text)
+            text = _WS_RE.sub(" ", text)
+        if not flags & _NOFORMAT:
+            text = text.replace("*", r"\*").replace("_", r"\_")
+        if _ws_outside(prev) or (inside and prev is None):
+            text = text.lstrip(" \t\r\n")
+        if _ws_outside(nxt) or (inside and nxt is None):
+            text = text.rstrip()
+        return text
+
+    def _tag(self, el, tag: str, flags: int, next_content: Optional[_Item]) -> str:
+        items = _children(el)
+        inside = _ws_inside(tag)
+        level = _heading_level(tag)
+
+        child_flags = flags
+        if level or tag in ("td", "th"):
+            child_flags |= _INLINE
+        if tag in _NOFORMAT_TAGS:
+            child_flags |= _NOFORMAT
+        if tag == "pre":
+            child_flags |= _PRE
+        elif tag == "li":
+            child_flags |= _LI
+
+        strings = []
+        last = len(items) - 1
+        for i, item in enumerate(items):
+            prev = items[i - 1] if i > 0 else None
+            nxt = items[i + 1] if i < last else None
+            if isinstance(item, str):
+                if not item.strip():
+                    if inside and (prev is None or nxt is None):
+                        continue
+                    if _ws_outside(prev) or _ws_outside(nxt):
+                        continue
+                s = self._text(item, prev, nxt, inside, child_flags)
+            else:
+                after = None
+                if item.tag in ("ul", "ol"):
+                    after = next((n for n in items[i + 1:] if not isinstance(n, str) or n.strip()), None)
+                s = self._tag(item, item.tag, child_flags, after)
+            if s:
+                strings.append(s)
+
+        if tag == "pre" or flags & _PRE:
+            text = "".join(strings)
+        else:
+            # collapse newlines at child boundaries (max 2)
+            out = [""]
+            for s in strings:
+                lead, content, trail = _EXTRACT_NL_RE.match(s).groups()
+                if out[-1] and lead:
+                    prev_trail = out.pop()
+                    lead = "\n" * min(2, max(len(prev_trail), len(lead)))
+                out.extend((lead, content, trail))
+            text = "".join(out)
+
+        if level:
+            return self._heading(level, text, flags)
+        convert = self._converters.get(tag)
+        return convert(self, el, text, flags, next_content) if convert else text
+
+    # --- converters (el, text, flags of the ancestors, next content sibling) ---
+    @staticmethod
+    def _inline(mark: str):
+        def convert(self, el, text, flags, next_content):
+            if flags & _NOFORMAT:
+                return text
+            prefix, suffix, text = _chomp(text)
+            return f"{prefix}{mark}{text}{mark}{suffix}" if text else ""
+        return convert
+
+    def _a(self, el, text, flags, next_content):
+        if flags & _NOFORMAT:
+            return text
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ""
+        href = el.get("href")
+        title = el.get("title")
+        if text.replace(r"\_", "_") == href and not title:
+            return "<%s>" % href
+        title_part = ' "%s"' % title.replace('"', r"\"") if title else ""
+        return "%s[%s](%s%s)%s" % (prefix, text, href, title_part, suffix) if href else text
+
+    def _blockquote(self, el, text, flags, next_content):
+        text = text.strip(" \t\r\n")
+        if flags & _INLINE:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        text = _LINE_RE.sub(lambda m: "> " + m.group(1) if m.group(1) else ">", text)
+        return "\n" + text + "\n\n"
+
+    def _br(self, el, text, flags, next_content):
+        if flags & _INLINE:
+            return text + " " if text else " "
+        return "  \n" + text
+
+    def _code(self, el, text, flags, next_content):
+        if flags & _NOFORMAT:
+            return text
+        prefix, suffix, text = _chomp(text)
+        if not text:
+            return ""
+        ticks = max((len(m) for m in _BACKTICKS_RE.findall(text)), default=0)
+        delimiter = "`" * (ticks + 1)
+        if ticks > 0:
+            text = " " + text + " "
+        return f"{prefix}{delimiter}{text}{delimiter}{suffix}"
+
+    def _div(self, el, text, flags, next_content):
+        if flags & _INLINE:
+            return " " + text.strip() + " "
+        text = text.strip()
+        return "\n\n%s\n\n" % text if text else ""
+
+    def _dd(self, el, text, flags, next_content):
+        text = text.strip()
+        if flags & _INLINE:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        text = _LINE_RE.sub(lambda m: "    " + m.group(1) if m.group(1) else "", text)
+        return ":" + text[1:] + "\n"
+
+    def _dt(self, el, text, flags, next_content):
+        text = _ALL_WS_RE.sub(" ", text.strip())
+        if flags & _INLINE:
+            return " " + text + " "
+        if not text:
+            return "\n"
+        return "\n\n%s\n" % text
+
+    def _heading(self, n, text, flags):
+        if flags & _INLINE:
+            return text
+        n = max(1, min(6, n))
+        text = text.strip()
+        if n <= 2:
+            return "\n\n%s\n%s\n\n" % (text, ("=" if n == 1 else "-") * len(text)) if text else ""
+        return "\n\n%s %s\n\n" % ("#" * n, _ALL_WS_RE.sub(" ", text))
+
+    def _hr(self, el, text, flags, next_content):
+        return "\n\n---\n\n"
+
+    def _img(self, el, text, flags, next_content):
+        alt = el.get("alt") or ""
+        if flags & _INLINE:
+            return alt
+        src = el.get("src") or ""
+        title = el.get("title") or ""
+        title_part = ' "%s"' % title.replace('"', r"\"") if title else ""
+        return "![%s](%s%s)" % (alt, src, title_part)
+
+    def _video(self, el, text, flags, next_content):
+        if flags & _INLINE:
+            return text
+        src = el.get("src") or ""
+        if not src:
+            source = next((s for s in el.iter("source") if s.get("src") is not None), None)
+            if source is not None:
+                src = source.get("src") or ""
+        poster = el.get("poster") or ""
+        if src and poster:
+            return "[![%s](%s)](%s)" % (text, poster, src)
+        if src:
+            return "[%s](%s)" % (text, src)
+        if poster:
+            return "![%s](%s)" % (text, poster)
+        return text
+
+    def _list(self, el, text, flags, next_content):
+        if flags & _LI:
+            return "\n" + text.rstrip()
+        before_paragraph = next_content is not None and (
+            isinstance(next_content, str) or next_content.tag not in ("ul", "ol"))
+        return "\n\n" + text + ("\n" if before_paragraph else "")
+
+    def _li(self, el, text, flags, next_content):
+        text = text.strip()
+        if not text:
+            return "\n"
+        parent = el.getparent()
+        if parent is not None and parent.tag == "ol":
+            start = parent.get("start")
+            start = int(start) if start and start.isnumeric() else 1
+            bullet = "%s." % (start + sum(1 for _ in el.itersiblings("li", preceding=True)))
+        else:
+            depth = sum(1 for _ in el.iterancestors("ul")) - 1
+            bullet = "*+-"[depth % 3]
+        bullet += " "
+        indent = " " * len(bullet)
+        text = _LINE_RE.sub(lambda m: indent + m.group(1) if m.group(1) else "", text)
+        return "%s%s\n" % (bullet, text[len(bullet):])
+
+    def _p(self, el, text, flags, next_content):
+        if flags & _INLINE:
+            return " " + text.strip(" \t\r\n") + " "
+        text = text.strip(" \t\r\n")
+        return "\n\n%s\n\n" % text if text else ""
+
+    def _pre(self, el, text, flags, next_content):
+        if not text:
+            return ""
+        text = _PRE_RSTRIP_RE.sub("", _PRE_LSTRIP_RE.sub("", text))
+        return "\n\n```\n%s\n```\n\n" % text
+
+    def _q(self, el, text, flags, next_content):
+        return '"' + text + '"'
+
+    def _table(self, el, text, flags, next_content):
+        return "\n\n" + text.strip() + "\n\n"
+
+    def _caption(self, el, text, flags, next_content):
+        return text.strip() + "\n\n"
+
+    def _figcaption(self, el, text, flags, next_content):
+        return "\n\n" + text.strip() + "\n\n"
+
+    def _cell(self, el, text, flags, next_content):
+        return " " + text.strip().replace("\n", " ") + " |" * _colspan(el)
+
+    def _tr(self, el, text, flags, next_content):
+        parent = el.getparent()
+        cells = [c for c in el.iterdescendants("td", "th")]
+        is_first_row = _prev_element(el) is None
+        is_headrow = all(c.tag == "th" for c in cells) or (
+            parent.tag == "thead" and sum(1 for _ in parent.iterdescendants("tr")) == 1)
+        is_head_row_missing = (
+            (is_first_row and parent.tag != "tbody")
+            or (is_first_row and parent.tag == "tbody"
+                and next(parent.getparent().iterdescendants("thead"), None) is None)
+        )
+        width = sum(_colspan(c) for c in cells)
+        overline = underline = ""
+        if is_headrow and is_first_row:
+            underline = "| " + " | ".join(["---"] * width) + " |\n"
+        elif is_head_row_missing or (is_first_row and (
+                parent.tag == "table" or (parent.tag == "tbody" and _prev_element(parent) is None))):
+            overline = "| " + " | ".join([""] * width) + " |\n"
+            overline += "| " + " | ".join(["---"] * width) + " |\n"
+        return overline + "|" + text + "\n" + underline
+
+    _converters = {
+        "a": _a,
+        "b": _inline("**"), "strong": _inline("**"),
+        "em": _inline("*"), "i": _inline("*"),
+        "del": _inline("~~"), "s": _inline("~~"),
+        "sub": _inline(""), "sup": _inline(""),
+        "blockquote": _blockquote,
+        "br": _br,
+        "code": _code, "kbd": _code, "samp": _code,
+        "div": _div, "article": _div, "section": _div, "dl": _div,
+        "dd": _dd,
+        "dt": _dt,
+        "hr": _hr,
+        "img": _img,
+        "video": _video,
+        "ul": _list, "ol": _list,
+        "li": _li,
+        "p": _p,
+        "pre": _pre,
+        "q": _q,
+        "table": _table,
+        "caption": _caption,
+        "figcaption": _figcaption,
+        "td": _cell, "th": _cell,
+        "tr": _tr,
+    }
+
+
+class FastCleaner(ICleaner):
+    """
+    **lxml converter**, a faster drop-in for `SimpleCleaner`:
+
+    * Parses once with lxml (C), skips script/style/noscript/iframe/template/svg
+      subtrees and writes the Markdown in the same traversal, instead of
+      html.parser + attribute stripping + serialize + markdownify reparse.
+    * Output matches `SimpleCleaner` on well-formed pages; malformed markup
+      can nest differently, since lxml repairs it the way browsers do.
+
+    Requires:
+
+    lxml
+    """
+
+    def __init__(self) -> None:
+        if etree is None:
+            raise DependencyNotInstalled(f"Install 'lxml' to use FastCleaner: {_lxml_error}")
+        self._parser = etree.HTMLParser(remove_comments=True, remove_pis=True)
+        self._writer = _MarkdownWriter()
+
+    def to_markdown(self, html: str, mime: str) -> str:
+        m = Mime.from_string(mime)
+        if m is None:
+            treat_as_html = "<" in html and ">" in html
+        else:
+            treat_as_html = m in {
+                Mime.TEXT_HTML,
+                Mime.APPLICATION_XHTML,
+                Mime.APPLICATION_XML,
+            }
+
+        if treat_as_html:
+            # lxml rejects str input that declares an encoding
+            root = etree.fromstring(_XML_DECL_RE.sub("", html, count=1), self._parser)
+            if root is None:
+                return ""
+            return normalize_whitespace(self._writer.convert(root))
+
+        if m is None or m == Mime.TEXT_PLAIN:
+            return normalize_whitespace(html)
+
+        raise UnsupportedMimeError(f"MIME type not supported: {mime}")
@@ -0,0 +1,62 @@
+from __future__ import annotations
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Type
+
+from .base import ICleaner
+
+# One cleaner instance per worker process, built by the pool initializer.
+_worker_cleaner: Optional[ICleaner] = None
+
+
+def _init_worker(cleaner_cls: Type[ICleaner]) -> None:
+    global _worker_cleaner
+    _worker_cleaner = cleaner_cls()
+
+
+def _clean(html: str, mime: str) -> str:
+    return _worker_cleaner.to_markdown(html, mime)  # type: ignore[union-attr]
+
+
+class ProcessPoolCleaner(ICleaner):
+    """
+    Runs another cleaner in a pool of worker processes.
+
+    BeautifulSoup/markdownify/readability are pure-Python CPU work, so
+    cleaning in threads serializes on the GIL. Here each worker builds its
+    own `cleaner_cls()` once; only the HTML string goes in and the markdown
+    string comes back. `to_markdown` blocks the calling thread (not the GIL)
+    until the result arrives; `submit` returns the Future instead, e.g. for
+    `asyncio.wrap_future`.
+
+    Workers are started with "spawn" by default (the pipeline already runs
+    threads, which do not mix with fork), so `cleaner_cls` must be importable
+    at module level. Call `close()` to stop the workers.
+    """
+
+    def __init__(self, cleaner_cls: Type[ICleaner], workers: Optional[int] = None, mp_context=None):
+        if not issubclass(cleaner_cls, ICleaner):
+            raise TypeError(f"{cleaner_cls!r} **is not a subclass of ICleaner**")
+        cleaner_cls()  # missing optional dependencies fail here, not inside the workers
+        self.cleaner_cls = cleaner_cls
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=mp_context or multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(cleaner_cls,),
+        )
+
+    def submit(self, html: str, mime: str) -> "Future[str]":
+        return self._pool.submit(_clean, html, mime)
+
+    def to_markdown(self, html: str, mime: str) -> str:
+        return self.submit(html, mime).result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "ProcessPoolCleaner":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -23,6 +23,10 @@ class ProviderError(WebSearchError):
     """Failed to query the search provider."""
 
 
+class RateLimitError(ProviderError):
+    """Provider rate limit or quota exhausted for longer than we may wait."""
+
+
 class FetchError(WebSearchError):
     """Failed to download HTML content."""
 
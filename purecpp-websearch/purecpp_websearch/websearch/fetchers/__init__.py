@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from .http_fetcher import HttpFetcher
+from .http_fetcher import AsyncHttpFetcher, HttpFetcher
 
 DefaultFetcher = HttpFetcher
 
-__all__ = ["HttpFetcher", "DefaultFetcher"]
+__all__ = ["HttpFetcher", "AsyncHttpFetcher", "DefaultFetcher"]
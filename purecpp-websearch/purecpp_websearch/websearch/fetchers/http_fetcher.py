@@ -1,11 +1,172 @@
-from ..http import HttpClient
+from __future__ import annotations
+import asyncio
+import codecs
+import threading
+import time
+import httpx
+
+from ..cache import HttpCache
+from ..exceptions import FetchError, UnsupportedMimeError
+from ..http import AsyncHttpClient, HttpClient
+from ..mimes import Mime
 from ..settings import Settings
 
+# Magic numbers of binary formats often served as application/octet-stream.
+_BINARY_MAGIC = (b"%PDF", b"PK\x03\x04", b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"\x1f\x8b", b"RIFF")
+_GENERIC_TYPES = ("", "application/octet-stream", "binary/octet-stream")
+
+def _client_kwargs(settings: Settings) -> dict:
+    return dict(
+        timeout=settings.timeout_s,
+        retries=settings.retries,
+        headers={"User-Agent": settings.user_agent},
+        max_connections=settings.max_connections,
+        max_keepalive=settings.max_keepalive,
+        keepalive_expiry_s=settings.keepalive_expiry_s,
+        http2=settings.http2,
+        backoff_base_s=settings.backoff_base_s,
+        backoff_max_s=settings.backoff_max_s,
+        max_retry_after_s=settings.rate_limit_max_wait_s,
+    )
+
+def open_cache(settings: Settings) -> HttpCache | None:
+    if not settings.http_cache_path:
+        return None
+    return HttpCache(settings.http_cache_path, max_bytes=settings.http_cache_max_mb * 1024 ** 2,
+                     default_ttl_s=settings.http_cache_default_ttl_s)
+
+def _check_content_type(url: str, response: httpx.Response) -> None:
+    """Rejects a response by its Content-Type before any of the body is read."""
+    ctype = response.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if ctype in _GENERIC_TYPES or Mime.from_string(ctype) is not None:
+        return
+    if ctype.startswith("text/") or ctype.endswith("+xml"):
+        return
+    raise UnsupportedMimeError(f"MIME type not supported: {ctype} ({url})")
+
+
+class _BodyReader:
+    """Decodes a streamed body chunk by chunk, up to `max_bytes` (0 = no cap).
+
+    Bodies with a generic or missing Content-Type are sniffed on the first
+    chunk, so a PDF or image is dropped after a few KB instead of downloaded.
+    Past the cap the download stops and the page is kept truncated; once
+    `cancel` is set the download is abandoned (FetchError).
+    """
+
+    def __init__(self, url: str, response: httpx.Response, max_bytes: int, deadline: float | None,
+                 cancel: threading.Event | None = None):
+        self._url = url
+        self._max_bytes = max_bytes
+        self._deadline = deadline
+        self._cancel = cancel
+        self._sniff = response.headers.get("content-type", "").split(";", 1)[0].strip().lower() in _GENERIC_TYPES
+        encoding = response.charset_encoding or "utf-8"
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._parts: list[str] = []
+        self.size = 0
+        self.truncated = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """Adds a chunk; False once the body is complete enough (cap reached)."""
+        if self._sniff:
+            self._sniff = False
+            head = chunk[:512]
+            if head.startswith(_BINARY_MAGIC) or b"\x00" in head:
+                raise UnsupportedMimeError(f"binary content: {self._url}")
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise TimeoutError("request deadline exceeded")
+        if self._cancel is not None and self._cancel.is_set():
+            raise FetchError(f"request cancelled: {self._url}")
+        if self._max_bytes and self.size + len(chunk) > self._max_bytes:
+            chunk = chunk[: self._max_bytes - self.size]
+            self.truncated = True
+        self.size += len(chunk)
+        self._parts.append(self._decoder.decode(chunk))
+        return not self.truncated
+
+    def text(self) -> str:
+        self._parts.append(self._decoder.decode(b"", final=True))
+        return "".join(self._parts)
+
+
 class HttpFetcher:
-    def __init__(self, settings: Settings):
-        self._http = HttpClient(timeout=settings.timeout_s, retries=settings.retries, headers={
-            "User-Agent": settings.user_agent
-        })
+    """Fetches pages; with an `HttpCache`, fresh pages are served locally and
+    stale ones revalidated with a conditional request (304 = cached body).
+
+    Bodies are streamed: unsupported Content-Types are rejected from the
+    response headers (UnsupportedMimeError), and at most
+    `settings.max_page_bytes` are downloaded and decoded (a page cut there
+    is returned but not cached).
+    """
+
+    def __init__(self, settings: Settings, client: httpx.Client | None = None, cache: HttpCache | None = None):
+        self._http = HttpClient(client=client, **_client_kwargs(settings))
+        self._max_bytes = settings.max_page_bytes
+        self.cache = cache
+
+    def fetch_html(self, url: str, deadline_s: float | None = None, cancel: threading.Event | None = None) -> str:
+        """Page body as text; setting `cancel` stops the retries and the download."""
+        page = self.cache.get(url) if self.cache is not None else None
+        if page is not None and page.fresh:
+            return page.body
+        headers = page.conditional_headers() if page is not None else None
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        r = self._http.get(url, headers=headers, deadline_s=deadline_s,
+                           allow_status=(304,) if page else (), stream=True, cancel=cancel)
+        try:
+            if r.status_code == 304:
+                return self.cache.revalidated(page, r.headers).body
+            _check_content_type(url, r)
+            body = _BodyReader(url, r, self._max_bytes, deadline, cancel)
+            for chunk in r.iter_bytes():
+                if not body.feed(chunk):
+                    break
+        finally:
+            r.close()
+        text = body.text()
+        if self.cache is not None and not body.truncated:  # a cut page must not be served as the full one
+            self.cache.put(url, text, r.headers)
+        return text
+
+    def close(self) -> None:
+        self._http.close()
+
+
+class AsyncHttpFetcher:
+    """Async twin of `HttpFetcher`."""
+
+    def __init__(self, settings: Settings, client: httpx.AsyncClient | None = None, cache: HttpCache | None = None):
+        self._http = AsyncHttpClient(client=client, **_client_kwargs(settings))
+        self._max_bytes = settings.max_page_bytes
+        self.cache = cache
+
+    async def fetch_html(self, url: str, deadline_s: float | None = None) -> str:
+        """Page body as text; cache reads and writes (SQLite) run in a worker thread."""
+        page = await asyncio.to_thread(self.cache.get, url) if self.cache is not None else None
+        if page is not None and page.fresh:
+            return page.body
+        headers = page.conditional_headers() if page is not None else None
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        r = await self._http.get(url, headers=headers, deadline_s=deadline_s,
+                                 allow_status=(304,) if page else (), stream=True)
+        try:
+            if r.status_code == 304:
+                return (await asyncio.to_thread(self.cache.revalidated, page, r.headers)).body
+            _check_content_type(url, r)
+            body = _BodyReader(url, r, self._max_bytes, deadline)
+            async for chunk in r.aiter_bytes():
+                if not body.feed(chunk):
+                    break
+        finally:
+            await r.aclose()
+        text = body.text()
+        if self.cache is not None and not body.truncated:
+            await asyncio.to_thread(self.cache.put, url, text, r.headers)
+        return text
 
-    def fetch_html(self, url: str) -> str:
-        return self._http.get_text(url)
+    async def aclose(self) -> None:
+        await self._http.aclose()
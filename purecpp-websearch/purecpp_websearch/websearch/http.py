@@ -1,33 +1,258 @@
 from __future__ import annotations
+import asyncio
+import threading
+import time
 import httpx
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-class HttpClient:
-    def __init__(self, timeout: float = 20.0, retries: int = 2, headers: Dict[str, str] | None = None):
+from .exceptions import ConfigError, FetchError, RateLimitError
+from .ratelimit import RETRIABLE_STATUS, TokenBucket, backoff_delay, parse_retry_after
+
+# Transport failures worth retrying (bad URLs, protocol misuse... are not).
+_RETRIABLE_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+def _limits(max_connections: int, max_keepalive: int, keepalive_expiry_s: float) -> httpx.Limits:
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                        keepalive_expiry=keepalive_expiry_s)
+
+
+def _check_http2(http2: bool) -> None:
+    if http2:
+        try:
+            import h2  # noqa: F401  # type: ignore
+        except ImportError as e:
+            raise ConfigError("http2=True requires the 'h2' package: pip install 'httpx[http2]'") from e
+
+
+def build_client(settings, timeout: Optional[float] = None) -> httpx.Client:
+    """Pooled keep-alive client configured from Settings, shareable by several HttpClients."""
+    _check_http2(settings.http2)
+    return httpx.Client(
+        timeout=settings.timeout_s if timeout is None else timeout,
+        limits=_limits(settings.max_connections, settings.max_keepalive, settings.keepalive_expiry_s),
+        http2=settings.http2,
+    )
+
+
+def build_async_client(settings, timeout: Optional[float] = None) -> httpx.AsyncClient:
+    """Async twin of `build_client`."""
+    _check_http2(settings.http2)
+    return httpx.AsyncClient(
+        timeout=settings.timeout_s if timeout is None else timeout,
+        limits=_limits(settings.max_connections, settings.max_keepalive, settings.keepalive_expiry_s),
+        http2=settings.http2,
+    )
+
+
+class _BaseHttpClient:
+    def __init__(self, timeout: float, retries: int, headers: Dict[str, str] | None,
+                 max_connections: int, max_keepalive: int, keepalive_expiry_s: float, http2: bool,
+                 rate_limiter: TokenBucket | None, backoff_base_s: float, backoff_max_s: float,
+                 max_retry_after_s: float):
         self._timeout = timeout
         self._retries = retries
         self._headers = headers or {}
+        self._limits = _limits(max_connections, max_keepalive, keepalive_expiry_s)
+        _check_http2(http2)
+        self._http2 = http2
+        self._limiter = rate_limiter
+        self._backoff_base_s = backoff_base_s
+        self._backoff_max_s = backoff_max_s
+        self._max_retry_after_s = max_retry_after_s
+
+    def _attempt_timeout(self, deadline: float | None) -> float:
+        """Per-attempt timeout, shortened so the attempt ends by `deadline` (monotonic)."""
+        if deadline is None:
+            return self._timeout
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("request deadline exceeded")
+        return min(self._timeout, remaining)
+
+    def _wait_before(self, delay: float, deadline: float | None) -> float:
+        """Seconds to sleep before the next attempt: retry backoff and rate-limiter slot."""
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if self._limiter is not None:
+            delay = max(delay, self._limiter.reserve(remaining))
+        if remaining is not None and delay >= remaining:
+            self._refund()
+            raise TimeoutError("request deadline exceeded")
+        return delay
+
+    def _refund(self) -> None:
+        """Gives back the limiter slot reserved by `_wait_before` for a request that is never sent."""
+        if self._limiter is not None:
+            self._limiter.refund()
+
+    def _retry_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        """Backoff before retry `attempt + 1`, stretched to the server's Retry-After."""
+        delay = backoff_delay(attempt, self._backoff_base_s, self._backoff_max_s)
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if retry_after is not None:
+                if retry_after > self._max_retry_after_s:
+                    raise RateLimitError(f"server asked to retry after {retry_after:.0f}s: {response.url}")
+                delay = max(delay, retry_after)
+        return delay
+
+    def _observe(self, response: httpx.Response, attempt: int) -> None:
+        if self._limiter is None:
+            return
+        self._limiter.update_from_headers(response.headers)
+        if response.status_code == 429:
+            # throttled: hold back every caller sharing the limiter, also when this call gives up
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            if retry_after is None:
+                retry_after = backoff_delay(attempt, self._backoff_base_s, self._backoff_max_s)
+            self._limiter.pause(retry_after)
+
+    def _should_retry(self, response: httpx.Response, attempt: int, allow_status: tuple) -> bool:
+        if response.is_success or response.status_code in allow_status:
+            return False
+        return response.status_code in RETRIABLE_STATUS and attempt < self._retries
+
+
+class HttpClient(_BaseHttpClient):
+    """GET helpers with retries on top of a long-lived, pooled `httpx.Client`.
 
-    def get_json(self, url: str, headers: Dict[str, str] | None = None, params: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    Connections are kept alive between calls, so repeated requests to the same
+    host skip the TCP/TLS handshake. Pass `client` to share one pool between
+    several HttpClients (each keeps its own default headers); a client created
+    here is owned and closed by `close()`.
+
+    Only timeouts, connection errors and 408/425/429/5xx-gateway statuses are
+    retried, after an exponential backoff with jitter that honors
+    `Retry-After`. An optional `rate_limiter` spaces requests and follows the
+    server's `X-RateLimit-*` headers.
+    """
+
+    def __init__(self, timeout: float = 20.0, retries: int = 2, headers: Dict[str, str] | None = None, *,
+                 client: httpx.Client | None = None, max_connections: int = 20, max_keepalive: int = 10,
+                 keepalive_expiry_s: float = 30.0, http2: bool = False, rate_limiter: TokenBucket | None = None,
+                 backoff_base_s: float = 0.5, backoff_max_s: float = 30.0, max_retry_after_s: float = 60.0):
+        super().__init__(timeout, retries, headers, max_connections, max_keepalive, keepalive_expiry_s, http2,
+                         rate_limiter, backoff_base_s, backoff_max_s, max_retry_after_s)
+        self._owns_client = client is None
+        self._client = client or httpx.Client(timeout=timeout, limits=self._limits, http2=http2)
+
+    def get(self, url: str, headers: Dict[str, str] | None = None, params: Dict[str, Any] | None = None,
+            deadline_s: float | None = None, allow_status: tuple = (), stream: bool = False,
+            cancel: threading.Event | None = None) -> httpx.Response:
+        """GET with retries; non-2xx statuses raise unless listed in `allow_status` (e.g. 304).
+
+        With `stream=True` only the headers are read: the caller consumes the
+        body (`iter_bytes`) and must `close()` the response. Once `cancel` is
+        set no further attempt is made (FetchError); an attempt already
+        waiting on the network ends within its timeout.
+        """
         h = {**self._headers, **(headers or {})}
-        last_exc = None
-        for _ in range(self._retries + 1):
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        delay = 0.0
+        for attempt in range(self._retries + 1):
+            wait = self._wait_before(delay, deadline)
+            if cancel is None:
+                if wait > 0:
+                    time.sleep(wait)
+            elif cancel.wait(wait) if wait > 0 else cancel.is_set():
+                self._refund()
+                raise FetchError(f"request cancelled: {url}")
             try:
-                r = httpx.get(url, headers=h, params=params, timeout=self._timeout)
-                r.raise_for_status()
-                return r.json()
-            except Exception as e:
-                last_exc = e
-        raise last_exc  # type: ignore[misc]
-
-    def get_text(self, url: str, headers: Dict[str, str] | None = None) -> str:
+                request = self._client.build_request("GET", url, headers=h, params=params,
+                                                     timeout=self._attempt_timeout(deadline))
+                r = self._client.send(request, stream=stream)
+            except _RETRIABLE_ERRORS:
+                if attempt == self._retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                continue
+            self._observe(r, attempt)
+            if not self._should_retry(r, attempt, allow_status):
+                if not r.is_success and r.status_code not in allow_status:
+                    r.close()
+                    r.raise_for_status()
+                return r
+            r.close()
+            delay = self._retry_delay(attempt, r)
+        raise AssertionError("unreachable")
+
+    def get_json(self, url: str, headers: Dict[str, str] | None = None, params: Dict[str, Any] | None = None,
+                 deadline_s: float | None = None) -> Dict[str, Any]:
+        return self.get(url, headers, params, deadline_s).json()
+
+    def get_text(self, url: str, headers: Dict[str, str] | None = None, deadline_s: float | None = None) -> str:
+        """GET `url` as text; `deadline_s` bounds the whole call, retries included."""
+        return self.get(url, headers, None, deadline_s).text
+
+    def close(self) -> None:
+        if self._owns_client:
+            self._client.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class AsyncHttpClient(_BaseHttpClient):
+    """Async twin of `HttpClient`, backed by a pooled `httpx.AsyncClient`."""
+
+    def __init__(self, timeout: float = 20.0, retries: int = 2, headers: Dict[str, str] | None = None, *,
+                 client: httpx.AsyncClient | None = None, max_connections: int = 100, max_keepalive: int = 20,
+                 keepalive_expiry_s: float = 30.0, http2: bool = False, rate_limiter: TokenBucket | None = None,
+                 backoff_base_s: float = 0.5, backoff_max_s: float = 30.0, max_retry_after_s: float = 60.0):
+        super().__init__(timeout, retries, headers, max_connections, max_keepalive, keepalive_expiry_s, http2,
+                         rate_limiter, backoff_base_s, backoff_max_s, max_retry_after_s)
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(timeout=timeout, limits=self._limits, http2=http2)
+
+    async def get(self, url: str, headers: Dict[str, str] | None = None, params: Dict[str, Any] | None = None,
+                  deadline_s: float | None = None, allow_status: tuple = (), stream: bool = False) -> httpx.Response:
         h = {**self._headers, **(headers or {})}
-        last_exc = None
-        for _ in range(self._retries + 1):
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+        delay = 0.0
+        for attempt in range(self._retries + 1):
+            wait = self._wait_before(delay, deadline)
+            if wait > 0:
+                try:
+                    await asyncio.sleep(wait)
+                except asyncio.CancelledError:
+                    self._refund()
+                    raise
             try:
-                r = httpx.get(url, headers=h, timeout=self._timeout)
-                r.raise_for_status()
-                return r.text
-            except Exception as e:
-                last_exc = e
-        raise last_exc  # type: ignore[misc]
+                request = self._client.build_request("GET", url, headers=h, params=params,
+                                                     timeout=self._attempt_timeout(deadline))
+                r = await self._client.send(request, stream=stream)
+            except _RETRIABLE_ERRORS:
+                if attempt == self._retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                continue
+            self._observe(r, attempt)
+            if not self._should_retry(r, attempt, allow_status):
+                if not r.is_success and r.status_code not in allow_status:
+                    await r.aclose()
+                    r.raise_for_status()
+                return r
+            await r.aclose()
+            delay = self._retry_delay(attempt, r)
+        raise AssertionError("unreachable")
+
+    async def get_json(self, url: str, headers: Dict[str, str] | None = None, params: Dict[str, Any] | None = None,
+                       deadline_s: float | None = None) -> Dict[str, Any]:
+        return (await self.get(url, headers, params, deadline_s)).json()
+
+    async def get_text(self, url: str, headers: Dict[str, str] | None = None,
+                       deadline_s: float | None = None) -> str:
+        return (await self.get(url, headers, None, deadline_s)).text
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
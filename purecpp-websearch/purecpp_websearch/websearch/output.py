@@ -39,6 +39,8 @@ def to_langchain_docs(docs: Documents, *, include_raw_html: bool = False) -> Lis
             "url": d.url,
             "mime": d.mime,
         }
+        if d.rank is not None:
+            meta["rank"] = d.rank
         if d.meta:
             meta.update(d.meta)
         if include_raw_html and d.raw_html:
@@ -1,17 +1,43 @@
 from __future__ import annotations
-from typing import List, Optional, Type, Any, Dict
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional, Type, Any, Dict, Iterator
 
 from .schemas import SearchResult, Document, Documents, Results
 from .settings import Settings
 from .router import CleanerRouter
-from .fetchers.http_fetcher import HttpFetcher
+from .fetchers.http_fetcher import HttpFetcher, open_cache
+from .http import build_client
 from .providers.base import SearchProvider
 from .providers.brave import BraveProvider
 from .cleaners.base import ICleaner
+from .cleaners.pool import ProcessPoolCleaner
+from .exceptions import FetchError
 from .output import build_search_response  
 
-class WebSearch:
-    """Pluggable pipeline: provider → fetch → cleaner."""
+class _MarkdownCacheMixin:
+    """Cleaned-markdown caching next to cached pages (needs `_cache`, `settings`, `cleaner_name`)."""
+
+    def _markdown_key(self, mime: str) -> str:
+        return f"{self.cleaner_name}:{mime}"
+
+    def _cached_markdown(self, url: str, html: str, mime: str) -> Optional[str]:
+        if self._cache is None or not self.settings.cache_markdown:
+            return None
+        return self._cache.get_markdown(url, self._markdown_key(mime), html)
+
+    def _store_markdown(self, url: str, html: str, mime: str, md: str) -> None:
+        if self._cache is not None and self.settings.cache_markdown:
+            self._cache.put_markdown(url, self._markdown_key(mime), html, md)
+
+
+class WebSearch(_MarkdownCacheMixin):
+    """Pluggable pipeline: provider → fetch → cleaner.
+
+    With `settings.clean_processes` > 0 the cleaner runs in a process pool,
+    so concurrent reads clean pages on several cores.
+    """
 
     def __init__(self, provider: str = "brave", cleaner: str = "simple", settings: Settings | None = None):
         self.settings = settings or Settings.from_env()
@@ -20,32 +46,167 @@ class WebSearch:
         self._providers: dict[str, Type[SearchProvider]] = {
             "brave": BraveProvider,
         }
-        self._provider = self._providers[provider](self.settings)
-
-        self._fetcher = HttpFetcher(self.settings)
+        # The cleaner first: an unknown name fails before anything needs closing
+        # (a cleaner pool only starts its processes on the first page).
         self._cleaners = CleanerRouter()
-        self._cleaner: ICleaner = self._cleaners.create(cleaner)
+        self._cleaner: ICleaner = self._cleaners.create(cleaner, processes=self.settings.clean_processes)
+
+        self._client = self._provider = self._cache = None
+        try:
+            # One keep-alive pool shared by the provider and the fetcher
+            self._client = build_client(self.settings)
+            self._provider = self._providers[provider](self.settings, client=self._client)
+            self._cache = open_cache(self.settings)
+            self._fetcher = HttpFetcher(self.settings, client=self._client, cache=self._cache)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Closes the pooled HTTP connections, the caches and the cleaner processes."""
+        if self._provider is not None:
+            self._provider.close()
+        if self._client is not None:
+            self._client.close()
+        if self._cache is not None:
+            self._cache.close()
+        if isinstance(self._cleaner, ProcessPoolCleaner):
+            self._cleaner.close()
+
+    def __enter__(self) -> "WebSearch":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def search(self, query: str, k: int = 5, **kwargs) -> Results:
         return self._provider.search(query, k=k, **kwargs)
 
-    def read(self, url: str, *, mime: str = "text/html") -> Document:
-        html = self._fetcher.fetch_html(url)
-        md = self._cleaner.to_markdown(html, mime)
+    def read(self, url: str, *, mime: str = "text/html", deadline_s: Optional[float] = None) -> Document:
+        return self._read(url, mime, deadline_s)
+
+    def _read(self, url: str, mime: str, deadline_s: Optional[float],
+              stop: Optional[threading.Event] = None) -> Document:
+        html = self._fetcher.fetch_html(url, deadline_s=deadline_s, cancel=stop)
+        if stop is not None and stop.is_set():
+            raise FetchError(f"read cancelled: {url}")
+        md = self._cached_markdown(url, html, mime)
+        if md is None:
+            md = self._cleaner.to_markdown(html, mime)
+            self._store_markdown(url, html, mime, md)
         return Document(url=url, content=md, raw_html=html, mime=mime)
 
-    def search_and_read(self, query: str, k: int = 3, *, mime: str = "text/html", **kwargs) -> Documents:
+    def iter_read(
+        self,
+        results: Results,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+    ) -> Iterator[Document]:
+        """
+        Fetches and cleans the results concurrently, yielding each Document
+        as soon as it is ready (completion order, `Document.rank` = position
+        in `results`).
+
+        Up to `workers` pages are read at once; each page gets
+        `request_deadline_s` (fetch + retries) and the whole iteration
+        `deadline_s`. Pages that fail or do not finish before the deadline
+        are skipped. Defaults come from Settings.
+
+        At the deadline, or when the generator is closed early, queued reads
+        are dropped and running ones stop at their next retry, body chunk or
+        before cleaning; a request already waiting on the network ends within
+        `settings.timeout_s`. Close the WebSearch only after that, or
+        stragglers may fail on the closed client (their errors are discarded).
+        """
+        if not results:
+            return
+        workers = max(1, min(workers or self.settings.fetch_workers, len(results)))
+        if request_deadline_s is None:
+            request_deadline_s = self.settings.request_deadline_s
+        if deadline_s is None:
+            deadline_s = self.settings.read_deadline_s
+        deadline = None if deadline_s is None else time.monotonic() + deadline_s
+
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="websearch-read")
+        futures = {pool.submit(self._read, r.url, mime, request_deadline_s, stop): rank
+                   for rank, r in enumerate(results)}
+        pending = set(futures)
+        try:
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    r = results[futures[fut]]
+                    try:
+                        doc = fut.result()
+                    except Exception as e:
+                        print(f"[WebSearch] Failed to read '{r.url}': {e}")
+                        continue
+                    doc.title = r.title
+                    doc.rank = futures[fut]
+                    yield doc
+                if not done:  # overall deadline reached
+                    for fut in pending:
+                        print(f"[WebSearch] Deadline reached before reading '{results[futures[fut]].url}'")
+                    break
+        finally:
+            # never block on stragglers: queued reads are dropped, running ones see `stop` and bail out
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def read_many(
+        self,
+        results: Results,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+    ) -> Documents:
+        """
+        Fetches and cleans the results concurrently (see `iter_read`).
+
+        Documents come back in rank order; pages that failed or did not finish
+        before the deadline are left out (partial results).
+        """
+        docs = self.iter_read(results, mime=mime, workers=workers,
+                              request_deadline_s=request_deadline_s, deadline_s=deadline_s)
+        return sorted(docs, key=lambda d: d.rank)
+
+    def search_and_read(
+        self,
+        query: str,
+        k: int = 3,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+        **kwargs,
+    ) -> Documents:
+        results = self.search(query, k=k, **kwargs)
+        return self.read_many(results, mime=mime, workers=workers,
+                              request_deadline_s=request_deadline_s, deadline_s=deadline_s)
+
+    def iter_search_and_read(
+        self,
+        query: str,
+        k: int = 3,
+        *,
+        mime: str = "text/html",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
+        **kwargs,
+    ) -> Iterator[Document]:
+        """Like `search_and_read`, but yields each Document (tagged with its rank) as soon as it is read."""
         results = self.search(query, k=k, **kwargs)
-        docs: Documents = []
-        for r in results:
-            try:
-                doc = self.read(r.url, mime=mime)
-                doc.title = r.title
-                docs.append(doc)
-            except Exception as e:
-                print(f"[WebSearch] Failed to read '{r.url}': {e}")
-                continue
-        return docs
+        yield from self.iter_read(results, mime=mime, workers=workers,
+                                  request_deadline_s=request_deadline_s, deadline_s=deadline_s)
 
     def search_and_read_structured(
         self,
@@ -55,6 +216,9 @@ class WebSearch:
         mime: str = "text/html",
         include_raw_html: bool = False,
         schema: str = "langchain",
+        workers: Optional[int] = None,
+        request_deadline_s: Optional[float] = None,
+        deadline_s: Optional[float] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """
@@ -72,16 +236,9 @@ class WebSearch:
         # 1) Search (keeps the kwargs to log the parameters used)
         results = self.search(query, k=k, **kwargs)
 
-        # 2) Fetching + cleaning
-        docs: Documents = []
-        for r in results:
-            try:
-                d = self.read(r.url, mime=mime)
-                d.title = r.title
-                docs.append(d)
-            except Exception as e:
-                print(f"[WebSearch] Failed to read '{r.url}': {e}")
-                continue
+        # 2) Fetching + cleaning (concurrent, rank order kept)
+        docs = self.read_many(results, mime=mime, workers=workers,
+                              request_deadline_s=request_deadline_s, deadline_s=deadline_s)
 
         #3) Build payload**
         params: Dict[str, Any] = {"k": k, "mime": mime}
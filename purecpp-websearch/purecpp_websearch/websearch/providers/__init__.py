@@ -1,4 +1,4 @@
 from .base import SearchProvider
-from .brave import BraveProvider
+from .brave import AsyncBraveProvider, BraveProvider
 
-__all__ = ["SearchProvider", "BraveProvider"]
+__all__ = ["SearchProvider", "BraveProvider", "AsyncBraveProvider"]
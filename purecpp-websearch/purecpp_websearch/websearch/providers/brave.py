@@ -1,31 +1,82 @@
 from __future__ import annotations
 from typing import List, Optional, Any, Dict
 
-from ..http import HttpClient
+import httpx
+
+from ..cache import SearchCache
+from ..http import AsyncHttpClient, HttpClient
 from ..schemas import SearchResult
 from ..settings import Settings
 from ..exceptions import ConfigError
+from ..ratelimit import TokenBucket
 
 BRAVE_ENDPOINT = "https://api.search.brave.com/res/v1/web/search"
 
 def _clean_params(d: Dict[str, Any]) -> Dict[str, Any]:
     return {k: v for k, v in d.items() if v is not None and v != ""}
 
+def _search_params(query: str, k: int, lang: Optional[str], ui_lang: Optional[str],
+                   kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return _clean_params({
+        "q": query,
+        "count": min(int(k), 20),
+        "search_lang": lang or "en",
+        "ui_lang": ui_lang or "en-US",
+        "country": kwargs.get("country", "US"),
+        "safesearch": kwargs.get("safesearch", "moderate"),
+        "freshness": kwargs.get("freshness", "pm"),
+    })
+
+def _parse_results(data: Dict[str, Any]) -> List[SearchResult]:
+    web = (data or {}).get("web", {})
+    results = []
+    for item in web.get("results", []):
+        results.append(SearchResult(
+            title=item.get("title", ""),
+            url=item.get("url", ""),
+            snippet=item.get("description"),
+            source="brave",
+            score=item.get("page_age"),
+            metadata={"brave_raw": item},
+        ))
+    return results
+
+def _headers(settings: Settings) -> Dict[str, str]:
+    if not settings.brave_api_key:
+        raise ConfigError("`BRAVE_API_KEY` not found in the environment..")
+    return {
+        "X-Subscription-Token": settings.brave_api_key,
+        "Accept": "application/json",
+        "Accept-Encoding": "gzip",
+    }
+
+def _http_kwargs(settings: Settings) -> Dict[str, Any]:
+    headers = _headers(settings)
+    # Brave's X-RateLimit-Limit is "<per second>, <per month>": window 0 sets the rate
+    limiter = TokenBucket.shared("brave", settings.brave_api_key, settings.brave_rate_per_s,
+                                 settings.brave_burst, settings.rate_limit_max_wait_s, limit_window=0)
+    return dict(
+        timeout=settings.timeout_s,
+        retries=settings.retries,
+        headers=headers,
+        max_connections=settings.max_connections,
+        max_keepalive=settings.max_keepalive,
+        keepalive_expiry_s=settings.keepalive_expiry_s,
+        http2=settings.http2,
+        rate_limiter=limiter,
+        backoff_base_s=settings.backoff_base_s,
+        backoff_max_s=settings.backoff_max_s,
+        max_retry_after_s=settings.rate_limit_max_wait_s,
+    )
+
 class BraveProvider:
     name = "brave"
 
-    def __init__(self, settings: Settings) -> None:
-        if not settings.brave_api_key:
-            raise ConfigError("`BRAVE_API_KEY` not found in the environment..")
-        self._http = HttpClient(
-            timeout=settings.timeout_s,
-            retries=settings.retries,
-            headers={
-                "X-Subscription-Token": settings.brave_api_key,
-                "Accept": "application/json",
-                "Accept-Encoding": "gzip",
-            },
-        )
+    def __init__(self, settings: Settings, client: httpx.Client | None = None,
+                 cache: SearchCache | None = None) -> None:
+        http_kwargs = _http_kwargs(settings)  # may raise ConfigError: check before opening the cache
+        self.cache = cache if cache is not None else SearchCache.from_settings(settings)
+        self._http = HttpClient(client=client, **http_kwargs)
 
     def search(
         self,
@@ -36,26 +87,49 @@ class BraveProvider:
         ui_lang: Optional[str] = None,
         **kwargs: Any,
     ) -> List[SearchResult]:
-        params: Dict[str, Any] = _clean_params({
-            "q": query,
-            "count": min(int(k), 20),
-            "search_lang": lang or "en",
-            "ui_lang": ui_lang or "en-US",
-            "country": kwargs.get("country", "US"),
-            "safesearch": kwargs.get("safesearch", "moderate"),
-            "freshness": kwargs.get("freshness", "pm"),
-        })
-
-        data = self._http.get_json(BRAVE_ENDPOINT, params=params)
-        web = (data or {}).get("web", {})
-        results = []
-        for item in web.get("results", []):
-            results.append(SearchResult(
-                title=item.get("title", ""),
-                url=item.get("url", ""),
-                snippet=item.get("description"),
-                source="brave",
-                score=item.get("page_age"),
-                metadata={"brave_raw": item},
-            ))
-        return results
+        params = _search_params(query, k, lang, ui_lang, kwargs)
+        if self.cache is None:
+            return _parse_results(self._http.get_json(BRAVE_ENDPOINT, params=params))
+        return self.cache.get_or_compute(
+            SearchCache.make_key(self.name, params),
+            lambda: _parse_results(self._http.get_json(BRAVE_ENDPOINT, params=params)),
+        )
+
+    def close(self) -> None:
+        self._http.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+class AsyncBraveProvider:
+    """Async twin of `BraveProvider` (same parameters and results)."""
+    name = "brave"
+
+    def __init__(self, settings: Settings, client: httpx.AsyncClient | None = None,
+                 cache: SearchCache | None = None) -> None:
+        http_kwargs = _http_kwargs(settings)  # may raise ConfigError: check before opening the cache
+        self.cache = cache if cache is not None else SearchCache.from_settings(settings)
+        self._http = AsyncHttpClient(client=client, **http_kwargs)
+
+    async def search(
+        self,
+        query: str,
+        k: int = 5,
+        *,
+        lang: Optional[str] = None,
+        ui_lang: Optional[str] = None,
+        **kwargs: Any,
+    ) -> List[SearchResult]:
+        params = _search_params(query, k, lang, ui_lang, kwargs)
+
+        async def fetch() -> List[SearchResult]:
+            return _parse_results(await self._http.get_json(BRAVE_ENDPOINT, params=params))
+
+        if self.cache is None:
+            return await fetch()
+        return await self.cache.aget_or_compute(SearchCache.make_key(self.name, params), fetch)
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import hashlib
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+from .exceptions import ConfigError, RateLimitError
+
+# Statuses worth retrying; everything else (4xx, redirects...) fails at once.
+RETRIABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _numbers(value: Optional[str]) -> List[float]:
+    out = []
+    for part in (value or "").split(","):
+        try:
+            out.append(float(part.strip()))
+        except ValueError:
+            pass
+    return out
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    """Exponential backoff with full jitter for retry number `attempt` (0-based)."""
+    return random.uniform(0.0, min(max_s, base_s * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Thread- and asyncio-safe token bucket.
+
+    `reserve()` takes a token immediately (the balance may go negative) and
+    returns how long the caller must wait before sending, so waiting happens
+    outside the lock with `time.sleep` or `asyncio.sleep`; `refund()` gives
+    it back when the request is not sent after all. `pause()` blocks every
+    caller until a point in time (Retry-After, exhausted quota).
+
+    `limit_window` is the index of the `X-RateLimit-Limit` entry that gives
+    requests per second; when set, the bucket adopts that rate from responses,
+    so throughput follows the plan actually in force.
+    """
+
+    _shared: Dict[Tuple[str, str], "TokenBucket"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, rate_per_s: float, burst: int = 1, max_wait_s: float = 60.0,
+                 limit_window: Optional[int] = None):
+        if rate_per_s <= 0:
+            raise ValueError("rate_per_s must be > 0")
+        self.rate = float(rate_per_s)
+        self.burst = max(1, int(burst))
+        self._configured = (self.rate, self.burst)
+        self.max_wait_s = max_wait_s
+        self.limit_window = limit_window
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, provider: str, api_key: str, rate_per_s: float, burst: int = 1,
+               max_wait_s: float = 60.0, limit_window: Optional[int] = None) -> "TokenBucket":
+        """One bucket per provider + API key in this process (the quota is per key).
+
+        Raises ConfigError when the key's bucket was created with another
+        rate or burst: two limits for one quota cannot both hold.
+        """
+        key = (provider, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+        with cls._shared_lock:
+            bucket = cls._shared.get(key)
+            if bucket is None:
+                bucket = cls._shared[key] = cls(rate_per_s, burst, max_wait_s, limit_window)
+                return bucket
+        if bucket._configured != (float(rate_per_s), max(1, int(burst))):
+            raise ConfigError(f"{provider} rate limiter for this API key already set to rate/burst "
+                              f"{bucket._configured}, got ({rate_per_s}, {burst})")
+        return bucket
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, max_wait_s: Optional[float] = None) -> float:
+        """Takes one token; returns the seconds to wait before using it.
+
+        Raises RateLimitError (without taking the token) when the wait would
+        exceed `max_wait_s` (defaults to the bucket's own limit).
+        """
+        limit = self.max_wait_s if max_wait_s is None else min(max_wait_s, self.max_wait_s)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1.0
+            wait = max(self._blocked_until - now, -self._tokens / self.rate if self._tokens < 0 else 0.0)
+            if wait > limit:
+                self._tokens += 1.0
+                raise RateLimitError(f"rate limited: next request slot in {wait:.1f}s")
+            return wait
+
+    def refund(self) -> None:
+        """Returns a token taken by `reserve()` for a request that was not sent."""
+        with self._lock:
+            self._tokens = min(float(self.burst), self._tokens + 1.0)
+
+    def acquire(self, max_wait_s: Optional[float] = None) -> None:
+        wait = self.reserve(max_wait_s)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait_s: Optional[float] = None) -> None:
+        import asyncio
+        wait = self.reserve(max_wait_s)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """Blocks all callers for `seconds` from now."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers) -> None:
+        """Applies `X-RateLimit-Limit/Remaining/Reset` (comma lists, one value per window).
+
+        A window with no remaining requests pauses the bucket until its reset
+        (seconds); `limit_window` picks the limit that sets the rate.
+        """
+        limits = _numbers(headers.get("x-ratelimit-limit"))
+        remaining = _numbers(headers.get("x-ratelimit-remaining"))
+        resets = _numbers(headers.get("x-ratelimit-reset"))
+        i = self.limit_window
+        if i is not None and i < len(limits) and limits[i] > 0:
+            with self._lock:
+                self._refill(time.monotonic())
+                self.rate = limits[i]
+                self.burst = max(1, int(limits[i]))
+        for left, reset in zip(remaining, resets):
+            if left <= 0:
+                self.pause(reset)
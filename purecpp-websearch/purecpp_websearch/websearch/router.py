@@ -2,6 +2,8 @@ from __future__ import annotations
 from typing import Dict, Type, Optional, Iterable
 
 from .cleaners.base import ICleaner
+from .cleaners.fast import FastCleaner
+from .cleaners.pool import ProcessPoolCleaner
 from .cleaners.simple import SimpleCleaner
 
 
@@ -11,6 +13,7 @@ class CleanerRouter:
     def __init__(self) -> None:
         self._registry: Dict[str, Type[ICleaner]] = {}
         self.register("simple", SimpleCleaner)
+        self.register("fast", FastCleaner)
 
     def register(self, name: str, cls: Type[ICleaner]) -> None:
         key = name.strip().lower()
@@ -20,12 +23,15 @@ class CleanerRouter:
             raise TypeError(f"{cls!r} **is not a subclass of ICleaner**")
         self._registry[key] = cls
 
-    def create(self, name: Optional[str] = None) -> ICleaner:
+    def create(self, name: Optional[str] = None, processes: int = 0) -> ICleaner:
+        """Instantiates a cleaner; with `processes` > 0 it runs in that many worker processes."""
         key = (name or "simple").strip().lower()
         try:
             cls = self._registry[key]
         except KeyError as e:
             raise ValueError(f"Cleaner '{name}' não registrado") from e
+        if processes > 0:
+            return ProcessPoolCleaner(cls, workers=processes)
         return cls()
 
     def registered(self) -> Iterable[str]:
@@ -19,6 +19,7 @@ class Document:
     mime: str = "text/html"
     raw_html: Optional[str] = None
     meta: Dict[str, Any] = None
+    rank: Optional[int] = None  # position of the search result it was read from
 
 Results = List[SearchResult]
 Documents = List[Document]
@@ -2,12 +2,52 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 
+
+def _env_float(name: str) -> float | None:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
 @dataclass
 class Settings:
     brave_api_key: str | None = None
     timeout_s: float = 20.0
     retries: int = 2
     user_agent: str = "purecpp-websearch/0.1"
+    # search_and_read: pages fetched/cleaned at once, time budget per page
+    # (fetch + retries) and for the whole batch (None = no limit).
+    fetch_workers: int = 8
+    request_deadline_s: float | None = None
+    read_deadline_s: float | None = None
+    # Worker processes for the cleaner (0 = clean in the reading thread).
+    clean_processes: int = 0
+    # Shared keep-alive connection pool (provider + fetcher).
+    max_connections: int = 20
+    max_keepalive: int = 10
+    keepalive_expiry_s: float = 30.0
+    http2: bool = False
+    # Pages are streamed and cut at this many (decompressed) bytes; 0 = no cap.
+    max_page_bytes: int = 5 * 1024 ** 2
+    # On-disk page cache (None disables it); cache_markdown also keeps the
+    # cleaned markdown per cleaner next to each cached page.
+    http_cache_path: str | None = None
+    http_cache_max_mb: int = 512
+    http_cache_default_ttl_s: float = 0.0
+    cache_markdown: bool = True
+    # Provider result cache: TTL (0 disables), in-memory entries, optional
+    # SQLite file shared between processes.
+    search_cache_ttl_s: float = 600.0
+    search_cache_size: int = 1024
+    search_cache_path: str | None = None
+    # Retries back off exponentially (with jitter) from backoff_base_s up to
+    # backoff_max_s; a Retry-After or rate-limit wait longer than
+    # rate_limit_max_wait_s fails instead. Brave requests share a token bucket
+    # per API key (start rate/burst; the plan limit from response headers wins).
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 30.0
+    rate_limit_max_wait_s: float = 60.0
+    brave_rate_per_s: float = 1.0
+    brave_burst: int = 1
 
     @classmethod
     def from_env(cls) -> "Settings":
@@ -16,4 +56,25 @@ class Settings:
             timeout_s=float(os.getenv("WEBSEARCH_TIMEOUT", "20")),
             retries=int(os.getenv("WEBSEARCH_RETRIES", "2")),
             user_agent=os.getenv("WEBSEARCH_UA", "purecpp-websearch/0.1"),
+            fetch_workers=int(os.getenv("WEBSEARCH_FETCH_WORKERS", "8")),
+            request_deadline_s=_env_float("WEBSEARCH_REQUEST_DEADLINE"),
+            read_deadline_s=_env_float("WEBSEARCH_READ_DEADLINE"),
+            clean_processes=int(os.getenv("WEBSEARCH_CLEAN_PROCESSES", "0")),
+            max_connections=int(os.getenv("WEBSEARCH_MAX_CONNECTIONS", "20")),
+            max_keepalive=int(os.getenv("WEBSEARCH_MAX_KEEPALIVE", "10")),
+            keepalive_expiry_s=float(os.getenv("WEBSEARCH_KEEPALIVE_EXPIRY", "30")),
+            http2=os.getenv("WEBSEARCH_HTTP2", "").lower() in ("1", "true", "yes"),
+            max_page_bytes=int(os.getenv("WEBSEARCH_MAX_PAGE_BYTES", str(5 * 1024 ** 2))),
+            http_cache_path=os.getenv("WEBSEARCH_HTTP_CACHE") or None,
+            http_cache_max_mb=int(os.getenv("WEBSEARCH_HTTP_CACHE_MAX_MB", "512")),
+            http_cache_default_ttl_s=float(os.getenv("WEBSEARCH_HTTP_CACHE_TTL", "0")),
+            cache_markdown=os.getenv("WEBSEARCH_CACHE_MARKDOWN", "1").lower() in ("1", "true", "yes"),
+            search_cache_ttl_s=float(os.getenv("WEBSEARCH_SEARCH_CACHE_TTL", "600")),
+            search_cache_size=int(os.getenv("WEBSEARCH_SEARCH_CACHE_SIZE", "1024")),
+            search_cache_path=os.getenv("WEBSEARCH_SEARCH_CACHE") or None,
+            backoff_base_s=float(os.getenv("WEBSEARCH_BACKOFF_BASE", "0.5")),
+            backoff_max_s=float(os.getenv("WEBSEARCH_BACKOFF_MAX", "30")),
+            rate_limit_max_wait_s=float(os.getenv("WEBSEARCH_RATE_LIMIT_MAX_WAIT", "60")),
+            brave_rate_per_s=float(os.getenv("WEBSEARCH_BRAVE_RATE", "1")),
+            brave_burst=int(os.getenv("WEBSEARCH_BRAVE_BURST", "1")),
         )
@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import httpx
+
+from purecpp_websearch.websearch import AsyncWebSearch, SearchResult
+from purecpp_websearch.websearch.cache import HttpCache
+from purecpp_websearch.websearch.settings import Settings
+
+
+def make_aws(handler, **kw):
+    """AsyncWebSearch whose shared client answers from `handler` (no network, no search cache)."""
+    settings = Settings(brave_api_key="test", search_cache_ttl_s=0, brave_rate_per_s=100, brave_burst=100, **kw)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    with mock.patch("purecpp_websearch.websearch.async_pipeline.build_async_client", return_value=client):
+        return AsyncWebSearch(settings=settings)
+
+
+def results(*paths):
+    return [SearchResult(title=p, url=f"https://site.test{p}") for p in paths]
+
+
+class TestAsyncWebSearch(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_markdown_cache_runs_off_the_loop(self):
+        """Markdown cache reads and writes happen in the executor, and a cached page is not cleaned again."""
+        threads = []
+        for name in ("get_markdown", "put_markdown"):
+            original = getattr(HttpCache, name)
+
+            def record(self, *args, _original=original, _name=name):
+                threads.append((_name, threading.get_ident()))
+                return _original(self, *args)
+
+            self.addCleanup(setattr, HttpCache, name, original)
+            setattr(HttpCache, name, record)
+
+        def handler(request):
+            return httpx.Response(200, html="<p>hello</p>", headers={"Cache-Control": "max-age=60"})
+
+        async def main():
+            loop_thread = threading.get_ident()
+            async with make_aws(handler, http_cache_path=os.path.join(self._tmp.name, "c.sqlite")) as aws:
+                first = await aws.read("https://site.test/a")
+                with mock.patch.object(aws._cleaner, "to_markdown", side_effect=AssertionError("cleaned twice")):
+                    second = await aws.read("https://site.test/a")
+            return loop_thread, first, second
+
+        loop_thread, first, second = asyncio.run(main())
+        self.assertEqual(first.content, second.content)
+        self.assertEqual([name for name, _ in threads], ["get_markdown", "put_markdown", "get_markdown"])
+        self.assertNotIn(loop_thread, [ident for _, ident in threads])
+
+    def test_iter_search_and_read_streams(self):
+        """Documents arrive in completion order with their rank; closing the iterator cancels the rest."""
+        async def main():
+            release = asyncio.Event()
+            cancelled = []
+
+            async def handler(request):
+                if request.url.host == "api.search.brave.com":
+                    items = [{"title": p, "url": f"https://site.test{p}"} for p in ("/slow", "/a", "/stuck")]
+                    return httpx.Response(200, json={"web": {"results": items}})
+                try:
+                    if request.url.path == "/slow":
+                        await release.wait()
+                    elif request.url.path == "/stuck":
+                        await asyncio.sleep(30)
+                except asyncio.CancelledError:
+                    cancelled.append(request.url.path)
+                    raise
+                return httpx.Response(200, html=f"<p>page {request.url.path}</p>")
+
+            async with make_aws(handler) as aws:
+                async with contextlib.aclosing(aws.iter_search_and_read("q", k=3, workers=3)) as it:
+                    first = await it.__anext__()
+                    release.set()
+                    second = await it.__anext__()
+            return first, second, cancelled
+
+        first, second, cancelled = asyncio.run(asyncio.wait_for(main(), 10))
+        self.assertEqual([(d.rank, d.title) for d in (first, second)], [(1, "/a"), (0, "/slow")])
+        self.assertEqual(cancelled, ["/stuck"])
+
+    def test_read_many_deadline_keeps_partial_results(self):
+        async def handler(request):
+            if request.url.path == "/stuck":
+                await asyncio.sleep(30)
+            return httpx.Response(200, html=f"<p>page {request.url.path}</p>")
+
+        async def main():
+            async with make_aws(handler) as aws:
+                return await aws.read_many(results("/stuck", "/a", "/b"), deadline_s=0.3)
+
+        docs = asyncio.run(asyncio.wait_for(main(), 10))
+        self.assertEqual([(d.rank, d.title) for d in docs], [(1, "/a"), (2, "/b")])
+
+
+
+class TestAsyncWebSearchInit(unittest.TestCase):
+
+    def test_failed_init_closes_what_was_opened(self):
+        """A page cache that cannot be opened leaves no search cache or cleaner processes behind."""
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+        settings = Settings(brave_api_key="test", search_cache_ttl_s=60, clean_processes=1,
+                            brave_rate_per_s=100, brave_burst=100)
+        with mock.patch("purecpp_websearch.websearch.async_pipeline.build_async_client", return_value=client), \
+                mock.patch("purecpp_websearch.websearch.async_pipeline.open_cache", side_effect=OSError("read-only")), \
+                mock.patch("purecpp_websearch.websearch.cache.SearchCache.close") as close_cache, \
+                mock.patch("purecpp_websearch.websearch.cleaners.pool.ProcessPoolCleaner.close") as close_pool:
+            with self.assertRaises(OSError):
+                AsyncWebSearch(settings=settings)
+        close_cache.assert_called_once()
+        close_pool.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
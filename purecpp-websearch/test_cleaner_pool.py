@@ -0,0 +1,72 @@
+import asyncio
+import os
+import unittest
+from concurrent.futures import wait
+
+from purecpp_websearch.websearch import CleanerRouter
+from purecpp_websearch.websearch.cleaners import FastCleaner, ProcessPoolCleaner, SimpleCleaner
+from purecpp_websearch.websearch.exceptions import UnsupportedMimeError
+
+PAGES = [f"<h1>Page {i}</h1><p>Some <b>bold</b> text and a <a href='/x{i}'>link</a>.</p>" for i in range(8)]
+
+
+class PidCleaner(SimpleCleaner):
+    """Reports the process that cleaned the page."""
+
+    def to_markdown(self, html, mime):
+        if mime != "text/html":
+            raise UnsupportedMimeError(mime)
+        return str(os.getpid())
+
+
+class TestProcessPoolCleaner(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ProcessPoolCleaner(SimpleCleaner, workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_same_output_as_in_process(self):
+        cleaner = SimpleCleaner()
+        futures = [self.pool.submit(html, "text/html") for html in PAGES]
+        wait(futures, timeout=60)
+        self.assertEqual([f.result() for f in futures], [cleaner.to_markdown(html, "text/html") for html in PAGES])
+        self.assertEqual(self.pool.to_markdown(PAGES[0], "text/html"), cleaner.to_markdown(PAGES[0], "text/html"))
+
+    def test_async_callers_can_await_submit(self):
+        async def main():
+            return await asyncio.gather(*(asyncio.wrap_future(self.pool.submit(h, "text/html")) for h in PAGES[:3]))
+
+        self.assertEqual(asyncio.run(main()), [SimpleCleaner().to_markdown(h, "text/html") for h in PAGES[:3]])
+
+
+class TestPoolLifecycle(unittest.TestCase):
+
+    def test_runs_in_worker_processes(self):
+        with ProcessPoolCleaner(PidCleaner, workers=1) as pool:
+            self.assertNotEqual(pool.to_markdown("<p>x</p>", "text/html"), str(os.getpid()))
+            with self.assertRaises(UnsupportedMimeError):  # cleaner errors reach the caller
+                pool.to_markdown("x", "application/pdf")
+        with self.assertRaises(RuntimeError):
+            pool.submit("<p>x</p>", "text/html")
+
+    def test_rejects_non_cleaners(self):
+        with self.assertRaises(TypeError):
+            ProcessPoolCleaner(dict)
+
+    def test_router_builds_pool(self):
+        cleaner = CleanerRouter().create("fast", processes=1)
+        try:
+            self.assertIsInstance(cleaner, ProcessPoolCleaner)
+            self.assertIs(cleaner.cleaner_cls, FastCleaner)
+            self.assertEqual(cleaner.to_markdown(PAGES[0], "text/html"), FastCleaner().to_markdown(PAGES[0], "text/html"))
+        finally:
+            cleaner.close()
+        self.assertIsInstance(CleanerRouter().create("fast"), FastCleaner)
+
+
+if __name__ == '__main__':
+    unittest.main()
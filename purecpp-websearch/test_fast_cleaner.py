@@ -0,0 +1,120 @@
+import unittest
+
+from purecpp_websearch.websearch import CleanerRouter
+from purecpp_websearch.websearch.cleaners import FastCleaner, SimpleCleaner
+
+# Well-formed pages/fragments covering every tag markdownify converts.
+PAGES = {
+    "document": (
+        "<!DOCTYPE html><html>\n<head>\n<title>Title here</title>\n<style>p{color:red}</style>"
+        "<script>var a = 1;</script>\n</head>\n<body>\n<h1>Main  heading</h1>\n"
+        "<p class='x' style='y' onclick='f()'>Some <b>bold</b> and <i>italic</i> text with a "
+        "<a href='https://e.com/a_b' title='T \"q\"'>link</a>.</p>\n<!-- comment -->\n"
+        "<p>snake_case and 2*3</p>\n</body>\n</html>"
+    ),
+    "lists": (
+        "<ul>\n<li>one</li>\n<li>two\n<ul><li>nested <b>b</b></li><li>n2\n<ul><li>deep</li></ul></li></ul></li>\n</ul>\n"
+        "<p>after</p><ol start='3'><li>x</li><li><p>y</p><p>y2</p></li></ol>text"
+    ),
+    "table_head": (
+        "<table><caption>Cap</caption><thead><tr><th>A</th><th colspan='2'>B</th></tr></thead><tbody>"
+        "<tr><td>1</td><td>2</td><td>3</td></tr><tr><td>4<br>5</td><td><p>p</p></td>"
+        "<td><img src='i.png' alt='alt'></td></tr></tbody></table>"
+    ),
+    "table_no_head": "<table><tr><td>a</td><td>b</td></tr><tr><td>c</td><td>d</td></tr></table>",
+    "table_tbody_only": "<table><tbody><tr><td>a</td></tr><tr><td>b</td></tr></tbody></table>",
+    "pre_code": (
+        "<p>Run:</p><pre>\n  code_here *x*\n    indented\n</pre>"
+        "<pre><code class='lang-py'>def f(a_b):\n    return a_b</code></pre>"
+        "<p>inline <code>a_b</code>, <code>x`y</code>, <kbd>Ctrl</kbd> and <samp>out</samp></p>"
+    ),
+    "quote_dl_hr": (
+        "<blockquote><p>q1</p><p>q2 <em>e</em></p></blockquote><hr>"
+        "<dl><dt>term\n one</dt><dd>def\nline</dd><dt>t2</dt><dd><p>p1</p><p>p2</p></dd></dl>"
+    ),
+    "noise": (
+        "<div><noscript>ns</noscript><iframe src='x'></iframe>before<script>x</script>after "
+        "<svg><text>s</text></svg> end<template><p>t</p></template></div>"
+    ),
+    "headings": (
+        "<h2>Sub <a href='/x'>l</a></h2><h3>Three   words</h3><h4></h4><h5>five <img src='a.png' alt='im'></h5>"
+        "<h6>six</h6><h1>One<br>Two</h1>"
+    ),
+    "inline": (
+        "<p>a <b> spaced </b> b <strong></strong> <del>d</del> <s>s</s><sub>2</sub><sup>3</sup> <q>q</q></p>"
+        "<p>br<br>line<br/>two</p>"
+    ),
+    "links": (
+        "<p><a href='https://x.com'>https://x.com</a> <a href=''>empty</a> <a>noref</a> "
+        "<a href='/img'><img src='a.png' alt='A'></a> <a href='/t' title='x'>https://t</a></p>"
+    ),
+    "fragment": "plain text <b>x</b> more",
+    "entities": "<p>a&nbsp;b &amp; c &lt;d&gt; &eacute; &#8212;</p>",
+    "media": (
+        "<video poster='p.png'><source src='v.mp4'>cap</video><video src='b.mp4'></video>"
+        "<figure><img src='a.png' alt='A' title='t \"x\"'><figcaption>Cap</figcaption></figure>"
+    ),
+    "layout": (
+        "<div>\n  <div>\n    <span>x</span>\n    <span>y</span>\n  </div>\n"
+        "  <section><article>art</article></section>\n  <nav><a href='/'>home</a></nav>\n</div>"
+    ),
+    "xhtml": "<html xmlns='http://www.w3.org/1999/xhtml'><body><p>x</p></body></html>",
+    "empty": "",
+}
+
+
+def _article(paragraphs: int) -> str:
+    body = "".join(
+        f"<div class='c'><h2>Section {i}</h2><p>Text with <a href='/p{i}'>link_{i}</a>, <b>bold</b> and "
+        f"<code>x*{i}</code>.</p><ul><li>a</li><li>b <i>i</i></li></ul><script>track({i})</script></div>\n"
+        for i in range(paragraphs)
+    )
+    return f"<html><head><title>Article</title><style>.c{{}}</style></head><body>{body}</body></html>"
+
+
+class TestFastCleaner(unittest.TestCase):
+
+    def setUp(self):
+        self.simple = SimpleCleaner()
+        self.fast = FastCleaner()
+
+    def test_matches_simple_cleaner(self):
+        """FastCleaner emits the same markdown as SimpleCleaner on well-formed HTML."""
+        for name, html in PAGES.items():
+            for mime in ("text/html", "application/xhtml+xml"):
+                with self.subTest(page=name, mime=mime):
+                    self.assertEqual(self.fast.to_markdown(html, mime), self.simple.to_markdown(html, mime))
+
+    def test_matches_simple_cleaner_large_page(self):
+        """Equivalence also holds on a long generated article."""
+        html = _article(300)
+        self.assertEqual(self.fast.to_markdown(html, "text/html"), self.simple.to_markdown(html, "text/html"))
+
+    def test_drops_noisy_subtrees(self):
+        """Script/style/noscript/iframe/template/svg content never reaches the markdown."""
+        md = self.fast.to_markdown(PAGES["noise"] + PAGES["document"], "text/html")
+        for leaked in ("var a", "color:red", "ns", "x</", "<text>", "t\n"):
+            self.assertNotIn(leaked, md)
+        self.assertIn("beforeafter end", md)
+
+    def test_xml_declaration(self):
+        """Documents that declare an encoding are accepted as str."""
+        html = "<?xml version='1.0' encoding='utf-8'?><html><body><p>café</p></body></html>"
+        self.assertEqual(self.fast.to_markdown(html, "application/xhtml+xml"), "café")
+
+    def test_plain_text_and_unknown_mime(self):
+        """Non-HTML MIME types behave like SimpleCleaner."""
+        for text, mime in (("a  b\n\n\n\nc", "text/plain"), ("<p>x</p>", "text/plain"),
+                           ("no markup", "application/x-unknown"), ("<b>tag</b> soup", "application/x-unknown")):
+            with self.subTest(mime=mime, text=text):
+                self.assertEqual(self.fast.to_markdown(text, mime), self.simple.to_markdown(text, mime))
+
+    def test_registered_in_router(self):
+        """The router creates FastCleaner under the name 'fast'."""
+        router = CleanerRouter()
+        self.assertIn("fast", router.registered())
+        self.assertIsInstance(router.create("fast"), FastCleaner)
+
+
+if __name__ == '__main__':
+    unittest.main()
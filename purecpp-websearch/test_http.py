@@ -0,0 +1,215 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+import httpx
+
+from purecpp_websearch.websearch.exceptions import ConfigError, FetchError, RateLimitError
+from purecpp_websearch.websearch.http import AsyncHttpClient, HttpClient
+from purecpp_websearch.websearch.ratelimit import TokenBucket, parse_retry_after
+
+
+def mock_client(handler):
+    return httpx.Client(transport=httpx.MockTransport(handler))
+
+
+class FakeClock:
+    """Stands in for the `time` module: sleeping only moves the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+class ClockTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        for module in ("http", "ratelimit"):
+            patcher = mock.patch(f"purecpp_websearch.websearch.{module}.time", self.clock)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def replay(self, responses, **kw):
+        """HttpClient over a transport answering with `responses` (Response or exception) in order."""
+        self.calls = []
+
+        def handler(request):
+            self.calls.append(self.clock.now)
+            r = responses.pop(0)
+            if isinstance(r, Exception):
+                raise r
+            return r
+
+        kw.setdefault("backoff_base_s", 0.001)
+        return HttpClient(client=mock_client(handler), **kw)
+
+
+class TestPooledHttpClient(unittest.TestCase):
+
+    def test_shared_client_keeps_own_headers(self):
+        """HttpClients on one pool send their own default headers and leave the pool open."""
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get("x-app"))
+            return httpx.Response(200, text="ok")
+
+        shared = mock_client(handler)
+        a = HttpClient(headers={"X-App": "a"}, client=shared)
+        b = HttpClient(headers={"X-App": "b"}, client=shared)
+        self.assertEqual(a.get_text("https://h.test/1"), "ok")
+        self.assertEqual(b.get_text("https://h.test/2", headers={"X-App": "override"}), "ok")
+        a.close()
+        b.close()
+        self.assertFalse(shared.is_closed)
+        self.assertEqual(seen, ["a", "override"])
+
+    def test_owned_client_is_closed(self):
+        http = HttpClient()
+        http.close()
+        self.assertTrue(http._client.is_closed)
+
+    def test_error_status_raises_without_retry(self):
+        """A 404 is not retriable: one request, then HTTPStatusError."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(404)
+
+        http = HttpClient(retries=3, client=mock_client(handler))
+        with self.assertRaises(httpx.HTTPStatusError):
+            http.get("https://h.test/x")
+        self.assertEqual(calls, ["/x"])
+
+
+class TestRetries(ClockTestCase):
+
+    def test_retry_after_is_honored(self):
+        http = self.replay([httpx.Response(503, headers={"Retry-After": "2"}), httpx.Response(200, text="ok")])
+        self.assertEqual(http.get_text("https://h.test/"), "ok")
+        self.assertEqual(self.clock.sleeps, [2.0])
+
+    def test_long_retry_after_fails_fast(self):
+        http = self.replay([httpx.Response(429, headers={"Retry-After": "600"})], max_retry_after_s=60)
+        with self.assertRaises(RateLimitError):
+            http.get("https://h.test/")
+        self.assertEqual((len(self.calls), self.clock.sleeps), (1, []))
+
+    def test_transport_errors_back_off_exponentially(self):
+        """Connection errors are retried with a jittered backoff bounded by base * 2**attempt."""
+        http = self.replay([httpx.ConnectError("down"), httpx.ConnectError("down"), httpx.Response(200, text="ok")],
+                           retries=2, backoff_base_s=1.0)
+        self.assertEqual(http.get_text("https://h.test/"), "ok")
+        self.assertEqual(len(self.clock.sleeps), 2)
+        self.assertLessEqual(self.clock.sleeps[0], 1.0)
+        self.assertLessEqual(self.clock.sleeps[1], 2.0)
+
+    def test_retries_exhausted(self):
+        http = self.replay([httpx.Response(502), httpx.Response(502)], retries=1)
+        with self.assertRaises(httpx.HTTPStatusError):
+            http.get("https://h.test/")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_deadline_stops_retries(self):
+        http = self.replay([httpx.Response(503, headers={"Retry-After": "5"})], retries=3)
+        with self.assertRaises(TimeoutError):
+            http.get("https://h.test/", deadline_s=3)
+        self.assertEqual((len(self.calls), self.clock.sleeps), (1, []))
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after(" 7 "), 7.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertEqual(parse_retry_after("Thu, 01 Jan 1970 00:00:00 GMT"), 0.0)
+
+
+class TestRateLimiting(ClockTestCase):
+
+    def test_requests_are_spaced(self):
+        limiter = TokenBucket(rate_per_s=2, burst=1)
+        http = self.replay([httpx.Response(200) for _ in range(3)], rate_limiter=limiter)
+        for _ in range(3):
+            http.get("https://h.test/")
+        self.assertEqual(self.calls, [1000.0, 1000.5, 1001.0])
+
+    def test_429_on_last_attempt_still_pauses_limiter(self):
+        """A caller that gives up on a 429 still holds back the others sharing the limiter."""
+        limiter = TokenBucket(rate_per_s=100, burst=10)
+        http = self.replay([httpx.Response(429, headers={"Retry-After": "5"})], retries=0, rate_limiter=limiter)
+        with self.assertRaises(httpx.HTTPStatusError):
+            http.get("https://h.test/")
+        self.assertAlmostEqual(limiter.reserve(), 5.0)
+
+    def test_deadline_refunds_token(self):
+        """A request abandoned for its deadline does not keep the slot it reserved."""
+        limiter = TokenBucket(rate_per_s=1, burst=1)
+        http = self.replay([httpx.Response(503, headers={"Retry-After": "5"})], rate_limiter=limiter)
+        with self.assertRaises(TimeoutError):
+            http.get("https://h.test/", deadline_s=3)
+        self.assertEqual(len(self.calls), 1)
+        self.clock.now += 1
+        self.assertEqual(limiter.reserve(), 0.0)
+
+    def test_cancel_refunds_token(self):
+        """A request cancelled while it waits for its slot gives the slot back, sync and async."""
+        limiter = TokenBucket(rate_per_s=1, burst=1)
+        http = self.replay([httpx.Response(200)], rate_limiter=limiter)
+        http.get("https://h.test/")
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(FetchError):
+            http.get("https://h.test/", cancel=cancel)
+        self.assertEqual(len(self.calls), 1)
+        self.clock.now += 1
+        self.assertEqual(limiter.reserve(), 0.0)
+
+        async def main():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+            task = asyncio.ensure_future(AsyncHttpClient(client=client, rate_limiter=limiter).get("https://h.test/"))
+            await asyncio.sleep(0.05)  # waiting for the slot after the one reserved above
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await client.aclose()
+
+        asyncio.run(main())
+        self.clock.now += 1
+        self.assertEqual(limiter.reserve(), 0.0)
+
+    def test_bucket(self):
+        bucket = TokenBucket(rate_per_s=2, burst=2, max_wait_s=1)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+        with self.assertRaises(RateLimitError):
+            bucket.reserve()
+        self.clock.now += 1.0
+        self.assertEqual(bucket.reserve(), 0.5)  # the refused reservation took no token
+
+    def test_bucket_follows_rate_limit_headers(self):
+        bucket = TokenBucket(rate_per_s=1, burst=1, limit_window=0)
+        bucket.update_from_headers({"x-ratelimit-limit": "4, 1000", "x-ratelimit-remaining": "3, 0",
+                                    "x-ratelimit-reset": "1, 30"})
+        self.assertEqual((bucket.rate, bucket.burst), (4.0, 4))
+        self.assertEqual(bucket.reserve(max_wait_s=60), 30.0)
+
+    def test_shared_bucket_per_key(self):
+        a = TokenBucket.shared("test-shared", "key", 2.0, 3)
+        self.assertIs(TokenBucket.shared("test-shared", "key", 2, 3), a)
+        self.assertIsNot(TokenBucket.shared("test-shared", "other", 2, 3), a)
+        with self.assertRaises(ConfigError):
+            TokenBucket.shared("test-shared", "key", 5.0, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import httpx
+
+from purecpp_websearch.websearch.cache import HttpCache, canonical_url, freshness_lifetime
+from purecpp_websearch.websearch.fetchers.http_fetcher import AsyncHttpFetcher, HttpFetcher
+from purecpp_websearch.websearch.settings import Settings
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        patcher = mock.patch("purecpp_websearch.websearch.cache.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = HttpCache(os.path.join(self._tmp.name, "pages.sqlite"))
+        self.calls = []
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _fetcher(self, responses):
+        """HttpFetcher over a transport replaying `responses` (status, headers, body) in order."""
+        def handler(request):
+            self.calls.append(dict(request.headers))
+            status, headers, body = responses.pop(0)
+            return httpx.Response(status, headers={"content-type": "text/html", **headers}, text=body)
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        return HttpFetcher(Settings(), client=client, cache=self.cache)
+
+    def test_fresh_page_is_served_locally(self):
+        fetcher = self._fetcher([(200, {"cache-control": "max-age=60"}, "v1")])
+        self.assertEqual(fetcher.fetch_html("https://h.test/a"), "v1")
+        self.clock.now += 59
+        self.assertEqual(fetcher.fetch_html("https://h.test/a#frag"), "v1")
+        self.assertEqual(len(self.calls), 1)
+
+    def test_stale_page_is_revalidated(self):
+        """A stale page is revalidated with its ETag; a 304 serves the cached body and refreshes it."""
+        fetcher = self._fetcher([(200, {"cache-control": "max-age=10", "etag": '"e1"'}, "v1"),
+                                 (304, {"cache-control": "max-age=100"}, ""),
+                                 (200, {"etag": '"e2"', "cache-control": "max-age=0"}, "v2")])
+        fetcher.fetch_html("https://h.test/a")
+        self.clock.now += 11
+        self.assertEqual(fetcher.fetch_html("https://h.test/a"), "v1")
+        self.assertEqual(self.calls[1].get("if-none-match"), '"e1"')
+        self.clock.now += 99
+        self.assertEqual(fetcher.fetch_html("https://h.test/a"), "v1")
+        self.assertEqual(len(self.calls), 2)
+        self.clock.now += 2
+        self.assertEqual(fetcher.fetch_html("https://h.test/a"), "v2")
+        self.assertEqual(self.cache.get("https://h.test/a").headers["etag"], '"e2"')
+
+    def test_uncacheable_responses(self):
+        """no-store and responses that could never be reused are not stored."""
+        fetcher = self._fetcher([(200, {"cache-control": "no-store"}, "a"), (200, {}, "b")])
+        fetcher.fetch_html("https://h.test/a")
+        fetcher.fetch_html("https://h.test/b")
+        self.assertEqual(self.cache.stats()["pages"], 0)
+
+    def test_markdown_follows_its_page(self):
+        """Markdown is kept per cleaner for the exact body, and dropped with the page."""
+        self.cache.put("https://h.test/a", "body", {"cache-control": "max-age=60"})
+        self.cache.put_markdown("https://h.test/a", "simple", "body", "md")
+        self.assertEqual(self.cache.get_markdown("https://h.test/a", "simple", "body"), "md")
+        self.assertIsNone(self.cache.get_markdown("https://h.test/a", "simple", "other body"))
+        self.cache.put("https://h.test/a", "new", {"cache-control": "max-age=60"})
+        self.assertIsNone(self.cache.get_markdown("https://h.test/a", "simple", "body"))
+
+    def test_eviction_keeps_recent_pages(self):
+        small = HttpCache(os.path.join(self._tmp.name, "small.sqlite"), max_bytes=25)
+        try:
+            for name in "abc":
+                self.clock.now += 1
+                small.put(f"https://h.test/{name}", "x" * 10, {"cache-control": "max-age=60"})
+            self.assertIsNone(small.get("https://h.test/a"))
+            self.assertIsNotNone(small.get("https://h.test/c"))
+            self.assertLessEqual(small.stats()["bytes"], 25)
+        finally:
+            small.close()
+
+    def test_freshness_rules(self):
+        self.assertEqual(freshness_lifetime({"cache-control": "public, max-age=30"}), 30)
+        self.assertEqual(freshness_lifetime({"cache-control": "no-cache, max-age=30"}), 0)
+        self.assertIsNone(freshness_lifetime({"cache-control": "no-store"}))
+        self.assertEqual(freshness_lifetime({}, default_ttl_s=5), 5)
+        self.assertEqual(canonical_url("HTTPS://H.test:443/p?b=2&a=1#x"), "https://h.test/p?a=1&b=2")
+
+    def test_async_fetcher_uses_cache_off_the_loop(self):
+        """AsyncHttpFetcher reads, stores and revalidates pages in worker threads."""
+        threads = []
+        for name in ("get", "put", "revalidated"):
+            original = getattr(HttpCache, name)
+
+            def record(cache, *args, _original=original, _name=name):
+                threads.append((_name, threading.get_ident()))
+                return _original(cache, *args)
+
+            self.addCleanup(setattr, HttpCache, name, original)
+            setattr(HttpCache, name, record)
+
+        responses = [(200, {"cache-control": "max-age=10", "etag": '"e1"'}, "v1"), (304, {}, "")]
+
+        def handler(request):
+            status, headers, body = responses.pop(0)
+            return httpx.Response(status, headers={"content-type": "text/html", **headers}, text=body)
+
+        async def main():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            fetcher = AsyncHttpFetcher(Settings(), client=client, cache=self.cache)
+            first = await fetcher.fetch_html("https://h.test/a")
+            self.clock.now += 11
+            second = await fetcher.fetch_html("https://h.test/a")
+            await client.aclose()
+            return threading.get_ident(), first, second
+
+        loop_thread, first, second = asyncio.run(main())
+        self.assertEqual((first, second), ("v1", "v1"))
+        self.assertEqual([name for name, _ in threads], ["get", "put", "get", "revalidated"])
+        self.assertNotIn(loop_thread, [ident for _, ident in threads])
+
+
+if __name__ == '__main__':
+    unittest.main()
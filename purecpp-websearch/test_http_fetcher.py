@@ -0,0 +1,96 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from purecpp_websearch.websearch.cache import HttpCache
+from purecpp_websearch.websearch.exceptions import UnsupportedMimeError
+from purecpp_websearch.websearch.fetchers.http_fetcher import AsyncHttpFetcher, HttpFetcher
+from purecpp_websearch.websearch.settings import Settings
+
+CACHEABLE = {"content-type": "text/html; charset=utf-8", "cache-control": "max-age=600"}
+
+
+class Body:
+    """Streamed response body that records how many chunks were pulled."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.sent = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+    async def aiter(self):
+        for chunk in self:
+            yield chunk
+
+
+class TestStreamingFetch(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(os.path.join(self._tmp.name, "pages.sqlite"))
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def _fetch(self, body, headers=CACHEABLE, max_page_bytes=10, use_async=False):
+        settings = Settings(max_page_bytes=max_page_bytes)
+
+        def handler(request):
+            return httpx.Response(200, headers=headers, content=body.aiter() if use_async else body)
+
+        if not use_async:
+            fetcher = HttpFetcher(settings, client=httpx.Client(transport=httpx.MockTransport(handler)),
+                                  cache=self.cache)
+            return fetcher.fetch_html("https://h.test/page")
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return await AsyncHttpFetcher(settings, client=client, cache=self.cache).fetch_html("https://h.test/page")
+        return asyncio.run(main())
+
+    def test_body_over_cap_is_cut_and_not_cached(self):
+        """Past max_page_bytes the download stops; the cut page is returned but never cached."""
+        for use_async in (False, True):
+            with self.subTest(use_async=use_async):
+                body = Body([b"0123456", b"789abcdef", b"ghij", b"klmn"])
+                self.assertEqual(self._fetch(body, use_async=use_async), "0123456789")
+                self.assertLess(body.sent, len(body.chunks))
+                self.assertIsNone(self.cache.get("https://h.test/page"))
+
+    def test_body_under_cap_is_cached(self):
+        for use_async in (False, True):
+            with self.subTest(use_async=use_async):
+                self.cache.clear()
+                self.assertEqual(self._fetch(Body([b"<p>", b"ok</p>"]), use_async=use_async), "<p>ok</p>")
+                self.assertEqual(self.cache.get("https://h.test/page").body, "<p>ok</p>")
+
+    def test_multibyte_text_split_across_chunks(self):
+        text = "ação é ótima".encode("utf-8")
+        chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+        self.assertEqual(self._fetch(Body(chunks), max_page_bytes=0), "ação é ótima")
+
+    def test_unsupported_type_rejected_before_body(self):
+        body = Body([b"%PDF-1.7"] * 3)
+        with self.assertRaises(UnsupportedMimeError):
+            self._fetch(body, headers={"content-type": "application/pdf"})
+        self.assertEqual(body.sent, 0)
+
+    def test_generic_type_is_sniffed(self):
+        """Octet-stream bodies that look binary are dropped after the first chunk."""
+        body = Body([b"\x89PNG\r\n\x1a\n", b"rest", b"rest"])
+        with self.assertRaises(UnsupportedMimeError):
+            self._fetch(body, headers={"content-type": "application/octet-stream"})
+        self.assertEqual(body.sent, 1)
+        self.assertEqual(self._fetch(Body([b"<p>text</p>"]), headers={}, max_page_bytes=0), "<p>text</p>")
+
+
+if __name__ == '__main__':
+    unittest.main()
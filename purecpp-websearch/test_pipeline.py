@@ -0,0 +1,166 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import httpx
+
+from purecpp_websearch.websearch import SearchResult, WebSearch
+from purecpp_websearch.websearch.exceptions import ConfigError
+from purecpp_websearch.websearch.settings import Settings
+
+
+def make_ws(handler, **kw):
+    """WebSearch whose shared client answers from `handler` (no network, no search cache)."""
+    settings = Settings(brave_api_key="test", search_cache_ttl_s=0, brave_rate_per_s=100, brave_burst=100, **kw)
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    with mock.patch("purecpp_websearch.websearch.pipeline.build_client", return_value=client):
+        return WebSearch(settings=settings)
+
+
+def results(*paths):
+    return [SearchResult(title=p, url=f"https://site.test{p}") for p in paths]
+
+
+def read_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("websearch-read")]
+
+
+class TestReadMany(unittest.TestCase):
+
+    def test_rank_order_and_failures(self):
+        """Documents come back in rank order with their titles; failed pages are left out."""
+        def handler(request):
+            if request.url.path == "/missing":
+                return httpx.Response(404)
+            time.sleep(0.05 if request.url.path == "/a" else 0)
+            return httpx.Response(200, html=f"<p>page {request.url.path}</p>")
+
+        with make_ws(handler) as ws:
+            docs = ws.read_many(results("/a", "/missing", "/b"), workers=3)
+        self.assertEqual([(d.rank, d.title) for d in docs], [(0, "/a"), (2, "/b")])
+        self.assertIn("page /b", docs[1].content)
+
+    def test_deadline_stops_running_reads(self):
+        """At the deadline a read waiting to retry is abandoned instead of retrying on the client."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if request.url.path == "/slow":
+                return httpx.Response(503, headers={"Retry-After": "5"})
+            return httpx.Response(200, html="<p>fast</p>")
+
+        ws = make_ws(handler)
+        try:
+            t0 = time.monotonic()
+            docs = ws.read_many(results("/slow", "/fast"), workers=2, deadline_s=0.3)
+            self.assertEqual([d.title for d in docs], ["/fast"])
+            self.assertLess(time.monotonic() - t0, 2)
+            for t in read_threads():
+                t.join(2)
+            self.assertEqual(read_threads(), [])
+            self.assertEqual(calls.count("/slow"), 1)
+        finally:
+            ws.close()
+
+    def test_closing_iterator_stops_reads(self):
+        """Closing iter_read early drops queued reads and stops the running ones."""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if request.url.path != "/first":
+                return httpx.Response(503, headers={"Retry-After": "5"})
+            return httpx.Response(200, html="<p>first</p>")
+
+        with make_ws(handler) as ws:
+            it = ws.iter_read(results("/first", "/b", "/c", "/d"), workers=2)
+            self.assertEqual(next(it).title, "/first")
+            it.close()
+            for t in read_threads():
+                t.join(2)
+            self.assertEqual(read_threads(), [])
+        self.assertNotIn("/d", calls)
+        self.assertLessEqual(len(calls), 3)
+
+
+def search_handler(pages, slow=None):
+    """Brave answers with `pages`; the page at path `slow` waits for the `slow` event."""
+    def handler(request):
+        if request.url.host == "api.search.brave.com":
+            items = [{"title": p, "url": f"https://site.test{p}"} for p in pages]
+            return httpx.Response(200, json={"web": {"results": items}})
+        if slow is not None and request.url.path == slow[0]:
+            slow[1].wait(5)
+        return httpx.Response(200, html=f"<p>page {request.url.path}</p>")
+    return handler
+
+    def test_cleaning_in_process_pool(self):
+        """With clean_processes the pages are cleaned by the pool, with the same markdown."""
+        html = "<h1>Title</h1><p>Some <b>bold</b> text</p>"
+        with make_ws(lambda request: httpx.Response(200, html=html), clean_processes=2) as ws:
+            docs = ws.read_many(results("/a", "/b", "/c"))
+            expected = ws._cleaner.cleaner_cls().to_markdown(html, "text/html")
+        self.assertEqual([d.content for d in docs], [expected] * 3)
+
+
+class TestIterSearchAndRead(unittest.TestCase):
+
+    def test_yields_in_completion_order(self):
+        """Each document is yielded as soon as it is read, tagged with its search rank."""
+        release = threading.Event()
+        with make_ws(search_handler(["/slow", "/a", "/b"], slow=("/slow", release))) as ws:
+            it = ws.iter_search_and_read("q", k=3, workers=3)
+            first = [next(it), next(it)]
+            release.set()
+            rest = list(it)
+        self.assertEqual(sorted((d.rank, d.title) for d in first), [(1, "/a"), (2, "/b")])
+        self.assertEqual([(d.rank, d.title) for d in rest], [(0, "/slow")])
+        self.assertIn("page /slow", rest[0].content)
+
+    def test_structured_output_has_rank(self):
+        with make_ws(search_handler(["/a", "/b"])) as ws:
+            payload = ws.search_and_read_structured("q", k=2)
+        self.assertEqual([d["metadata"]["rank"] for d in payload["documents"]], [0, 1])
+
+
+class TestWebSearchInit(unittest.TestCase):
+
+    def test_provider_and_fetcher_share_one_pool(self):
+        """Search and page requests go through the same client; close() closes it."""
+        seen = []
+
+        def handler(request):
+            seen.append((request.url.host, request.headers.get("x-subscription-token")))
+            if request.url.host == "api.search.brave.com":
+                return httpx.Response(200, json={"web": {"results": [{"title": "T", "url": "https://site.test/p"}]}})
+            return httpx.Response(200, html="<p>body</p>")
+
+        ws = make_ws(handler)
+        docs = ws.search_and_read("q", k=1)
+        self.assertEqual([d.title for d in docs], ["T"])
+        self.assertEqual(seen, [("api.search.brave.com", "test"), ("site.test", None)])
+        self.assertIs(ws._provider._http._client, ws._fetcher._http._client)
+        ws.close()
+        self.assertTrue(ws._client.is_closed)
+
+    def test_unknown_cleaner_opens_nothing(self):
+        with mock.patch("purecpp_websearch.websearch.pipeline.build_client") as build:
+            with self.assertRaises(ValueError):
+                WebSearch(cleaner="nope", settings=Settings(brave_api_key="test"))
+        build.assert_not_called()
+
+    def test_failed_provider_closes_client_and_cleaner(self):
+        """A provider that cannot be built (no API key) leaves no client or cleaner processes behind."""
+        client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+        with mock.patch("purecpp_websearch.websearch.pipeline.build_client", return_value=client), \
+                mock.patch("purecpp_websearch.websearch.cleaners.pool.ProcessPoolCleaner.close") as close_pool:
+            with self.assertRaises(ConfigError):
+                WebSearch(settings=Settings(brave_api_key=None, clean_processes=1))
+        self.assertTrue(client.is_closed)
+        close_pool.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from purecpp_websearch.websearch import SearchResult
+from purecpp_websearch.websearch.cache import SearchCache
+from purecpp_websearch.websearch.exceptions import ConfigError
+from purecpp_websearch.websearch.providers.brave import AsyncBraveProvider, BraveProvider
+from purecpp_websearch.websearch.settings import Settings
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def make_results():
+    return [SearchResult(title="t", url="https://h.test/a", metadata={"brave_raw": {"tags": ["x"]}})]
+
+
+class TestSearchCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        patcher = mock.patch("purecpp_websearch.websearch.cache.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_callers_get_independent_copies(self):
+        """Editing returned results, nested metadata included, does not change the cache."""
+        cache = SearchCache(ttl_s=60)
+        first = cache.get_or_compute("k", make_results)
+        first[0].title = "edited"
+        first[0].metadata["brave_raw"]["tags"].append("y")
+        second = cache.get_or_compute("k", lambda: self.fail("recomputed"))
+        self.assertEqual((second[0].title, second[0].metadata), ("t", {"brave_raw": {"tags": ["x"]}}))
+
+    def test_ttl_and_persistence(self):
+        """Entries expire after the TTL and, with `path`, are shared between instances."""
+        path = os.path.join(self._tmp.name, "search.sqlite")
+        a = SearchCache(ttl_s=60, path=path)
+        a.put("k", make_results())
+        b = SearchCache(ttl_s=60, path=path)
+        self.assertEqual(b.get("k")[0].metadata, {"brave_raw": {"tags": ["x"]}})
+        self.clock.now += 61
+        self.assertIsNone(a.get("k"))
+        self.assertIsNone(b.get("k"))
+        a.close()
+        b.close()
+
+    def test_key_normalizes_query(self):
+        key = SearchCache.make_key("brave", {"q": "Ｈello   World ", "count": 3})
+        self.assertEqual(key, SearchCache.make_key("brave", {"count": 3, "q": "hello world"}))
+        self.assertNotEqual(key, SearchCache.make_key("brave", {"q": "hello world", "count": 4}))
+
+    def test_concurrent_lookups_are_coalesced(self):
+        cache = SearchCache(ttl_s=60)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return make_results()
+
+        out = []
+        threads = [threading.Thread(target=lambda: out.append(cache.get_or_compute("k", compute))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual((len(calls), len(out)), (1, 4))
+        self.assertEqual(len({id(r[0]) for r in out}), 4)
+
+    def test_async_lookups_are_coalesced_off_the_loop(self):
+        """aget_or_compute runs one upstream call and does its SQLite work in worker threads."""
+        cache = SearchCache(ttl_s=60, path=os.path.join(self._tmp.name, "search.sqlite"))
+        calls, threads = [], []
+        for name in ("get", "put"):
+            original = getattr(SearchCache, name)
+
+            def record(self_, *args, _original=original):
+                threads.append(threading.get_ident())
+                return _original(self_, *args)
+
+            self.addCleanup(setattr, SearchCache, name, original)
+            setattr(SearchCache, name, record)
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return make_results()
+
+        async def main():
+            out = await asyncio.gather(*(cache.aget_or_compute("k", compute) for _ in range(3)))
+            out.append(await cache.aget_or_compute("k", compute))
+            return threading.get_ident(), out
+
+        loop_thread, out = asyncio.run(main())
+        cache.close()
+        self.assertEqual((len(calls), len(out)), (1, 4))
+        self.assertTrue(threads)
+        self.assertNotIn(loop_thread, threads)
+
+
+
+class TestProviderCache(unittest.TestCase):
+
+    def test_bad_settings_open_no_cache(self):
+        """A provider whose HTTP settings are rejected never opens its search cache."""
+        settings = Settings(brave_api_key=None, search_cache_ttl_s=60)
+        for provider in (BraveProvider, AsyncBraveProvider):
+            with self.subTest(provider=provider.__name__), \
+                    mock.patch.object(SearchCache, "from_settings") as from_settings:
+                with self.assertRaises(ConfigError):
+                    provider(settings)
+                from_settings.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -63,9 +63,11 @@ def main():
 
     # --- 5. Generate Embeddings and Prepare Documents ---
     print("\nGenerating embeddings for web documents...")
+    # Web pages are usually longer than the model's context, so each page is
+    # embedded in overlapping windows pooled into one vector.
+    embeddings = embedding_model.embed_long_documents([doc.content for doc in search_results])
     documents_to_store = []
-    for doc in search_results:
-        embedding = embedding_model.embed_documents([doc.content])[0]
+    for doc, embedding in zip(search_results, embeddings):
         documents_to_store.append(
             Document(page_content=doc.content, embedding=embedding, metadata={'url': doc.url, 'title': doc.title})
         )